@@ -1,6 +1,7 @@
 import pickle
 
 import networkx
+from csr_graph import CSRGraph
 from datetime import *
 from math import pow
 
@@ -20,14 +21,54 @@ reaction_type_weights = {
 # Returns the multiplier that scales depending on how recently the action was performed
 def date_difference_rank_multiplier(action_date) -> float:
     current_date = datetime.today()
-    day_difference = (current_date - action_date).days
+    return day_difference_rank_multiplier((current_date - action_date).days)
 
+
+# Returns the multiplier for an action performed the given number of whole days ago
+def day_difference_rank_multiplier(day_difference: int) -> float:
     if day_difference <= 0:
         return 70  # 1.8^(7-0) + 1/1 == 62.222
 
     return pow(1.8, 7 - day_difference) + 1 / day_difference
 
 
+# Pins the current date for a whole graph build or feed request and memoizes the date multiplier
+# The multiplier only depends on the number of whole days since the action, so it is computed once per day difference
+class DecayClock:
+    def __init__(self, current_date: datetime = None):
+        self.current_date = datetime.today() if current_date is None else current_date
+        self.multipliers: dict = {}  # Maps a day difference to its multiplier
+
+    # Returns the multiplier that scales depending on how recently the action was performed
+    def multiplier(self, action_date) -> float:
+        day_difference = (self.current_date - action_date).days
+        multiplier = self.multipliers.get(day_difference)
+        if multiplier is None:
+            multiplier = self.day_multiplier(day_difference)
+        return multiplier
+
+    # Returns the multiplier for an action performed the given number of whole days ago
+    def day_multiplier(self, day_difference: int) -> float:
+        multiplier = self.multipliers.get(day_difference)
+        if multiplier is None:
+            multiplier = self.multipliers[day_difference] = day_difference_rank_multiplier(day_difference)
+        return multiplier
+
+
+# Returns an index that is built with a DecayClock (a SearchRanker or CandidateIndex) for today: the index itself while
+# its clock is on today's date, otherwise the index that rebuild(clock) builds with today's clock, e.g. in a server that
+# runs past midnight. The new index is kept in today_index for the following calls, while the requests that already
+# use the old one keep it. Concurrent calls can both rebuild it at midnight, which gives the same index
+def index_of_today(index, rebuild):
+    clock = DecayClock()
+    if clock.current_date.date() == index.clock.current_date.date():
+        return index
+    today_index = index.today_index
+    if today_index is None or today_index.clock.current_date.date() != clock.current_date.date():
+        today_index = index.today_index = rebuild(clock)
+    return today_index
+
+
 # Returns the comment affinity between the user & second user
 # comment_affinity = constant * date multiplier for each comment by the user on a second user's status
 def comment_affinity(user_name: str, second_user_name: str, comments, statuses) -> float:
@@ -83,55 +124,260 @@ def affinity(user_name: str, second_user_name: str, comments, reactions, shares,
     return comment_rank + reaction_rank + share_rank
 
 
-def insert_data(graph, friends, comments, reactions, shares, statuses, statuses_by_user) -> networkx.DiGraph:
+# The action types that make up the affinity, in the order their ranks are added: (date key, weight of an action)
+action_types = (
+    ('comment_published', lambda comment: 40),
+    ('reacted', lambda reaction: reaction_type_weights[reaction['type_of_reaction']]),
+    ('status_shared', lambda share: 60)
+)
+
+
+# Holds the summed action weights of every (user, author) pair, keyed by the number of whole days between the action
+# and the current date of the clock
+# Each action is visited once and its status author is looked up instead of rescanning the actions for every user pair
+# The state grows with the number of pairs and days, not with the number of actions. The action weights are integers,
+# so the sums of a day do not depend on the order of the actions, and the days are added up in a fixed order: new
+# actions can be added later with the same result as a full rebuild with the same clock
+class AffinityState:
+    def __init__(self, friends: dict, clock: DecayClock = None):
+        self.friends = friends
+        self.clock = DecayClock() if clock is None else clock
+        # Maps a user to a dictionary of authors, which maps a day difference to the summed weight of the actions
+        self.pairs: dict = {}
+        # Maps an unknown status id to a dictionary of the users that acted on it, which maps a day difference to the
+        # summed weight of their actions
+        self.unknown_status_actions: dict = {}
+        # Maps a status id that has actions to its author
+        self.status_authors: dict = {}
+
+    # Adds the summed weight of actions performed the given number of days ago to the (user, author) pair
+    def add_weight(self, user_name: str, author: str, day_difference: int, weight: int):
+        days = self.pairs.setdefault(user_name, {}).setdefault(author, {})
+        days[day_difference] = days.get(day_difference, 0) + weight
+
+    # Adds the comments, reactions and shares (dictionaries of user action lists) that follow the ones already added
+    # Returns the set of (user, author) pairs whose affinity has changed
+    def add_actions(self, comments, reactions, shares, statuses) -> set:
+        changed_pairs = set()
+        current_date = self.clock.current_date
+        for action_type, actions in enumerate((comments, reactions, shares)):
+            date_key, weight = action_types[action_type]
+            for user_name, user_actions in actions.items():
+                for action in user_actions:
+                    status_id = action['status_id']
+                    day_difference = (current_date - action[date_key]).days
+                    status = statuses.get(status_id)
+                    if status is None:
+                        days = self.unknown_status_actions.setdefault(status_id, {}).setdefault(user_name, {})
+                        days[day_difference] = days.get(day_difference, 0) + weight(action)
+                    else:
+                        author = status['author']
+                        self.status_authors[status_id] = author
+                        self.add_weight(user_name, author, day_difference, weight(action))
+                        changed_pairs.add((user_name, author))
+
+        return changed_pairs
+
+    # Adds the weights of the earlier actions on the given new statuses
+    # Returns the set of (user, author) pairs whose affinity has changed
+    def add_statuses(self, new_statuses: dict) -> set:
+        changed_pairs = set()
+        for status_id, status in new_statuses.items():
+            author = status['author']
+            if self.status_authors.get(status_id, author) != author:
+                raise ValueError(f"Status {status_id} has changed its author, the graph has to be rebuilt")
+
+            for user_name, days in self.unknown_status_actions.pop(status_id, {}).items():
+                self.status_authors[status_id] = author
+                for day_difference, weight in days.items():
+                    self.add_weight(user_name, author, day_difference, weight)
+                changed_pairs.add((user_name, author))
+
+        return changed_pairs
+
+    # Returns the affinity between the user and the author from their actions
+    def affinity(self, user_name: str, author: str) -> float:
+        days = self.pairs.get(user_name, {}).get(author)
+        if days is None:
+            return 0
+
+        day_multiplier = self.clock.day_multiplier
+        rank = 0
+        for day_difference in sorted(days):
+            rank += days[day_difference] * day_multiplier(day_difference)
+        return rank
+
+    # Returns the graph edge weight between the user and the second user, 0 if there should be no edge
+    def edge_weight(self, user_id: str, second_user_id: str, statuses_by_user) -> float:
+        # If the second user is the user's friend, increase the affinity between them
+        if second_user_id in self.friends[user_id]:
+            return 5000
+
+        # If the second user is not a friend and not an author of any statuses, there is no edge
+        # Lastly, there is no need to create an edge between a user and himself
+        if second_user_id not in statuses_by_user or second_user_id == user_id:
+            return 0
+
+        return self.affinity(user_id, second_user_id)
+
+    # Yields the (user, second user, weight) edges with a positive weight
+    # Users are visited in the same order as the pair loop so that edges are added in the same order
+    def edges(self, statuses_by_user):
+        user_order = {user_id: index for index, user_id in enumerate(self.friends.keys())}
+        for user_id in self.friends.keys():
+            user_pairs = self.pairs.get(user_id, {})
+            second_user_ids = [second_user_id for second_user_id in set(self.friends[user_id]) | user_pairs.keys()
+                               if second_user_id in user_order]
+            second_user_ids.sort(key=user_order.get)
+
+            for second_user_id in second_user_ids:
+                user_affinity = self.edge_weight(user_id, second_user_id, statuses_by_user)
+                if user_affinity > 0:
+                    yield user_id, second_user_id, user_affinity
+
+
+# Inserts the data into the graph, a new graph also stores its AffinityState for insert_delta
+def insert_data(graph, friends, comments, reactions, shares, statuses, statuses_by_user,
+                clock: DecayClock = None) -> networkx.DiGraph:
     if graph is None:
         # Weighted graph -> user A likes user B's posts but user B doesn't like user A's posts
         graph = networkx.DiGraph()
+        graph.graph['affinity_state'] = state = AffinityState(friends, clock)
+    else:
+        state = AffinityState(friends, clock)
 
-    user_list = friends.keys()
-    # Create an edge between all users
-    for user_id in user_list:
-        for second_user_id in user_list:
-            user_affinity = 0
+    state.add_actions(comments, reactions, shares, statuses)
 
-            # If the second user is the user's friend, increase the affinity between them
-            if second_user_id in friends[user_id]:
-                user_affinity += 5000
-            else:
-                # If the second user is not a friend and an author of any statuses, continue looping through users
-                # If the second user is not an author of any statuses, continue looping through users because
-                # Lastly, there is no need to create an edge between a user and himself
-                if second_user_id not in statuses_by_user or second_user_id == user_id:
-                    continue
+    for user_id, second_user_id, user_affinity in state.edges(statuses_by_user):
+        if not graph.has_edge(user_id, second_user_id):
+            graph.add_edge(user_id, second_user_id, weight=user_affinity)
+        else:
+            graph[user_id][second_user_id]['weight'] += user_affinity
+
+    return graph
 
-                user_affinity += affinity(user_id, second_user_id, comments, reactions, shares, statuses)
 
-            if user_affinity > 0:
-                if not graph.has_edge(user_id, second_user_id):
-                    graph.add_edge(user_id, second_user_id, weight=user_affinity)
-                else:
-                    graph[user_id][second_user_id]['weight'] += user_affinity
+# Returns a read-only CSRGraph with the same edges and weights as insert_data, built from the affinity state without the
+# networkx graph
+def build_compact_graph(friends, comments, reactions, shares, statuses, statuses_by_user,
+                        clock: DecayClock = None) -> CSRGraph:
+    state = AffinityState(friends, clock)
+    state.add_actions(comments, reactions, shares, statuses)
+    return CSRGraph.from_edges(state.edges(statuses_by_user))
+
+
+# Inserts only new data into a graph built by insert_data, without recomputing all pairs
+# comments, reactions and shares hold only the new actions, new_statuses only the new statuses, while statuses and
+# statuses_by_user are the merged dictionaries. Only the (user, author) edges affected by the new data are updated,
+# and the weights are identical to a full rebuild on the merged data with the clock of the build. The other edges were
+# decayed on the day of the build, so the delta can only be inserted on that day: ValueError is raised when the
+# clock (today by default) has another date
+# If a changed_edges set is given, the (user, author) pairs whose edges were added or updated are added to it
+def insert_delta(graph, comments, reactions, shares, new_statuses, statuses, statuses_by_user,
+                 changed_edges: set = None, clock: DecayClock = None) -> networkx.DiGraph:
+    if isinstance(graph, CSRGraph):
+        raise ValueError("A compact graph is read-only, new data has to be inserted into the networkx graph")
+
+    state = graph.graph.get('affinity_state')
+    if state is None:
+        raise ValueError("The graph does not store its affinity state, it has to be rebuilt with insert_data")
+    if clock is None:
+        clock = DecayClock()
+    if clock.current_date.date() != state.clock.current_date.date():
+        raise ValueError(f"The graph was built on {state.clock.current_date.date()}, its weights are stale on "
+                         f"{clock.current_date.date()}; it has to be rebuilt with insert_data, or use a live graph")
+
+    changed_pairs = state.add_statuses(new_statuses)
+    changed_pairs |= state.add_actions(comments, reactions, shares, statuses)
+
+    for user_id, second_user_id in changed_pairs:
+        if user_id not in state.friends or second_user_id not in state.friends:
+            continue
+
+        user_affinity = state.edge_weight(user_id, second_user_id, statuses_by_user)
+        if user_affinity > 0:
+            if not graph.has_edge(user_id, second_user_id):
+                graph.add_edge(user_id, second_user_id, weight=user_affinity)
+            else:
+                graph[user_id][second_user_id]['weight'] = user_affinity
+            if changed_edges is not None:
+                changed_edges.add((user_id, second_user_id))
 
     return graph
 
 
+# Returns a dictionary which maps every user that the user has an edge to, to the edge weight
+# Works for the networkx graph and for graphs with their own out_weights (CSR and live graphs), and does not modify
+# the graph
+def out_weights(graph, user_name: str) -> dict:
+    if not isinstance(graph, networkx.DiGraph):
+        return graph.out_weights(user_name)
+    if user_name not in graph:
+        return {}
+    return {author: edge['weight'] for author, edge in graph[user_name].items()}
+
+
 def status_popularity_rank(num_comments, num_shares, num_likes, num_loves, num_wows, num_hahas, num_sads, num_angrys,
                            num_special):
     return num_comments * 40 + num_shares * 10 + num_likes * 5 + num_loves * 10 + num_wows * 25 + num_hahas * 10 + num_sads * 5 + num_angrys * 25 + num_special * 30
 
 
-def get_affinity_graph(friends, comments, reactions, shares, statuses, statuses_by_users):
+# Returns the popularity of a status, using the value stored at load / insert time when available
+def status_popularity(status: dict):
+    popularity = status.get('popularity')
+    if popularity is None:
+        popularity = status_popularity_rank(status['num_comments'], status['num_shares'], status['num_likes'],
+                                            status['num_loves'], status['num_wows'], status['num_hahas'],
+                                            status['num_sads'], status['num_angrys'], status['num_special'])
+    return popularity
+
+
+# Stores the popularity of every status so that it is not recomputed on every feed request
+def insert_status_popularity(statuses: dict) -> dict:
+    for status in statuses.values():
+        status['popularity'] = status_popularity_rank(status['num_comments'], status['num_shares'],
+                                                      status['num_likes'], status['num_loves'], status['num_wows'],
+                                                      status['num_hahas'], status['num_sads'], status['num_angrys'],
+                                                      status['num_special'])
+    return statuses
+
+
+# Returns the affinity graph from graph.obj, or builds and saves it if the file does not exist or rebuild is set
+# With compact set, the graph is a read-only CSRGraph, which new data can not be inserted into, saved to graph_csr.obj,
+# which load_compact_graph loads without unpickling the networkx graph. A compact graph that has to be built is built
+# with build_compact_graph and graph.obj is not written; otherwise the graph from graph.obj is converted
+def get_affinity_graph(friends, comments, reactions, shares, statuses, statuses_by_users, compact: bool = False,
+                       rebuild: bool = False):
     try:
+        if rebuild:
+            raise FileNotFoundError
         graph_file_obj = open("graph.obj", "rb")
         graph = pickle.load(graph_file_obj)
         graph_file_obj.close()
         print("Found graph in file")
-        print(graph)
-        return graph
     except FileNotFoundError:
-        print("Graph not found in file")
-        graph = insert_data(None, friends, comments, reactions, shares, statuses, statuses_by_users)
-        graph_file_obj = open("graph.obj", "wb")
-        pickle.dump(graph, graph_file_obj)
-        graph_file_obj.close()
-        return graph
+        print("Graph in file is out of date" if rebuild else "Graph not found in file")
+        if compact:
+            graph = build_compact_graph(friends, comments, reactions, shares, statuses, statuses_by_users)
+        else:
+            graph = insert_data(None, friends, comments, reactions, shares, statuses, statuses_by_users)
+            graph_file_obj = open("graph.obj", "wb")
+            pickle.dump(graph, graph_file_obj)
+            graph_file_obj.close()
+
+    if compact:
+        if not isinstance(graph, CSRGraph):
+            graph = CSRGraph.from_networkx(graph)
+        with open("graph_csr.obj", "wb") as graph_file_obj:
+            pickle.dump(graph, graph_file_obj)
+    print(graph)
+    return graph
+
+
+# Returns the compact graph saved by get_affinity_graph, only its users and flat arrays are unpickled
+def load_compact_graph(path: str = "graph_csr.obj") -> CSRGraph:
+    with open(path, "rb") as graph_file_obj:
+        graph = pickle.load(graph_file_obj)
+    print("Found compact graph in file")
+    print(graph)
+    return graph
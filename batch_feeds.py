@@ -0,0 +1,128 @@
+import argparse
+import multiprocessing
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+
+from affinity_graph import DecayClock, out_weights
+from candidates import CandidateIndex
+from csr_graph import CSRGraph
+from live_graph import LiveAffinityGraph
+from main import load_data, rank_feed
+from parse_files_dict import load_friends
+
+# The graph, statuses and feed parameters of a worker process
+# With the fork start method the workers inherit them from the parent, so they share its memory pages. With spawn (the
+# only start method on Windows) the initializer arguments are pickled, so every worker unpickles its own copy of the
+# graph and statuses
+worker_state: dict = {}
+
+
+# Returns the fork context where the platform supports it, otherwise None for the default start method
+def worker_context():
+    if "fork" in multiprocessing.get_all_start_methods():
+        return multiprocessing.get_context("fork")
+    return None
+
+
+def init_worker(graph, statuses: dict, status_columns, candidate_index, k: int, current_date: datetime):
+    worker_state.update(graph=graph, statuses=statuses, status_columns=status_columns,
+                        candidate_index=candidate_index, k=k, clock=DecayClock(current_date))
+
+
+# Returns a (user, [(status id, relevance)]) pair with the top k feed of every user
+def rank_users(users: list[str]) -> list[(str, list[(str, float)])]:
+    graph, statuses, status_columns = worker_state['graph'], worker_state['statuses'], worker_state['status_columns']
+    candidate_index, k, clock = worker_state['candidate_index'], worker_state['k'], worker_state['clock']
+    feeds = []
+    for user in users:
+        if status_columns is not None:
+            feed = status_columns.top_statuses(graph, user, k, clock)
+        elif candidate_index is not None:
+            feed = [(status['status_id'], relevance)
+                    for relevance, status in candidate_index.top_statuses(out_weights(graph, user), k)]
+        else:
+            feed = [(feed_status.status_id, feed_status.relevance)
+                    for feed_status in rank_feed(out_weights(graph, user), statuses, {}, k, clock)]
+        feeds.append((user, feed))
+    return feeds
+
+
+# Writes one line per user: the user followed by tab separated "status id:relevance" pairs, most relevant first
+def write_feeds(file, feeds: list[(str, list[(str, float)])]):
+    file.writelines(user + ''.join(f"\t{status_id}:{relevance:.6g}" for status_id, relevance in feed) + "\n"
+                    for user, feed in feeds)
+
+
+# Computes the top k feed of every user in a pool of worker processes and streams them to the output file in the
+# order of the users. Returns the number of users per second
+# The workers rank with the StatusColumns store if one is given, otherwise they only score the candidates of a
+# CandidateIndex, unless use_candidates is unset and they score every status of the status dictionary
+def generate_feeds(graph, statuses: dict, users: list[str], output_path: str, k: int = 10, workers: int = None,
+                   chunk_size: int = 256, status_columns=None, clock: DecayClock = None,
+                   use_candidates: bool = True) -> float:
+    if workers is None:
+        workers = os.cpu_count()
+    if clock is None:
+        clock = DecayClock()
+    # The compact graph is a few flat arrays, which the workers read without touching reference counts on every edge
+    if isinstance(graph, LiveAffinityGraph):
+        graph = graph.to_csr(clock)
+    elif not isinstance(graph, CSRGraph):
+        graph = CSRGraph.from_networkx(graph)
+
+    # Split the users into enough chunks to keep every worker busy
+    chunk_size = max(1, min(chunk_size, -(-len(users) // (workers * 4))))
+
+    timer = datetime.now()
+    candidate_index = None
+    if status_columns is None and use_candidates:
+        candidate_index = CandidateIndex(statuses, {}, clock)
+    initargs = (graph, statuses, status_columns, candidate_index, k, clock.current_date)
+    chunks = [users[i:i + chunk_size] for i in range(0, len(users), chunk_size)]
+    with open(output_path, "w") as file:
+        if workers <= 1:
+            init_worker(*initargs)
+            for chunk in chunks:
+                write_feeds(file, rank_users(chunk))
+        else:
+            with ProcessPoolExecutor(max_workers=workers, mp_context=worker_context(), initializer=init_worker,
+                                     initargs=initargs) as executor:
+                for feeds in executor.map(rank_users, chunks):
+                    write_feeds(file, feeds)
+
+    elapsed = (datetime.now() - timer).total_seconds()
+    users_per_second = len(users) / elapsed if elapsed > 0 else float('inf')
+    print(f"Generated {len(users)} feeds with {workers} workers after {elapsed:.2f} seconds "
+          f"({users_per_second:.1f} users/s).")
+    return users_per_second
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Precomputes the feeds of many users")
+    parser.add_argument("--output", default="feeds.tsv")
+    parser.add_argument("--users", help="A file with one user per line, all users in friends.csv by default")
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--workers", type=int, default=os.cpu_count())
+    parser.add_argument("--columnar", action="store_true", help="Rank with the NumPy status store")
+    args = parser.parse_args()
+
+    sys.setrecursionlimit(30000)
+    graph, sentence_trie, statuses, statuses_by_users = load_data(compact=True)
+    if args.users is not None:
+        with open(args.users) as file:
+            users = [line.strip() for line in file if line.strip()]
+    else:
+        users = list(load_friends("dataset/friends.csv"))
+
+    status_columns = None
+    if args.columnar:
+        from status_columns import StatusColumns
+        status_columns = StatusColumns(statuses)
+
+    generate_feeds(graph, statuses, users, args.output, args.k, args.workers, status_columns=status_columns)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,94 @@
+import argparse
+import os
+import sys
+import tempfile
+import time
+from math import isclose
+
+import networkx
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import affinity_graph
+from parse_files_dict import *
+from synthetic import write_scaled_dataset
+
+
+# datetime with today() pinned to the date of the first call, so that the pair loop, whose date multiplier reads the
+# wall clock, uses the same date as the clock of the single-pass engine
+class PinnedDatetime(affinity_graph.datetime):
+    pinned_date = None
+
+    @classmethod
+    def today(cls):
+        if cls.pinned_date is None:
+            cls.pinned_date = super().today()
+        return cls.pinned_date
+
+
+# The original O(U^2) pair loop, kept here as the baseline for the single-pass engine
+def insert_data_pair_loop(friends, comments, reactions, shares, statuses, statuses_by_user) -> networkx.DiGraph:
+    graph = networkx.DiGraph()
+    user_list = friends.keys()
+    for user_id in user_list:
+        for second_user_id in user_list:
+            user_affinity = 0
+            if second_user_id in friends[user_id]:
+                user_affinity += 5000
+            else:
+                if second_user_id not in statuses_by_user or second_user_id == user_id:
+                    continue
+                user_affinity += affinity_graph.affinity(user_id, second_user_id, comments, reactions, shares,
+                                                         statuses)
+
+            if user_affinity > 0:
+                graph.add_edge(user_id, second_user_id, weight=user_affinity)
+
+    return graph
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compares the single-pass affinity engine with the pair loop")
+    parser.add_argument("--scales", type=int, nargs="+", default=[1, 2, 4])
+    parser.add_argument("--skip-pair-loop-above", type=int, default=4,
+                        help="do not run the quadratic baseline for larger scales")
+    args = parser.parse_args()
+    affinity_graph.datetime = PinnedDatetime
+    clock = affinity_graph.DecayClock()
+
+    with tempfile.TemporaryDirectory() as directory:
+        for scale in args.scales:
+            paths = write_scaled_dataset(os.path.join(directory, str(scale)), scale)
+            friends = load_friends(paths["friends"])
+            comments = load_comments(paths["comments"])
+            reactions = load_reactions(paths["reactions"])
+            shares = load_shares(paths["shares"])
+            statuses = load_statuses(paths["statuses"])
+            statuses_by_users = load_statuses_by_users(paths["statuses"])
+
+            timer = time.perf_counter()
+            graph = affinity_graph.insert_data(None, friends, comments, reactions, shares, statuses,
+                                               statuses_by_users, affinity_graph.DecayClock(clock.current_date))
+            engine_time = time.perf_counter() - timer
+            print(f"scale={scale} users={len(friends)} edges={graph.number_of_edges()} "
+                  f"single-pass={engine_time:.3f}s", end="")
+
+            if scale > args.skip_pair_loop_above:
+                print()
+                continue
+
+            timer = time.perf_counter()
+            baseline = insert_data_pair_loop(friends, comments, reactions, shares, statuses, statuses_by_users)
+            pair_loop_time = time.perf_counter() - timer
+            weights = {(u, v): d['weight'] for u, v, d in graph.edges(data=True)}
+            baseline_weights = {(u, v): d['weight'] for u, v, d in baseline.edges(data=True)}
+            # Both builds use the same date, the weights only differ by the order that the floats are added in
+            mismatches = sum(1 for edge, weight in baseline_weights.items()
+                             if edge not in weights or not isclose(weights[edge], weight, rel_tol=1e-12))
+            mismatches += len(weights.keys() - baseline_weights.keys())
+            print(f" pair-loop={pair_loop_time:.3f}s speedup={pair_loop_time / engine_time:.1f}x "
+                  f"mismatched_edges={mismatches} same_order={list(graph.edges()) == list(baseline.edges())}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,44 @@
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from parse_files_dict import load_statuses
+from search_trie import Trie
+from synthetic import DATASET_DIR, copy_name
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compares stored top-N completions with full subtree enumeration")
+    parser.add_argument("--scale", type=int, default=4, help="number of copies of the original statuses")
+    parser.add_argument("--repeats", type=int, default=20)
+    args = parser.parse_args()
+    sys.setrecursionlimit(30000)
+
+    statuses = load_statuses(os.path.join(DATASET_DIR, "original_statuses.csv"))
+    trie = Trie()
+    timer = time.perf_counter()
+    for copy in range(args.scale):
+        for status_id, status in statuses.items():
+            trie.insert(status['status_message'], copy_name(status_id, copy))
+    print(f"build={time.perf_counter() - timer:.2f}s")
+
+    for prefix in ("a*", "t*", "th*", "cl*", "hillary*"):
+        timer = time.perf_counter()
+        for _ in range(args.repeats):
+            top_words = trie.autocomplete(prefix, 10)
+        top_latency = (time.perf_counter() - timer) / args.repeats * 1000
+
+        timer = time.perf_counter()
+        for _ in range(args.repeats):
+            all_words = trie.autocomplete_all(prefix)
+        all_latency = (time.perf_counter() - timer) / args.repeats * 1000
+
+        print(f"{prefix}: words={len(all_words)} top-10={top_latency:.3f}ms enumerate-all={all_latency:.2f}ms "
+              f"same_words={top_words == all_words[:10]}")
+
+
+if __name__ == '__main__':
+    main()
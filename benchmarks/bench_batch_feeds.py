@@ -0,0 +1,57 @@
+import argparse
+import os
+import sys
+import tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from affinity_graph import DecayClock, insert_status_popularity
+from batch_feeds import generate_feeds
+from status_columns import StatusColumns
+from synthetic_corpus import generate_graph, generate_statuses
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measures the batch feed throughput for different worker counts")
+    parser.add_argument("--statuses", type=int, default=20000)
+    parser.add_argument("--authors", type=int, default=2000)
+    parser.add_argument("--users", type=int, default=400)
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4])
+    parser.add_argument("--columnar", action="store_true", help="Rank with the NumPy status store")
+    args = parser.parse_args()
+
+    statuses = generate_statuses(args.statuses, args.authors)
+    insert_status_popularity(statuses)
+    graph = generate_graph(args.users, args.authors, 50)
+    users = [f"user_{user}" for user in range(args.users)]
+    status_columns = StatusColumns(statuses) if args.columnar else None
+    clock = DecayClock()
+
+    print(f"cpu_count={os.cpu_count()} statuses={args.statuses} users={args.users} columnar={args.columnar}")
+    with tempfile.TemporaryDirectory() as directory:
+        outputs = []
+        throughputs = []
+        for workers in args.workers:
+            output_path = os.path.join(directory, f"feeds_{workers}.tsv")
+            throughputs.append(generate_feeds(graph, statuses, users, output_path, workers=workers,
+                                              status_columns=status_columns, clock=clock))
+            with open(output_path) as file:
+                outputs.append(file.read())
+
+        for workers, throughput in zip(args.workers, throughputs):
+            print(f"workers={workers} users/s={throughput:.1f} speedup={throughput / throughputs[0]:.2f}x")
+        print(f"same_output={all(output == outputs[0] for output in outputs)} "
+              f"output_size={len(outputs[0].encode()) / 1024:.0f}KiB")
+
+        if status_columns is None:
+            # The candidate feeds against scoring every status
+            output_path = os.path.join(directory, "feeds_full.tsv")
+            throughput = generate_feeds(graph, statuses, users, output_path, workers=args.workers[0], clock=clock,
+                                        use_candidates=False)
+            with open(output_path) as file:
+                print(f"full: workers={args.workers[0]} users/s={throughput:.1f} "
+                      f"candidate_speedup={throughputs[0] / throughput:.2f}x same_as_full={file.read() == outputs[0]}")
+
+
+if __name__ == '__main__':
+    main()
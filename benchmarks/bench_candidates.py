@@ -0,0 +1,72 @@
+import argparse
+import os
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from affinity_graph import DecayClock, insert_status_popularity
+from candidates import CandidateIndex
+from main import get_candidate_feed, get_feed
+from parse_files_dict import insert_status_by_user
+from synthetic_corpus import generate_graph, generate_statuses
+
+
+def measure(function, repeats: int) -> float:
+    timings = []
+    for _ in range(repeats):
+        timer = time.perf_counter()
+        function()
+        timings.append(time.perf_counter() - timer)
+    return statistics.median(timings)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compares scoring every status with scoring the candidates")
+    parser.add_argument("--statuses", type=int, nargs="+", default=[20000, 100000])
+    parser.add_argument("--authors", type=int, default=5000)
+    parser.add_argument("--edges", type=int, default=200, help="Edges per user")
+    parser.add_argument("--users", type=int, default=20)
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--max-authors", type=int, default=20)
+    parser.add_argument("--repeats", type=int, default=3)
+    args = parser.parse_args()
+
+    graph = generate_graph(args.users, args.authors, args.edges)
+    users = [f"user_{user}" for user in range(args.users)]
+    clock = DecayClock()
+    for status_count in args.statuses:
+        statuses = generate_statuses(status_count, args.authors)
+        insert_status_popularity(statuses)
+        statuses_by_users = {}
+        for status in statuses.values():
+            insert_status_by_user(statuses_by_users, status)
+
+        timer = time.perf_counter()
+        candidate_index = CandidateIndex(statuses, statuses_by_users, clock)
+        build_time = time.perf_counter() - timer
+
+        feeds = {user: [(status.status_id, status.relevance) for status in get_feed(graph, user, statuses, {},
+                                                                                     args.k, clock)]
+                 for user in users}
+        same_feed = all(feeds[user] == [(status.status_id, status.relevance)
+                                        for status in get_candidate_feed(candidate_index, graph, user, args.k)]
+                        for user in users)
+        recall = statistics.mean(
+            len({status['status_id'] for _, status in candidate_index.user_top_statuses(graph, user, args.k, True,
+                                                                                        args.max_authors)}
+                & {status_id for status_id, _ in feeds[user]}) / len(feeds[user]) for user in users)
+
+        full = measure(lambda: [get_feed(graph, user, statuses, {}, args.k, clock) for user in users], args.repeats)
+        exact = measure(lambda: [get_candidate_feed(candidate_index, graph, user, args.k) for user in users],
+                        args.repeats)
+        approximate = measure(lambda: [candidate_index.user_top_statuses(graph, user, args.k, True, args.max_authors)
+                                       for user in users], args.repeats)
+        print(f"statuses={status_count} build={build_time:.2f}s full={full / len(users) * 1000:.2f}ms/feed "
+              f"exact={exact / len(users) * 1000:.2f}ms/feed approximate={approximate / len(users) * 1000:.2f}ms/feed "
+              f"same_feed={same_feed} approximate_recall={recall:.2f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,92 @@
+import argparse
+import os
+import pickle
+import random
+import statistics
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from affinity_graph import insert_status_popularity
+from csr_graph import CSRGraph
+from main import get_feed
+from synthetic_corpus import generate_graph, generate_statuses
+
+
+# Returns the result of the function and the memory that is still allocated by it after it returns
+def traced(function):
+    tracemalloc.start()
+    start = tracemalloc.get_traced_memory()[0]
+    result = function()
+    allocated = tracemalloc.get_traced_memory()[0] - start
+    tracemalloc.stop()
+    return result, allocated
+
+
+def measure(function, repeats: int) -> float:
+    timings = []
+    for _ in range(repeats):
+        timer = time.perf_counter()
+        function()
+        timings.append(time.perf_counter() - timer)
+    return statistics.median(timings)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compares the CSR graph with the networkx graph")
+    parser.add_argument("--users", type=int, default=2000)
+    parser.add_argument("--authors", type=int, default=5000)
+    parser.add_argument("--edges", type=int, default=250, help="Edges per user")
+    parser.add_argument("--lookups", type=int, default=200000)
+    parser.add_argument("--statuses", type=int, default=50000)
+    parser.add_argument("--feed-users", type=int, default=20)
+    parser.add_argument("--repeats", type=int, default=3)
+    args = parser.parse_args()
+
+    # The user and author names are allocated by the networkx graph and shared with the CSR graph
+    graph, networkx_memory = traced(lambda: generate_graph(args.users, args.authors, args.edges))
+    csr_graph, csr_memory = traced(lambda: CSRGraph.from_networkx(graph))
+    networkx_pickle = len(pickle.dumps(graph))
+    csr_pickle = len(pickle.dumps(csr_graph))
+    print(f"edges={csr_graph.number_of_edges()} networkx={networkx_memory / 2 ** 20:.1f}MiB "
+          f"pickle={networkx_pickle / 2 ** 20:.1f}MiB csr={csr_memory / 2 ** 20:.1f}MiB "
+          f"pickle={csr_pickle / 2 ** 20:.1f}MiB ratio={networkx_memory / csr_memory:.1f}x")
+
+    # Half of the lookups hit an edge and half miss
+    rng = random.Random(0)
+    edges = list(graph.edges)
+    pairs = [rng.choice(edges) for _ in range(args.lookups // 2)]
+    pairs += [(f"user_{rng.randrange(args.users)}", f"author_{rng.randrange(args.authors)}")
+              for _ in range(args.lookups - len(pairs))]
+    rng.shuffle(pairs)
+
+    def networkx_lookups():
+        adjacency = graph.adj
+        for user, author in pairs:
+            edge = adjacency[user].get(author)
+            weight = edge['weight'] if edge is not None else 0
+
+    def csr_lookups():
+        for user, author in pairs:
+            weight = csr_graph.weight(user, author)
+
+    same_weights = all(abs(graph.adj[user].get(author, {'weight': 0})['weight'] - csr_graph.weight(user, author))
+                       <= 1e-3 for user, author in pairs)
+    networkx_latency = measure(networkx_lookups, args.repeats) / len(pairs) * 1e9
+    csr_latency = measure(csr_lookups, args.repeats) / len(pairs) * 1e9
+    print(f"lookups={len(pairs)} networkx={networkx_latency:.0f}ns/lookup csr={csr_latency:.0f}ns/lookup "
+          f"same_weights={same_weights}")
+
+    statuses = generate_statuses(args.statuses, args.authors)
+    insert_status_popularity(statuses)
+    users = [f"user_{user}" for user in range(args.feed_users)]
+    csr_feed = measure(lambda: [get_feed(csr_graph, user, statuses, {}) for user in users], args.repeats)
+    networkx_feed = measure(lambda: [get_feed(graph, user, statuses, {}) for user in users], args.repeats)
+    print(f"statuses={args.statuses} networkx={networkx_feed / len(users) * 1000:.1f}ms/feed "
+          f"csr={csr_feed / len(users) * 1000:.1f}ms/feed")
+
+
+if __name__ == '__main__':
+    main()
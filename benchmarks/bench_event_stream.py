@@ -0,0 +1,114 @@
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+from datetime import datetime, time as day_time
+from math import isclose
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import affinity_graph
+from affinity_graph import DecayClock, out_weights
+from event_stream import EventIngestor
+from live_graph import LiveAffinityGraph
+from parse_files_dict import load_comments, load_friends, load_reactions, load_shares, load_statuses_with_users
+from synthetic import format_date, write_scaled_dataset
+
+
+# Returns the reactions as JSON event lines
+def reaction_events(reactions: dict) -> list[str]:
+    return [json.dumps({"type": "reaction", "status_id": reaction['status_id'],
+                        "type_of_reaction": reaction['type_of_reaction'], "reactor": reaction['reactor'],
+                        "reacted": format_date(reaction['reacted'])})
+            for user_reactions in reactions.values() for reaction in user_reactions]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compares streaming events into the live graph with rebuilding the "
+                                                 "affinity graph")
+    parser.add_argument("--scale", type=int, default=4, help="number of copies of the original statuses")
+    parser.add_argument("--reactions-per-user", type=int, default=20)
+    parser.add_argument("--streamed", type=float, default=0.1, help="fraction of every user's reactions to stream")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        paths = write_scaled_dataset(directory, args.scale, reactions_per_user=args.reactions_per_user)
+        friends = load_friends(paths["friends"])
+        comments = load_comments(paths["comments"])
+        reactions = load_reactions(paths["reactions"])
+        shares = load_shares(paths["shares"])
+        statuses, statuses_by_users = load_statuses_with_users(paths["statuses"])
+        events_path = os.path.join(directory, "events.jsonl")
+
+        # The last reactions of every user arrive as events after the graph is built
+        loaded_reactions = {}
+        streamed_reactions = {}
+        for user, user_reactions in reactions.items():
+            split = len(user_reactions) - int(len(user_reactions) * args.streamed)
+            loaded_reactions[user] = user_reactions[:split]
+            streamed_reactions[user] = user_reactions[split:]
+        events = reaction_events(streamed_reactions)
+        with open(events_path, "w") as file:
+            file.write("\n".join(events) + "\n")
+
+        # The end of the day, when the whole calendar days of the live graph and the days of the rebuild agree
+        clock = DecayClock(datetime.combine(datetime.today(), day_time.max))
+
+        timer = time.perf_counter()
+        graph = affinity_graph.insert_data(None, friends, comments, reactions, shares, statuses, statuses_by_users,
+                                           clock)
+        rebuild_time = time.perf_counter() - timer
+
+        timer = time.perf_counter()
+        live_graph = LiveAffinityGraph.from_data(friends, comments, loaded_reactions, shares, statuses,
+                                                 statuses_by_users)
+        live_build_time = time.perf_counter() - timer
+
+        ingestor = EventIngestor(live_graph, statuses)
+        timer = time.perf_counter()
+        changed_pairs = ingestor.ingest_file(events_path)
+        ingest_time = time.perf_counter() - timer
+        print(f"users={len(friends)} edges={graph.number_of_edges()} events={len(events)} "
+              f"changed_edges={len(changed_pairs)}")
+        print(f"rebuild={rebuild_time:.3f}s live_build={live_build_time:.3f}s ingest={ingest_time:.3f}s "
+              f"events_per_second={len(events) / ingest_time:.0f}")
+
+        timer = time.perf_counter()
+        graph_weights = {user: out_weights(graph, user) for user in friends}
+        graph_read_time = time.perf_counter() - timer
+        timer = time.perf_counter()
+        live_weights = {user: live_graph.out_weights(user, clock) for user in friends}
+        live_read_time = time.perf_counter() - timer
+
+        print(f"out_weights of all users: graph={graph_read_time:.3f}s live={live_read_time:.3f}s "
+              f"mismatched_edges={mismatched_edges(graph_weights, live_weights)}")
+
+        # Folding the old days keeps the weights of the day it folds on
+        stored_days = sum(len(days) for author_days in live_graph.histograms.values() for days in author_days.values())
+        timer = time.perf_counter()
+        live_graph.fold(clock)
+        fold_time = time.perf_counter() - timer
+        folded_days = sum(len(days) for author_days in live_graph.histograms.values() for days in author_days.values())
+        timer = time.perf_counter()
+        live_weights = {user: live_graph.out_weights(user, clock) for user in friends}
+        live_read_time = time.perf_counter() - timer
+        print(f"fold={fold_time:.3f}s stored_days={stored_days} folded_days={folded_days} "
+              f"live_read_after_fold={live_read_time:.3f}s "
+              f"mismatched_edges={mismatched_edges(graph_weights, live_weights)}")
+
+
+# Returns the number of edges that are missing from one of the out-weights or whose weights differ
+def mismatched_edges(graph_weights: dict, live_weights: dict) -> int:
+    mismatches = 0
+    for user, weights in graph_weights.items():
+        user_live_weights = live_weights[user]
+        mismatches += len(weights.keys() ^ user_live_weights.keys())
+        mismatches += sum(1 for author, weight in weights.items() if author in user_live_weights and
+                          not isclose(weight, user_live_weights[author], rel_tol=1e-9))
+    return mismatches
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,94 @@
+import argparse
+import operator
+import os
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from affinity_graph import date_difference_rank_multiplier, insert_status_popularity, status_popularity_rank
+from main import FeedStatus, get_columnar_feed, get_feed
+from status_columns import StatusColumns
+from synthetic_corpus import generate_graph, generate_statuses
+
+
+# The original feed, which builds a feed status for every status and sorts all of them
+def get_feed_full_sort(graph, user_name: str, statuses: dict, word_count_map: dict) -> list[FeedStatus]:
+    try:
+        user = graph[user_name]
+    except KeyError:
+        graph.add_node(user_name)
+        user = graph[user_name]
+
+    feed = []
+    for status_id, status in statuses.items():
+        author = status['author']
+        try:
+            second_user = user[author]
+        except KeyError:
+            graph.add_node(author)
+            graph.add_edge(user_name, author, weight=0)
+            second_user = user[author]
+
+        status_popularity = status_popularity_rank(status['num_comments'], status['num_shares'], status['num_likes'],
+                                                   status['num_loves'], status['num_wows'], status['num_hahas'],
+                                                   status['num_sads'], status['num_angrys'], status['num_special'])
+        status_relevance = (second_user['weight'] + status_popularity) * date_difference_rank_multiplier(
+            status['status_published'])
+        if word_count_map != {}:
+            status_relevance *= pow(word_count_map[status_id], 5)
+        feed.append(FeedStatus(status, status_relevance))
+
+    feed.sort(key=operator.attrgetter("relevance"), reverse=True)
+    return feed[:10]
+
+
+def measure(function, repeats: int) -> list[float]:
+    timings = []
+    for _ in range(repeats):
+        timer = time.perf_counter()
+        function()
+        timings.append(time.perf_counter() - timer)
+    return timings
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compares the top-k feed with the full sort feed")
+    parser.add_argument("--statuses", type=int, default=200000)
+    parser.add_argument("--authors", type=int, default=5000)
+    parser.add_argument("--users", type=int, default=20)
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--repeats", type=int, default=3)
+    args = parser.parse_args()
+
+    statuses = generate_statuses(args.statuses, args.authors)
+    insert_status_popularity(statuses)
+    graph = generate_graph(args.users, args.authors, 200)
+    users = [f"user_{user}" for user in range(args.users)]
+
+    baseline = measure(lambda: [get_feed_full_sort(graph, user, statuses, {}) for user in users], args.repeats)
+    top_k = measure(lambda: [get_feed(graph, user, statuses, {}, args.k) for user in users], args.repeats)
+
+    same_feed = all([status.message for status in get_feed_full_sort(graph, user, statuses, {})][:args.k] ==
+                    [status.message for status in get_feed(graph, user, statuses, {}, args.k)] for user in users)
+    baseline_latency = statistics.median(baseline) / len(users) * 1000
+    top_k_latency = statistics.median(top_k) / len(users) * 1000
+    print(f"statuses={args.statuses} k={args.k} full-sort={baseline_latency:.1f}ms/request "
+          f"top-k={top_k_latency:.1f}ms/request speedup={baseline_latency / top_k_latency:.2f}x "
+          f"same_feed={same_feed}")
+
+    status_columns = StatusColumns(statuses)
+    columnar = measure(lambda: [get_columnar_feed(graph, user, statuses, status_columns, args.k) for user in users],
+                       args.repeats)
+    same_feed = all([(status.message, status.relevance) for status in get_feed(graph, user, statuses, {}, args.k)] ==
+                    [(status.message, status.relevance)
+                     for status in get_columnar_feed(graph, user, statuses, status_columns, args.k)]
+                    for user in users)
+    columnar_latency = statistics.median(columnar) / len(users) * 1000
+    print(f"statuses={args.statuses} k={args.k} columnar={columnar_latency:.1f}ms/request "
+          f"speedup={baseline_latency / columnar_latency:.2f}x same_feed={same_feed}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,86 @@
+import argparse
+import gc
+import heapq
+import operator
+import os
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from affinity_graph import DecayClock, insert_status_popularity, status_popularity
+from main import FeedStatus, get_feed
+from synthetic_corpus import generate_graph, generate_statuses
+
+
+# The previous feed, which adds unknown users and a zero-weight edge for every author without an edge to the graph
+def get_feed_mutating(graph, user_name: str, statuses: dict, word_count_map: dict, k: int = 10,
+                      clock: DecayClock = None) -> list[FeedStatus]:
+    if clock is None:
+        clock = DecayClock()
+
+    try:
+        user = graph[user_name]
+    except KeyError:
+        graph.add_node(user_name)
+        user = graph[user_name]
+
+    ranked_statuses = []
+    for status_id, status in statuses.items():
+        author = status['author']
+        try:
+            second_user = user[author]
+        except KeyError:
+            graph.add_node(author)
+            graph.add_edge(user_name, author, weight=0)
+            second_user = user[author]
+
+        status_relevance = (second_user['weight'] + status_popularity(status)) * clock.multiplier(
+            status['status_published'])
+        if word_count_map != {}:
+            status_relevance *= pow(word_count_map[status_id], 5)
+        ranked_statuses.append((status_relevance, status))
+
+    top_statuses = heapq.nlargest(k, ranked_statuses, key=operator.itemgetter(0))
+    return [FeedStatus(status, status_relevance) for status_relevance, status in top_statuses]
+
+
+# Serves feeds for anonymous users and prints the traced memory and the number of edges after every batch of logins
+def stress(name: str, feed_function, graph, statuses: dict, logins: int, batch: int, clock: DecayClock):
+    gc.collect()
+    tracemalloc.start()
+    start_memory = tracemalloc.get_traced_memory()[0]
+    timer = time.perf_counter()
+    for login in range(1, logins + 1):
+        feed_function(graph, f"guest_{login}", statuses, {}, clock=clock)
+        if login % batch == 0:
+            gc.collect()
+            growth = tracemalloc.get_traced_memory()[0] - start_memory
+            print(f"{name}: logins={login} memory_growth={growth / 2 ** 20:.1f}MiB edges={graph.number_of_edges()}")
+    elapsed = time.perf_counter() - timer
+    tracemalloc.stop()
+    print(f"{name}: {elapsed / logins * 1000:.1f}ms/login (traced)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serves feeds for many unknown users and tracks the memory growth")
+    parser.add_argument("--statuses", type=int, default=20000)
+    parser.add_argument("--authors", type=int, default=2000)
+    parser.add_argument("--users", type=int, default=200)
+    parser.add_argument("--logins", type=int, default=200)
+    parser.add_argument("--batch", type=int, default=50)
+    args = parser.parse_args()
+
+    statuses = generate_statuses(args.statuses, args.authors)
+    insert_status_popularity(statuses)
+    clock = DecayClock()
+
+    stress("mutating", get_feed_mutating, generate_graph(args.users, args.authors, 50), statuses, args.logins,
+           args.batch, clock)
+    stress("read-only", get_feed, generate_graph(args.users, args.authors, 50), statuses, args.logins, args.batch,
+           clock)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,83 @@
+import argparse
+import os
+import random
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from parse_files_dict import load_statuses
+from search_trie import Trie
+from synthetic import DATASET_DIR
+
+
+# Returns the edit distance of two words
+def edit_distance(first: str, second: str) -> int:
+    previous_row = list(range(len(second) + 1))
+    for i, first_char in enumerate(first):
+        row = [i + 1]
+        for j, second_char in enumerate(second):
+            row.append(min(row[j] + 1, previous_row[j + 1] + 1, previous_row[j] + (first_char != second_char)))
+        previous_row = row
+    return previous_row[-1]
+
+
+# Returns a misspelling of the word: a deleted, replaced, inserted or swapped letter
+def misspell(word: str, rng: random.Random) -> str:
+    i = rng.randrange(len(word))
+    letter = rng.choice("abcdefghijklmnopqrstuvwxyz")
+    edit = rng.randrange(4)
+    if edit == 0 and len(word) > 1:
+        return word[:i] + word[i + 1:]
+    if edit == 1:
+        return word[:i] + letter + word[i + 1:]
+    if edit == 2 or i == len(word) - 1:
+        return word[:i] + letter + word[i:]
+    return word[:i] + word[i + 1] + word[i] + word[i + 2:]
+
+
+def measure(function, repeats: int) -> float:
+    timings = []
+    for _ in range(repeats):
+        timer = time.perf_counter()
+        function()
+        timings.append(time.perf_counter() - timer)
+    return statistics.median(timings)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compares the Levenshtein automaton with scanning the vocabulary")
+    parser.add_argument("--queries", type=int, default=50)
+    parser.add_argument("--repeats", type=int, default=3)
+    args = parser.parse_args()
+
+    trie = Trie()
+    for status_id, status in load_statuses(os.path.join(DATASET_DIR, "original_statuses.csv")).items():
+        trie.insert(status['status_message'], status_id)
+    vocabulary = [word for word, occurrences in trie.autocomplete_all('') if word != '']
+
+    rng = random.Random(0)
+    queries = [misspell(word, rng) for word in rng.sample([word for word in vocabulary if len(word) >= 4],
+                                                          args.queries)]
+    print(f"vocabulary={len(vocabulary)} words")
+
+    for max_distance in (1, 2):
+        same_words = all(sorted(word for word, distance, occurrences in trie.fuzzy_words(query, max_distance)) ==
+                         sorted(word for word in vocabulary if edit_distance(query, word) <= max_distance)
+                         for query in queries)
+        scan = measure(lambda: [[word for word in vocabulary if edit_distance(query, word) <= max_distance]
+                                for query in queries], 1)
+        latencies = []
+        for query in queries:
+            latencies.append(measure(lambda: trie.fuzzy_words(query, max_distance), args.repeats))
+        latencies.sort()
+        matches = statistics.mean(len(trie.fuzzy_words(query, max_distance)) for query in queries)
+        print(f"distance={max_distance}: queries={len(queries)} scan={scan / len(queries) * 1000:.2f}ms/query "
+              f"automaton median={statistics.median(latencies) * 1000:.2f}ms "
+              f"p95={latencies[int(len(latencies) * 0.95)] * 1000:.2f}ms "
+              f"matches={matches:.1f} same_words={same_words}")
+
+
+if __name__ == '__main__':
+    main()
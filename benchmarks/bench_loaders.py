@@ -0,0 +1,211 @@
+import argparse
+import datetime
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from parse_files_dict import load_statuses_with_users
+from synthetic import DATASET_DIR
+
+
+# The loaders of the baseline commit 0378cf4, copied unchanged: they read the whole file with readlines() and are
+# called once per dictionary
+def load_statuses(path):
+    extracted_statuses = {}
+    with open(path) as file:
+        lines = file.readlines()
+        comment = ""
+        paired_ellipses = True
+
+        for index in range(1, len(lines)):
+            line = lines[index]
+
+            if line == "\n":
+                comment += line
+                continue
+
+            # if line[-1] == "\n":
+            #     line = line[:-1]
+            line = line.strip()
+
+            previous_index = -1
+
+            while True:
+                index = line.index("\"", previous_index + 1) if "\"" in line[previous_index + 1:] else -1
+                if index == -1:
+                    break
+                paired_ellipses = not paired_ellipses
+                previous_index = index
+
+            comment += line
+            if not paired_ellipses:
+                continue
+
+            data = comment.split(",")
+            n = len(data)
+
+            if n < 16:
+                raise Exception("Status does not contain necessary data.")
+            elif n > 16:
+                comment_text = "".join(data[1:n - 14])
+            else:
+                comment_text = data[1]
+
+            content = {
+                "status_id": data[0],
+                "status_message": comment_text,
+                "status_type": data[n - 14],
+                "status_link": data[n - 13],
+                "status_published": datetime.datetime.strptime(data[n - 12], "%Y-%m-%d %H:%M:%S"),
+                "author": data[n - 11],
+                "num_reactions": int(data[n - 10]),
+                "num_comments": int(data[n - 9]),
+                "num_shares": int(data[n - 8]),
+                "num_likes": int(data[n - 7]),
+                "num_loves": int(data[n - 6]),
+                "num_wows": int(data[n - 5]),
+                "num_hahas": int(data[n - 4]),
+                "num_sads": int(data[n - 3]),
+                "num_angrys": int(data[n - 2]),
+                "num_special": int(data[n - 1])
+            }
+
+            extracted_statuses[data[0]] = content
+
+            comment = ""
+            paired_ellipses = True
+
+    return extracted_statuses
+
+
+def load_statuses_by_users(path):
+    extracted_statuses = {}
+    with open(path) as file:
+        lines = file.readlines()
+        comment = ""
+        paired_ellipses = True
+
+        for index in range(1, len(lines)):
+            line = lines[index]
+
+            if line == "\n":
+                comment += line
+                continue
+
+            # if line[-1] == "\n":
+            #     line = line[:-1]
+            line = line.strip()
+
+            previous_index = -1
+
+            while True:
+                index = line.index("\"", previous_index + 1) if "\"" in line[previous_index + 1:] else -1
+                if index == -1:
+                    break
+                paired_ellipses = not paired_ellipses
+                previous_index = index
+
+            comment += line
+            if not paired_ellipses:
+                continue
+
+            data = comment.split(",")
+            n = len(data)
+
+            if n < 16:
+                raise Exception("Status does not contain necessary data.")
+            elif n > 16:
+                comment_text = "".join(data[1:n - 14])
+            else:
+                comment_text = data[1]
+
+            content = {
+                "status_id": data[0],
+                "status_message": comment_text,
+                "status_type": data[n - 14],
+                "status_link": data[n - 13],
+                "status_published": datetime.datetime.strptime(data[n - 12], "%Y-%m-%d %H:%M:%S"),
+                "author": data[n - 11],
+                "num_reactions": int(data[n - 10]),
+                "num_comments": int(data[n - 9]),
+                "num_shares": int(data[n - 8]),
+                "num_likes": int(data[n - 7]),
+                "num_loves": int(data[n - 6]),
+                "num_wows": int(data[n - 5]),
+                "num_hahas": int(data[n - 4]),
+                "num_sads": int(data[n - 3]),
+                "num_angrys": int(data[n - 2]),
+                "num_special": int(data[n - 1])
+            }
+
+            if data[n - 11] not in extracted_statuses:
+                extracted_statuses[data[n - 11]] = {}
+
+            extracted_statuses[data[n - 11]][data[0]] = content
+
+            comment = ""
+            paired_ellipses = True
+
+    return extracted_statuses
+
+
+# Writes copies of the original statuses with new ids until the file reaches the given size
+def write_large_statuses(path: str, size_mb: int):
+    with open(os.path.join(DATASET_DIR, "original_statuses.csv")) as file:
+        header = file.readline()
+        rows = file.read().split("\n644891892279936_")
+
+    target_size = size_mb * 2 ** 20
+    with open(path, "w") as file:
+        file.write(header)
+        copy = 0
+        while file.tell() < target_size:
+            for index, row in enumerate(rows):
+                row = row.rstrip("\n")
+                if index > 0:
+                    row = "644891892279936_" + row
+                status_id, rest = row.split(",", 1)
+                file.write(f"{status_id}{copy},{rest}\n")
+            copy += 1
+
+
+def run_loader(loader: str, path: str):
+    timer = time.perf_counter()
+    if loader == "readlines":
+        statuses = load_statuses(path)
+        statuses_by_users = load_statuses_by_users(path)
+    else:
+        statuses, statuses_by_users = load_statuses_with_users(path)
+    elapsed = time.perf_counter() - timer
+    peak_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    print(f"{loader}: statuses={len(statuses)} authors={len(statuses_by_users)} time={elapsed:.2f}s "
+          f"peak_rss={peak_rss:.0f}MiB")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compares the streaming status loader with the readlines loaders")
+    parser.add_argument("--size-mb", type=int, default=2048, help="size of the synthetic statuses file")
+    parser.add_argument("--run", choices=["readlines", "streaming"], help=argparse.SUPPRESS)
+    parser.add_argument("--path", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.run:
+        run_loader(args.run, args.path)
+        return
+
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "statuses.csv")
+        write_large_statuses(path, args.size_mb)
+        print(f"file={os.path.getsize(path) / 2 ** 20:.0f}MiB")
+        # Every loader runs in its own process, so that the peak RSS of one does not hide the other
+        for loader in ("readlines", "streaming"):
+            subprocess.run([sys.executable, os.path.abspath(__file__), "--run", loader, "--path", path], check=True)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,68 @@
+import argparse
+import os
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from normalization import filter_status_characters
+from parse_files_dict import load_statuses
+from search_trie import Trie
+from synthetic import DATASET_DIR
+
+
+# The previous normalization, which builds the output one character at a time
+def filter_status_characters_per_character(status: str, to_lower: bool) -> str:
+    filtered_status = ''
+    if to_lower:
+        status = status.lower()
+    for char in status:
+        if (not to_lower and (65 <= ord(char) <= 90)) or (97 <= ord(char) <= 122) or char == ' ' or char.isnumeric():
+            filtered_status += char
+        else:
+            filtered_status += ' '
+
+    return filtered_status
+
+
+def measure(function, repeats: int) -> float:
+    timings = []
+    for _ in range(repeats):
+        timer = time.perf_counter()
+        function()
+        timings.append(time.perf_counter() - timer)
+    return statistics.median(timings)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compares per-character normalization with translate tables")
+    parser.add_argument("--scale", type=int, default=4, help="number of copies of the original statuses")
+    parser.add_argument("--repeats", type=int, default=3)
+    args = parser.parse_args()
+
+    messages = [status['status_message'] for status in
+                load_statuses(os.path.join(DATASET_DIR, "original_statuses.csv")).values()] * args.scale
+    megabytes = sum(len(message) for message in messages) / 2 ** 20
+
+    for to_lower in (True, False):
+        same_output = all(filter_status_characters(message, to_lower) ==
+                          filter_status_characters_per_character(message, to_lower) for message in messages)
+        per_character = measure(lambda: [filter_status_characters_per_character(message, to_lower)
+                                         for message in messages], args.repeats)
+        translated = measure(lambda: [filter_status_characters(message, to_lower) for message in messages],
+                             args.repeats)
+        print(f"to_lower={to_lower}: messages={len(messages)} per-character={megabytes / per_character:.1f}MB/s "
+              f"translate={megabytes / translated:.1f}MB/s speedup={per_character / translated:.1f}x "
+              f"same_output={same_output}")
+
+    def build_trie():
+        trie = Trie()
+        for status_id, message in enumerate(messages):
+            trie.insert(message, status_id)
+
+    print(f"trie build: messages={len(messages)} {measure(build_trie, 1):.2f}s")
+
+
+if __name__ == '__main__':
+    main()
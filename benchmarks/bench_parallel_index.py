@@ -0,0 +1,95 @@
+import argparse
+import os
+import pickle
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from inverted_index import InvertedIndex
+from parallel_index import build_index_parallel, build_shard, parallel_workers
+from parse_files_dict import load_statuses
+from search_trie import Trie
+from synthetic import DATASET_DIR, copy_name
+
+
+# Returns True if the phrase indexes have the same documents, postings and case variants
+def same_phrase_index(first, second) -> bool:
+    return (first.status_ids == second.status_ids and first.postings == second.postings and
+            first.variants == second.variants and first.last_documents == second.last_documents)
+
+
+# Returns True if the tries have the same nodes, with the same children order, counters, status ids and completions
+def same_trie(first: Trie, second: Trie) -> bool:
+    stack = [(first.root, second.root)]
+    while stack:
+        node, other_node = stack.pop()
+        if (node.counter != other_node.counter or node.status_ids != other_node.status_ids or
+                node.is_terminal != other_node.is_terminal or node.word != other_node.word or
+                list(node.children) != list(other_node.children) or
+                [completion.word for completion in node.completions] !=
+                [completion.word for completion in other_node.completions]):
+            return False
+        stack.extend(zip(node.children.values(), other_node.children.values()))
+    return same_phrase_index(first.phrase_index, second.phrase_index)
+
+
+def same_inverted_index(first: InvertedIndex, second: InvertedIndex) -> bool:
+    return (first.status_ids == second.status_ids and first.postings == second.postings and
+            first.counters == second.counters and same_phrase_index(first.phrase_index, second.phrase_index))
+
+
+# Returns the seconds that the parent process spends unpickling and merging the shard indexes of a build with the given
+# number of workers: the part of the build that does not get faster with more cores
+def merge_time(statuses: dict, workers: int, index_class) -> float:
+    messages = [(status['status_message'], status['status_id']) for status in statuses.values()]
+    shard_size = -(-len(messages) // workers)
+    shards = [pickle.dumps(build_shard(index_class, messages[i:i + shard_size]))
+              for i in range(0, len(messages), shard_size)]
+    timer = time.perf_counter()
+    index = pickle.loads(shards[0])
+    for shard in shards[1:]:
+        index.merge(pickle.loads(shard))
+    return time.perf_counter() - timer
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measures the sharded index build with different worker counts")
+    parser.add_argument("--scale", type=int, default=8, help="number of copies of the original statuses")
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4])
+    args = parser.parse_args()
+    sys.setrecursionlimit(30000)
+
+    original_statuses = load_statuses(os.path.join(DATASET_DIR, "original_statuses.csv"))
+    statuses = {}
+    for copy in range(args.scale):
+        for status_id, status in original_statuses.items():
+            statuses[copy_name(status_id, copy)] = dict(status, status_id=copy_name(status_id, copy))
+    print(f"statuses={len(statuses)} cpus={os.cpu_count()} "
+          f"load_data_workers={ {workers: parallel_workers(len(statuses), workers) for workers in args.workers} } "
+          f"(trie: {parallel_workers(len(statuses), max(args.workers), Trie)})")
+
+    for index_class, same_index in ((Trie, same_trie), (InvertedIndex, same_inverted_index)):
+        serial_index = None
+        serial_time = None
+        for workers in args.workers:
+            timer = time.perf_counter()
+            # The worker count is fixed, so the scaling is measured even where load_data would build serially
+            index = build_index_parallel(statuses, workers, index_class, fixed_workers=True)
+            elapsed = time.perf_counter() - timer
+            if serial_index is None:
+                serial_index, serial_time = index, elapsed
+            print(f"{index_class.__name__}: workers={workers} build={elapsed:.2f}s "
+                  f"speedup={serial_time / elapsed:.2f}x same_index={same_index(index, serial_index)}")
+
+        # With a core per worker, the shards are built in 1 / workers of the serial time, but the parent still merges
+        # them serially. The bound ignores the process start and the pickling in the workers
+        for workers in args.workers:
+            if workers > 1:
+                merge = merge_time(statuses, workers, index_class)
+                print(f"{index_class.__name__}: workers={workers} parent_merge={merge:.2f}s "
+                      f"speedup_bound={serial_time / (serial_time / workers + merge):.2f}x")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,39 @@
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from parallel_loader import load_parallel
+from parse_files_dict import load_comments, load_reactions, load_shares
+from synthetic import write_scaled_dataset
+
+serial_loaders = {"comments": load_comments, "reactions": load_reactions, "shares": load_shares}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compares parallel chunked ingestion with the serial loaders")
+    parser.add_argument("--scale", type=int, default=20, help="number of copies of the dataset")
+    parser.add_argument("--workers", type=int, nargs="+", default=[2, 4, 8])
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        paths = write_scaled_dataset(directory, args.scale, reactions_per_user=40, shares_per_user=10)
+        for kind, serial_loader in serial_loaders.items():
+            timer = time.perf_counter()
+            serial = serial_loader(paths[kind])
+            serial_time = time.perf_counter() - timer
+            print(f"{kind}: size={os.path.getsize(paths[kind]) / 2 ** 20:.0f}MiB serial={serial_time:.2f}s")
+
+            for workers in args.workers:
+                timer = time.perf_counter()
+                parallel = load_parallel(paths[kind], kind, workers)
+                parallel_time = time.perf_counter() - timer
+                print(f"  workers={workers} parallel={parallel_time:.2f}s speedup={serial_time / parallel_time:.2f}x "
+                      f"identical={parallel == serial and list(parallel) == list(serial)}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,55 @@
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from parse_files_dict import load_statuses
+from search_trie import Trie
+from synthetic import DATASET_DIR, copy_name
+
+
+def time_phrases(trie, phrases: list[str], statuses: dict, repeats: int) -> dict:
+    timings = {}
+    for phrase in phrases:
+        timer = time.perf_counter()
+        for _ in range(repeats):
+            trie.search_phrase(phrase, statuses)
+        timings[phrase] = (time.perf_counter() - timer) / repeats * 1000
+    return timings
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compares positional phrase search with message rescanning")
+    parser.add_argument("--scale", type=int, default=8, help="number of copies of the original statuses")
+    parser.add_argument("--repeats", type=int, default=5)
+    args = parser.parse_args()
+    sys.setrecursionlimit(30000)
+
+    original_statuses = load_statuses(os.path.join(DATASET_DIR, "original_statuses.csv"))
+    statuses = {}
+    for copy in range(args.scale):
+        for status_id, status in original_statuses.items():
+            statuses[copy_name(status_id, copy)] = status
+
+    trie = Trie()
+    for status_id, status in statuses.items():
+        trie.insert(status['status_message'], status_id)
+
+    # Phrases made of high-frequency words produce large candidate sets for the rescanning search
+    phrases = ['"in the"', '"of the"', '"the Fed"', '"Hillary Clinton"', '"is a"', '"to the"']
+    positional = time_phrases(trie, phrases, statuses, args.repeats)
+    phrase_index = trie.phrase_index
+    trie.phrase_index = None  # Falls back to the case-insensitive intersection and Boyer-Moore rescans
+    rescanning = time_phrases(trie, phrases, statuses, args.repeats)
+    trie.phrase_index = phrase_index
+
+    print(f"statuses={len(statuses)}")
+    for phrase in phrases:
+        print(f"{phrase}: rescanning={rescanning[phrase]:.2f}ms positional={positional[phrase]:.2f}ms "
+              f"speedup={rescanning[phrase] / positional[phrase]:.1f}x")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,71 @@
+import argparse
+import os
+import random
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from search_trie import Trie
+from synthetic_corpus import generate_statuses
+
+
+# The previous intersection search: every word is queried in phrase order and intersected as a whole set
+def search_intersection_in_order(trie: Trie, phrase: str) -> set[str]:
+    phrase_words = phrase.split(' ')
+    status_ids = trie.query(phrase_words[0])
+    for i in range(1, len(phrase_words)):
+        status_ids = status_ids.intersection(trie.query(phrase_words[i]))
+    return status_ids
+
+
+def measure(function, repeats: int) -> float:
+    timings = []
+    for _ in range(repeats):
+        timer = time.perf_counter()
+        function()
+        timings.append(time.perf_counter() - timer)
+    return statistics.median(timings)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compares phrase-order intersection with the query planner")
+    parser.add_argument("--statuses", type=int, default=50000)
+    parser.add_argument("--queries", type=int, default=50)
+    parser.add_argument("--repeats", type=int, default=3)
+    args = parser.parse_args()
+
+    statuses = generate_statuses(args.statuses, 1000)
+    trie = Trie()
+    for status in statuses.values():
+        trie.insert(status['status_message'], status['status_id'])
+
+    rng = random.Random(0)
+    workloads = {
+        # A common word followed by a rare one
+        "common-first": [f"synthetic status {rng.randrange(args.statuses)}" for _ in range(args.queries)],
+        # A word that matches nothing after a common one
+        "empty": [f"status missing{rng.randrange(1000)}" for _ in range(args.queries)],
+        # Only common words
+        "common": ["synthetic status number"] * max(1, args.queries // 10),
+    }
+
+    for name, queries in workloads.items():
+        same_results = all(set(trie.search_intersection_case_insensitive(query)) ==
+                           search_intersection_in_order(trie, query) for query in queries)
+        in_order = measure(lambda: [search_intersection_in_order(trie, query) for query in queries], args.repeats)
+        planned = measure(lambda: [len(trie.search_intersection_case_insensitive(query)) for query in queries],
+                          args.repeats)
+        print(f"{name}: queries={len(queries)} in-order={in_order / len(queries) * 1000:.2f}ms/query "
+              f"planned={planned / len(queries) * 1000:.2f}ms/query speedup={in_order / planned:.1f}x "
+              f"same_results={same_results}")
+
+    result = trie.search_intersection_case_insensitive(workloads["common-first"][0], debug=True)
+    print(f"timings of '{workloads['common-first'][0]}': "
+          + ", ".join(f"{term} (~{estimate} statuses) {seconds * 1e6:.0f}us" for term, estimate, seconds
+                      in result.timings))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,83 @@
+import argparse
+import os
+import random
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from affinity_graph import DecayClock, insert_status_popularity
+from main import get_feed, get_search_feed
+from ranked_search import SearchRanker
+from search_trie import Trie
+from synthetic_corpus import generate_graph, generate_statuses
+
+
+# The previous search feed: the word count map and the dictionary of found statuses are built and every found status
+# is scored
+def search_feed_full(graph, trie: Trie, user: str, statuses: dict, query: str, clock: DecayClock):
+    search_ids = trie.search_union_case_insensitive(query)
+    relevant_statuses = {status_id: statuses[status_id] for status_id in search_ids if status_id in statuses}
+    return search_ids, get_feed(graph, user, relevant_statuses, search_ids, 10, clock)
+
+
+def measure(function, repeats: int) -> float:
+    timings = []
+    for _ in range(repeats):
+        timer = time.perf_counter()
+        function()
+        timings.append(time.perf_counter() - timer)
+    return statistics.median(timings)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compares ranking every found status with ranking while merging")
+    parser.add_argument("--statuses", type=int, default=50000)
+    parser.add_argument("--authors", type=int, default=1000)
+    parser.add_argument("--users", type=int, default=10)
+    parser.add_argument("--edges", type=int, default=100, help="Edges per user")
+    parser.add_argument("--queries", type=int, default=20)
+    parser.add_argument("--repeats", type=int, default=3)
+    args = parser.parse_args()
+
+    statuses = generate_statuses(args.statuses, args.authors)
+    insert_status_popularity(statuses)
+    graph = generate_graph(args.users, args.authors, args.edges)
+    trie = Trie()
+    for status in statuses.values():
+        trie.insert(status['status_message'], status['status_id'])
+    clock = DecayClock()
+
+    timer = time.perf_counter()
+    search_ranker = SearchRanker(statuses, clock)
+    print(f"ranker build={time.perf_counter() - timer:.2f}s")
+
+    rng = random.Random(0)
+    users = [f"user_{user}" for user in range(args.users)]
+    workloads = {
+        # A few rare words next to words that every status contains
+        "rare-and-common": [f"synthetic number {rng.randrange(args.statuses)} {rng.randrange(args.statuses)}"
+                            for _ in range(args.queries)],
+        # Only rare words
+        "rare": [f"{rng.randrange(args.statuses)} {rng.randrange(args.statuses)}" for _ in range(args.queries)],
+        # Only common words
+        "common": ["synthetic status"] * max(1, args.queries // 4),
+    }
+
+    for name, queries in workloads.items():
+        pairs = [(users[i % len(users)], query) for i, query in enumerate(queries)]
+        same_feed = all([(status.status_id, status.relevance) for status in
+                         search_feed_full(graph, trie, user, statuses, query, clock)[1]] ==
+                        [(status.status_id, status.relevance) for status in
+                         get_search_feed(search_ranker, graph, trie, user, query)[1]] for user, query in pairs)
+        full = measure(lambda: [search_feed_full(graph, trie, user, statuses, query, clock) for user, query in pairs],
+                       args.repeats)
+        fused = measure(lambda: [get_search_feed(search_ranker, graph, trie, user, query) for user, query in pairs],
+                        args.repeats)
+        print(f"{name}: queries={len(pairs)} full={full / len(pairs) * 1000:.2f}ms/query "
+              f"fused={fused / len(pairs) * 1000:.2f}ms/query speedup={full / fused:.1f}x same_feed={same_feed}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,121 @@
+import argparse
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from parse_files_dict import (group_by_user, insert_status_by_user, iter_statuses, load_reactions, load_shares,
+                              open_data_file, parse_date)
+from synthetic import write_scaled_dataset
+
+
+# The previous parsers, which return a dictionary per row with its own copy of every string
+def parse_status_dict(comment: str) -> dict:
+    data = comment.split(",")
+    n = len(data)
+    comment_text = "".join(data[1:n - 14]) if n > 16 else data[1]
+    return {
+        "status_id": data[0],
+        "status_message": comment_text,
+        "status_type": data[n - 14],
+        "status_link": data[n - 13],
+        "status_published": parse_date(data[n - 12]),
+        "author": data[n - 11],
+        "num_reactions": int(data[n - 10]),
+        "num_comments": int(data[n - 9]),
+        "num_shares": int(data[n - 8]),
+        "num_likes": int(data[n - 7]),
+        "num_loves": int(data[n - 6]),
+        "num_wows": int(data[n - 5]),
+        "num_hahas": int(data[n - 4]),
+        "num_sads": int(data[n - 3]),
+        "num_angrys": int(data[n - 2]),
+        "num_special": int(data[n - 1])
+    }
+
+
+def load_statuses_dicts(path: str) -> (dict, dict):
+    statuses = {}
+    statuses_by_users = {}
+    with open_data_file(path) as file:
+        comment = ""
+        paired_ellipses = True
+        for line in file:
+            if line == "\n":
+                comment += line
+                continue
+            line = line.strip()
+            if line.count("\"") % 2 == 1:
+                paired_ellipses = not paired_ellipses
+            comment += line
+            if not paired_ellipses:
+                continue
+            status = parse_status_dict(comment)
+            statuses[status['status_id']] = status
+            insert_status_by_user(statuses_by_users, status)
+            comment = ""
+            paired_ellipses = True
+    return statuses, statuses_by_users
+
+
+def load_reactions_dicts(path: str) -> dict:
+    with open_data_file(path) as file:
+        return group_by_user(({"status_id": values[0], "type_of_reaction": values[1], "reactor": values[2],
+                               "reacted": parse_date(values[3])}
+                              for values in (line.strip().split(",") for line in file)), "reactor")
+
+
+def load_shares_dicts(path: str) -> dict:
+    with open_data_file(path) as file:
+        return group_by_user(({"status_id": values[0], "sharer": values[1], "status_shared": parse_date(values[2])}
+                              for values in (line.strip().split(",") for line in file)), "sharer")
+
+
+def run_loader(kind: str, directory: str):
+    baseline_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    timer = time.perf_counter()
+    if kind == "dicts":
+        statuses, statuses_by_users = load_statuses_dicts(os.path.join(directory, "statuses.csv"))
+        reactions = load_reactions_dicts(os.path.join(directory, "reactions.csv"))
+        shares = load_shares_dicts(os.path.join(directory, "shares.csv"))
+    else:
+        statuses = {}
+        statuses_by_users = {}
+        for status in iter_statuses(os.path.join(directory, "statuses.csv")):
+            statuses[status['status_id']] = status
+            insert_status_by_user(statuses_by_users, status)
+        reactions = load_reactions(os.path.join(directory, "reactions.csv"))
+        shares = load_shares(os.path.join(directory, "shares.csv"))
+    elapsed = time.perf_counter() - timer
+    peak_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    print(f"{kind}: statuses={len(statuses)} reactions={sum(len(rows) for rows in reactions.values())} "
+          f"shares={sum(len(rows) for rows in shares.values())} time={elapsed:.2f}s "
+          f"peak_rss={peak_rss:.0f}MiB (+{peak_rss - baseline_rss:.0f}MiB)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compares the peak RSS of dictionary rows with slotted records")
+    parser.add_argument("--scale", type=int, default=20, help="number of copies of the original statuses")
+    parser.add_argument("--reactions-per-user", type=int, default=200)
+    parser.add_argument("--run", choices=["dicts", "records"], help=argparse.SUPPRESS)
+    parser.add_argument("--directory", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.run:
+        run_loader(args.run, args.directory)
+        return
+
+    with tempfile.TemporaryDirectory() as directory:
+        write_scaled_dataset(directory, args.scale, reactions_per_user=args.reactions_per_user)
+        # Every loader runs in its own process, so that the peak RSS of one does not hide the other
+        for kind in ("dicts", "records"):
+            subprocess.run([sys.executable, os.path.abspath(__file__), "--run", kind, "--directory", directory],
+                           check=True)
+
+
+if __name__ == '__main__':
+    main()
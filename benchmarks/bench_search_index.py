@@ -0,0 +1,67 @@
+import argparse
+import os
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from inverted_index import InvertedIndex
+from parse_files_dict import load_statuses
+from search_trie import Trie
+from synthetic import DATASET_DIR, copy_name
+
+
+# Returns the built index and the memory that was allocated while building it
+def build(index_class, messages: list[(str, str)]):
+    tracemalloc.start()
+    index = index_class()
+    for status_id, message in messages:
+        index.insert(message, status_id)
+    memory = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return index, memory
+
+
+def time_queries(index, queries: list[str], repeats: int) -> dict:
+    timings = {}
+    for name, search in (("query", index.query),
+                         ("union", index.search_union_case_insensitive),
+                         ("intersection", index.search_intersection_case_insensitive),
+                         ("autocomplete", index.autocomplete)):
+        timer = time.perf_counter()
+        for _ in range(repeats):
+            for search_query in queries:
+                search(search_query)
+        timings[name] = (time.perf_counter() - timer) / (repeats * len(queries)) * 1000
+    return timings
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compares the memory and latency of the trie and inverted index")
+    parser.add_argument("--scale", type=int, default=4, help="number of copies of the original statuses")
+    parser.add_argument("--repeats", type=int, default=3)
+    args = parser.parse_args()
+    sys.setrecursionlimit(30000)
+
+    statuses = load_statuses(os.path.join(DATASET_DIR, "original_statuses.csv"))
+    messages = [(copy_name(status_id, copy), status['status_message'])
+                for copy in range(args.scale) for status_id, status in statuses.items()]
+    queries = ["the", "trump", "hillary clinton", "fed", "a", "news today", "wiki", "elect"]
+
+    results = {}
+    for index_class in (Trie, InvertedIndex):
+        timer = time.perf_counter()
+        index, memory = build(index_class, messages)
+        build_time = time.perf_counter() - timer
+        timings = time_queries(index, queries, args.repeats)
+        results[index_class.__name__] = [index.query(search_query) for search_query in queries]
+        print(f"{index_class.__name__}: statuses={len(messages)} memory={memory / 2 ** 20:.1f}MiB "
+              f"build={build_time:.2f}s (traced) " +
+              " ".join(f"{name}={latency:.2f}ms" for name, latency in timings.items()))
+
+    print(f"identical_results={results['Trie'] == results['InvertedIndex']}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,121 @@
+import argparse
+import asyncio
+import multiprocessing
+import os
+import random
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from affinity_graph import insert_status_popularity
+from csr_graph import CSRGraph
+from feed_cache import FeedCache
+from search_trie import Trie
+from server import FeedService, serve
+from synthetic_corpus import generate_graph, generate_statuses
+
+
+# Serves a synthetic dataset, run in its own process so that the load generator doesn't share its interpreter
+def run_server(port: int, statuses_count: int, users: int, authors: int, workers: int, cache: bool):
+    statuses = generate_statuses(statuses_count, authors)
+    insert_status_popularity(statuses)
+    trie = Trie()
+    for status in statuses.values():
+        trie.insert(status['status_message'], status['status_id'])
+    graph = CSRGraph.from_networkx(generate_graph(users, authors, 50))
+    service = FeedService(graph, trie, statuses, FeedCache() if cache else None)
+    asyncio.run(serve(service, "127.0.0.1", port, workers))
+
+
+# Returns the request paths, a mix of feeds, searches, phrase searches and autocompletion
+def request_paths(count: int, users: int, statuses: int, seed: int = 0) -> list[str]:
+    rng = random.Random(seed)
+    paths = []
+    for _ in range(count):
+        user = f"user_{rng.randrange(users)}"
+        kind = rng.randrange(4)
+        if kind == 0:
+            paths.append(f"/feed?user={user}")
+        elif kind == 1:
+            paths.append(f"/search?q={rng.randrange(statuses)}+{rng.randrange(statuses)}&user={user}")
+        elif kind == 2:
+            paths.append(f"/phrase?q=number+{rng.randrange(statuses)}&user={user}")
+        else:
+            paths.append(f"/autocomplete?prefix={rng.randrange(100)}")
+    return paths
+
+
+# Sends the requests over one keep-alive connection and returns the latency of every request
+async def client(port: int, paths: list[str]) -> list[float]:
+    reader, writer = await asyncio.open_connection("127.0.0.1", port)
+    latencies = []
+    for path in paths:
+        timer = time.perf_counter()
+        writer.write(f"GET {path} HTTP/1.1\r\nHost: localhost\r\n\r\n".encode())
+        await writer.drain()
+        content_length = 0
+        status_line = await reader.readline()
+        while True:
+            line = await reader.readline()
+            if line == b"\r\n":
+                break
+            name, _, value = line.decode().partition(":")
+            if name.lower() == "content-length":
+                content_length = int(value)
+        await reader.readexactly(content_length)
+        if b" 200 " not in status_line:
+            raise RuntimeError(f"{path} returned {status_line.decode().strip()}")
+        latencies.append(time.perf_counter() - timer)
+    writer.close()
+    return latencies
+
+
+async def wait_for_server(port: int):
+    while True:
+        try:
+            reader, writer = await asyncio.open_connection("127.0.0.1", port)
+            writer.close()
+            return
+        except OSError:
+            await asyncio.sleep(0.2)
+
+
+async def generate_load(port: int, paths: list[str], connections: int) -> (list[float], float):
+    await wait_for_server(port)
+    timer = time.perf_counter()
+    results = await asyncio.gather(*(client(port, paths[i::connections]) for i in range(connections)))
+    return [latency for latencies in results for latency in latencies], time.perf_counter() - timer
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measures the latency and throughput of the HTTP service")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--statuses", type=int, default=20000)
+    parser.add_argument("--users", type=int, default=200)
+    parser.add_argument("--authors", type=int, default=2000)
+    parser.add_argument("--requests", type=int, default=400)
+    parser.add_argument("--connections", type=int, nargs="+", default=[1, 8, 32])
+    parser.add_argument("--workers", type=int, default=4, help="Executor threads of the server")
+    parser.add_argument("--cache", action="store_true", help="Use a feed cache in the server")
+    args = parser.parse_args()
+
+    server = multiprocessing.Process(target=run_server, args=(args.port, args.statuses, args.users, args.authors,
+                                                              args.workers, args.cache), daemon=True)
+    server.start()
+    try:
+        for connections in args.connections:
+            paths = request_paths(args.requests, args.users, args.statuses, seed=connections)
+            latencies, elapsed = asyncio.run(generate_load(args.port, paths, connections))
+            latencies.sort()
+            p50 = statistics.median(latencies) * 1000
+            p99 = latencies[min(len(latencies) - 1, int(len(latencies) * 0.99))] * 1000
+            print(f"connections={connections} requests={len(latencies)} p50={p50:.1f}ms p99={p99:.1f}ms "
+                  f"rps={len(latencies) / elapsed:.1f}")
+    finally:
+        server.terminate()
+
+
+if __name__ == '__main__':
+    main()
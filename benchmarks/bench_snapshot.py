@@ -0,0 +1,89 @@
+import argparse
+import os
+import pickle
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from csr_graph import CSRGraph
+from search_trie import Trie
+from snapshot import Snapshot, write_snapshot
+from synthetic_corpus import generate_graph, generate_statuses
+
+
+def load_pickles(graph_path: str, trie_path: str):
+    with open(graph_path, "rb") as file:
+        graph = pickle.load(file)
+    with open(trie_path, "rb") as file:
+        trie = pickle.load(file)
+    return graph, trie
+
+
+def measure(function, repeats: int) -> (float, object):
+    timings = []
+    result = None
+    for _ in range(repeats):
+        timer = time.perf_counter()
+        result = function()
+        timings.append(time.perf_counter() - timer)
+    return statistics.median(timings), result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compares unpickling the graph and trie with mapping a snapshot")
+    parser.add_argument("--statuses", type=int, default=20000)
+    parser.add_argument("--users", type=int, default=1000)
+    parser.add_argument("--authors", type=int, default=5000)
+    parser.add_argument("--edges", type=int, default=100, help="Edges per user")
+    parser.add_argument("--repeats", type=int, default=3)
+    args = parser.parse_args()
+
+    statuses = generate_statuses(args.statuses, args.authors)
+    trie = Trie()
+    for status in statuses.values():
+        trie.insert(status['status_message'], status['status_id'])
+    graph = generate_graph(args.users, args.authors, args.edges)
+
+    with tempfile.TemporaryDirectory() as directory:
+        graph_path = os.path.join(directory, "graph.obj")
+        trie_path = os.path.join(directory, "trie.obj")
+        snapshot_path = os.path.join(directory, "snapshot.bin")
+        sys.setrecursionlimit(30000)
+        with open(graph_path, "wb") as file:
+            pickle.dump(graph, file)
+        with open(trie_path, "wb") as file:
+            pickle.dump(trie, file)
+
+        timer = time.perf_counter()
+        write_snapshot(snapshot_path, graph, trie)
+        write_time = time.perf_counter() - timer
+
+        pickle_time, (pickled_graph, pickled_trie) = measure(lambda: load_pickles(graph_path, trie_path),
+                                                             args.repeats)
+        snapshot_time, snapshot = measure(lambda: Snapshot(snapshot_path), args.repeats)
+        pickle_size = os.path.getsize(graph_path) + os.path.getsize(trie_path)
+        print(f"pickle: size={pickle_size / 2 ** 20:.1f}MiB load={pickle_time * 1000:.0f}ms | "
+              f"snapshot: size={os.path.getsize(snapshot_path) / 2 ** 20:.1f}MiB write={write_time:.1f}s "
+              f"open={snapshot_time * 1000:.2f}ms")
+
+        csr_graph = CSRGraph.from_networkx(pickled_graph)
+        users = [f"user_{user}" for user in range(0, args.users, 10)]
+        terms = ["sta", "number", "syn", "1", "42", "tus"]
+        same_results = all(csr_graph.out_weights(user) == snapshot.graph.out_weights(user) for user in users) and \
+            all(pickled_trie.query(term) == snapshot.index.query(term) and
+                pickled_trie.autocomplete(term) == snapshot.index.autocomplete(term) for term in terms)
+
+        trie_time, _ = measure(lambda: [pickled_trie.query(term) for term in terms], args.repeats)
+        mapped_time, _ = measure(lambda: [snapshot.index.query(term) for term in terms], args.repeats)
+        print(f"queries={len(terms)} trie={trie_time * 1000:.1f}ms snapshot={mapped_time * 1000:.1f}ms "
+              f"same_results={same_results}")
+
+        # Drop the views of the mapped file before the directory is removed
+        del snapshot
+
+
+if __name__ == '__main__':
+    main()
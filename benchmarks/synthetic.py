@@ -0,0 +1,100 @@
+import os
+import random
+import sys
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from parse_files_dict import load_comments, load_statuses
+
+DATASET_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "dataset")
+
+reaction_types = ["likes", "loves", "wows", "hahas", "sads", "angrys", "special"]
+
+
+# Returns a renamed copy of a user or status id, the first copy keeps the original name
+def copy_name(name: str, copy: int) -> str:
+    return name if copy == 0 else f"{name} {copy}"
+
+
+def format_date(date: datetime) -> str:
+    return date.strftime("%Y-%m-%d %H:%M:%S")
+
+
+# Quotes a message so that commas and quotes inside it survive the loaders
+def quote_message(message: str) -> str:
+    return '"' + message.replace('"', '').replace('\n', ' ') + '"'
+
+
+# Writes scaled-up copies of the dataset CSVs into the given directory and returns a dictionary of their paths
+# Friends, reactions and shares are not shipped with the dataset, so they are generated from the copied users
+def write_scaled_dataset(directory: str, scale: int, seed: int = 0, reactions_per_user: int = 4,
+                         shares_per_user: int = 1, friends_per_user: int = 5) -> dict:
+    os.makedirs(directory, exist_ok=True)
+    rng = random.Random(seed)
+    statuses = load_statuses(os.path.join(DATASET_DIR, "original_statuses.csv"))
+    comments = load_comments(os.path.join(DATASET_DIR, "original_comments.csv"))
+
+    paths = {name: os.path.join(directory, name + ".csv")
+             for name in ("friends", "comments", "reactions", "shares", "statuses")}
+
+    status_ids = []
+    users = set()
+    with open(paths["statuses"], "w") as file:
+        file.write("status_id,status_message,link_name,status_type,status_link,status_published,author,num_reactions,"
+                   "num_comments,num_shares,num_likes,num_loves,num_wows,num_hahas,num_sads,num_angrys,num_special\n")
+        for copy in range(scale):
+            for status in statuses.values():
+                status_id = copy_name(status['status_id'], copy)
+                author = copy_name(status['author'], copy)
+                status_ids.append(status_id)
+                users.add(author)
+                counts = [status[key] for key in ("num_reactions", "num_comments", "num_shares", "num_likes",
+                                                  "num_loves", "num_wows", "num_hahas", "num_sads", "num_angrys",
+                                                  "num_special")]
+                file.write(",".join([status_id, quote_message(status['status_message']), "link",
+                                     status['status_type'], status['status_link'],
+                                     format_date(status['status_published']), author] + [str(c) for c in counts])
+                           + "\n")
+
+    with open(paths["comments"], "w") as file:
+        file.write("comment_id,status_id,parent_id,comment_message,comment_author,comment_published,num_reactions,"
+                   "num_likes,num_loves,num_wows,num_hahas,num_sads,num_angrys,num_special\n")
+        for copy in range(scale):
+            for user_comments in comments.values():
+                for comment in user_comments:
+                    author = copy_name(comment['comment_author'], copy)
+                    users.add(author)
+                    counts = [comment[key] for key in ("num_reactions", "num_likes", "num_loves", "num_wows",
+                                                       "num_hahas", "num_sads", "num_angrys", "num_special")]
+                    file.write(",".join([copy_name(comment['comment_id'], copy),
+                                         copy_name(comment['status_id'], copy), "",
+                                         quote_message(comment['comment_message']), author,
+                                         format_date(comment['comment_published'])] + [str(c) for c in counts])
+                               + "\n")
+
+    users = sorted(users)
+    start_date = datetime.today() - timedelta(days=60)
+
+    with open(paths["reactions"], "w") as file:
+        file.write("status_id,type_of_reaction,reactor,reacted\n")
+        for user in users:
+            for _ in range(reactions_per_user):
+                reacted = start_date + timedelta(seconds=rng.randrange(60 * 24 * 60 * 60))
+                file.write(",".join([rng.choice(status_ids), rng.choice(reaction_types), user,
+                                     format_date(reacted)]) + "\n")
+
+    with open(paths["shares"], "w") as file:
+        file.write("status_id,sharer,status_shared\n")
+        for user in users:
+            for _ in range(shares_per_user):
+                shared = start_date + timedelta(seconds=rng.randrange(60 * 24 * 60 * 60))
+                file.write(",".join([rng.choice(status_ids), user, format_date(shared)]) + "\n")
+
+    with open(paths["friends"], "w") as file:
+        file.write("person,number_of_friends,friends\n")
+        for user in users:
+            user_friends = rng.sample(users, min(friends_per_user, len(users)))
+            file.write(",".join([user, str(len(user_friends))] + user_friends) + "\n")
+
+    return paths
@@ -0,0 +1,40 @@
+import random
+from datetime import datetime, timedelta
+
+import networkx
+
+count_keys = ["num_reactions", "num_comments", "num_shares", "num_likes", "num_loves", "num_wows", "num_hahas",
+              "num_sads", "num_angrys", "num_special"]
+
+
+# Returns a dictionary of random statuses in the format returned by load_statuses
+def generate_statuses(num_statuses: int, num_authors: int, seed: int = 0) -> dict:
+    rng = random.Random(seed)
+    start_date = datetime(2023, 1, 1)
+    statuses = {}
+    for index in range(num_statuses):
+        status_id = f"status_{index}"
+        status = {
+            "status_id": status_id,
+            "status_message": f"synthetic status number {index}",
+            "status_type": "status",
+            "status_link": f"https://example.com/{index}",
+            "status_published": start_date + timedelta(seconds=rng.randrange(365 * 24 * 60 * 60)),
+            "author": f"author_{rng.randrange(num_authors)}"
+        }
+        for key in count_keys:
+            status[key] = rng.randrange(100)
+        statuses[status_id] = status
+
+    return statuses
+
+
+# Returns an affinity graph where every user has random edges towards the authors
+def generate_graph(num_users: int, num_authors: int, edges_per_user: int, seed: int = 0) -> networkx.DiGraph:
+    rng = random.Random(seed)
+    graph = networkx.DiGraph()
+    for user in range(num_users):
+        for author in rng.sample(range(num_authors), min(edges_per_user, num_authors)):
+            graph.add_edge(f"user_{user}", f"author_{author}", weight=rng.uniform(0, 5000))
+
+    return graph
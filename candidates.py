@@ -0,0 +1,98 @@
+from affinity_graph import DecayClock, index_of_today, out_weights, status_popularity
+from top_k import TopK
+
+
+# Selects the statuses that can make it into a user's feed, so that a feed only scores the statuses of the authors
+# that the user has an edge to and a short prefix of the global popularity order, instead of every status
+# The relevance of a status is (affinity + popularity) * date multiplier like in get_feed, with the date multiplier
+# taken from the index's clock, which is pinned when the index is built. Feeds use today() to get an index with today's
+# clock
+class CandidateIndex:
+    def __init__(self, statuses: dict, statuses_by_users: dict, clock: DecayClock = None):
+        self.build(statuses, statuses_by_users, clock)
+
+    # Builds the index, also after statuses have been inserted or the clock has moved on to another day
+    def build(self, statuses: dict, statuses_by_users: dict, clock: DecayClock = None):
+        self.clock = DecayClock() if clock is None else clock
+        self.statuses = statuses
+        self.statuses_by_users = statuses_by_users
+        self.today_index = None  # The index of a later day, see today()
+        # A status' ordinal is its position in the status dictionary, which breaks ties like the stable order of
+        # get_feed
+        ordinals = {status_id: ordinal for ordinal, status_id in enumerate(statuses)}
+
+        # Maps an author to a list of (popularity, date multiplier, ordinal, status) of their statuses and to the
+        # largest popularity and date multiplier of them
+        self.author_statuses: dict = {}
+        indexed_ids = set()
+        for author, author_statuses in statuses_by_users.items():
+            for status_id, status in author_statuses.items():
+                if status_id in ordinals and status_id not in indexed_ids:
+                    self.add_author_status(status, ordinals[status_id])
+                    indexed_ids.add(status_id)
+        # Statuses that are missing from statuses_by_users would otherwise never be scored for their author's users
+        for status_id, status in statuses.items():
+            if status_id not in indexed_ids:
+                self.add_author_status(status, ordinals[status_id])
+
+        self.author_bounds: dict = {author: (max(entry[0] for entry in entries), max(entry[1] for entry in entries))
+                                    for author, entries in self.author_statuses.items()}
+
+        # Every status ordered by the relevance it has for a user without an edge to its author
+        self.global_order: list = sorted(
+            ((status_popularity(status) * self.clock.multiplier(status['status_published']), ordinals[status_id],
+              status) for status_id, status in statuses.items()),
+            key=lambda entry: (-entry[0], entry[1]))
+
+    # Returns an index with today's clock, see index_of_today
+    def today(self):
+        return index_of_today(self, lambda clock: CandidateIndex(self.statuses, self.statuses_by_users, clock))
+
+    def add_author_status(self, status: dict, ordinal: int):
+        self.author_statuses.setdefault(status['author'], []).append(
+            (status_popularity(status), self.clock.multiplier(status['status_published']), ordinal, status))
+
+    # Returns a list of (relevance, status) pairs of the k most relevant statuses for a user with the given out-edge
+    # weights, ordered like get_feed
+    # The authors are visited from the largest upper bound of their statuses' relevance and the rest are skipped as
+    # soon as the bound is below the k-th relevance found so far, so the result is exact
+    # In approximate mode only the statuses of the max_authors authors with the largest bounds are scored
+    def top_statuses(self, user_weights: dict, k: int = 10, approximate: bool = False,
+                     max_authors: int = 50) -> list[(float, dict)]:
+        if k <= 0:
+            return []
+
+        top = TopK(k)
+        # The best statuses of the authors without a positive edge weight; every status after them in the global
+        # order is less relevant, so none of them can be in the feed
+        found = 0
+        for relevance, ordinal, status in self.global_order:
+            if user_weights.get(status['author'], 0) > 0:
+                continue
+            top.offer(relevance, ordinal, status)
+            found += 1
+            if found == k:
+                break
+
+        bounds = []
+        for author, weight in user_weights.items():
+            if weight > 0 and author in self.author_bounds:
+                max_popularity, max_multiplier = self.author_bounds[author]
+                bounds.append(((weight + max_popularity) * max_multiplier, author, weight))
+        bounds.sort(key=lambda bound: bound[0], reverse=True)
+        if approximate:
+            bounds = bounds[:max_authors]
+
+        for bound, author, weight in bounds:
+            # Equally relevant statuses can still enter the feed through a smaller ordinal
+            if top.is_full() and bound < top.min_relevance():
+                break
+            for popularity, multiplier, ordinal, status in self.author_statuses[author]:
+                top.offer((weight + popularity) * multiplier, ordinal, status)
+
+        return top.items()
+
+    # Returns the top statuses for the user from the graph
+    def user_top_statuses(self, graph, user_name: str, k: int = 10, approximate: bool = False,
+                          max_authors: int = 50) -> list[(float, dict)]:
+        return self.top_statuses(out_weights(graph, user_name), k, approximate, max_authors)
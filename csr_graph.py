@@ -0,0 +1,104 @@
+from array import array
+from bisect import bisect_left
+
+
+# A read-only affinity graph stored as compressed sparse rows
+# User ids are interned to integers; the out-edges of user i are neighbors[offsets[i]:offsets[i + 1]], sorted by
+# neighbor index, with their float64 weights at the same positions in weights, so the weights and the feed order are
+# the same as with the networkx graph
+class CSRGraph:
+    def __init__(self, users: list[str], offsets: array, neighbors: array, weights: array):
+        self.users = users
+        self.user_indexes = {user: index for index, user in enumerate(users)}
+        self.offsets = offsets
+        self.neighbors = neighbors
+        self.weights = weights
+
+    # Returns a graph built from (user, second user, weight) edges
+    @classmethod
+    def from_edges(cls, edges):
+        users = []
+        user_indexes = {}
+        out_edges = []
+
+        def user_index(user):
+            index = user_indexes.get(user)
+            if index is None:
+                index = user_indexes[user] = len(users)
+                users.append(user)
+                out_edges.append({})
+            return index
+
+        for user, second_user, weight in edges:
+            user_edges = out_edges[user_index(user)]
+            user_edges[user_index(second_user)] = weight
+
+        offsets = array('q', [0])
+        neighbors = array('i')
+        weights = array('d')
+        for user_edges in out_edges:
+            for neighbor in sorted(user_edges):
+                neighbors.append(neighbor)
+                weights.append(user_edges[neighbor])
+            offsets.append(len(neighbors))
+
+        return cls(users, offsets, neighbors, weights)
+
+    # Returns a graph with the same nodes, edges and weights as the networkx graph
+    @classmethod
+    def from_networkx(cls, graph):
+        csr_graph = cls.from_edges((user, second_user, data['weight'])
+                                   for user, second_user, data in graph.edges(data=True))
+        # Nodes without out-edges (or any edges at all) keep a row as well
+        missing_users = [user for user in graph.nodes if user not in csr_graph.user_indexes]
+        if missing_users:
+            users = csr_graph.users + missing_users
+            offsets = csr_graph.offsets + array('q', [csr_graph.offsets[-1]] * len(missing_users))
+            csr_graph = cls(users, offsets, csr_graph.neighbors, csr_graph.weights)
+        return csr_graph
+
+    # Only the users and the flat arrays are pickled, the user indexes are rebuilt when the graph is loaded
+    def __getstate__(self) -> dict:
+        state = self.__dict__.copy()
+        del state['user_indexes']
+        return state
+
+    def __setstate__(self, state: dict):
+        self.__dict__.update(state)
+        self.user_indexes = {user: index for index, user in enumerate(self.users)}
+
+    def __contains__(self, user) -> bool:
+        return user in self.user_indexes
+
+    def __len__(self) -> int:
+        return len(self.users)
+
+    def number_of_edges(self) -> int:
+        return len(self.neighbors)
+
+    # Returns the weight of the edge between the users with a binary search, default if there is no edge
+    def weight(self, user: str, second_user: str, default=0):
+        index = self.user_indexes.get(user)
+        second_index = self.user_indexes.get(second_user)
+        if index is None or second_index is None:
+            return default
+
+        start, end = self.offsets[index], self.offsets[index + 1]
+        position = bisect_left(self.neighbors, second_index, start, end)
+        if position < end and self.neighbors[position] == second_index:
+            return self.weights[position]
+        return default
+
+    # Returns a dictionary which maps every second user that the user has an edge to, to the edge weight
+    def out_weights(self, user: str) -> dict:
+        index = self.user_indexes.get(user)
+        if index is None:
+            return {}
+
+        start, end = self.offsets[index], self.offsets[index + 1]
+        users = self.users
+        return {users[neighbor]: weight
+                for neighbor, weight in zip(self.neighbors[start:end], self.weights[start:end])}
+
+    def __str__(self):
+        return f"CSRGraph with {len(self.users)} nodes and {len(self.neighbors)} edges"
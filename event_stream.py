@@ -0,0 +1,229 @@
+import argparse
+import asyncio
+import json
+import sys
+from datetime import datetime
+
+from affinity_graph import reaction_type_weights
+from feed_cache import FeedCache
+from live_graph import LiveAffinityGraph, save_live_graph
+from main import load_data
+from parse_files_dict import parse_date
+from records import Comment, Reaction, Share
+
+
+# An event that can not be ingested, e.g. a missing field, an unknown type or a malformed date
+class EventError(Exception):
+    pass
+
+
+# Returns the Comment of a comment event, the counts of its reactions are optional
+def parse_comment_event(event: dict) -> Comment:
+    counts = [int(event.get(field, 0)) for field in ("num_reactions", "num_likes", "num_loves", "num_wows",
+                                                     "num_hahas", "num_sads", "num_angrys", "num_special")]
+    return Comment(sys.intern(event['comment_id']), sys.intern(event['status_id']), event.get('parent_id', ''),
+                   event.get('comment_message', ''), sys.intern(event['comment_author']),
+                   parse_date(event['comment_published']), *counts)
+
+
+def parse_reaction_event(event: dict) -> Reaction:
+    if event['type_of_reaction'] not in reaction_type_weights:
+        raise EventError(f"Unknown reaction type {event['type_of_reaction']}")
+    return Reaction(sys.intern(event['status_id']), sys.intern(event['type_of_reaction']),
+                    sys.intern(event['reactor']), parse_date(event['reacted']))
+
+
+def parse_share_event(event: dict) -> Share:
+    return Share(sys.intern(event['status_id']), sys.intern(event['sharer']), parse_date(event['status_shared']))
+
+
+# Maps the type of an event to its action type in the live graph and its parser
+event_types = {
+    "comment": (0, parse_comment_event),
+    "reaction": (1, parse_reaction_event),
+    "share": (2, parse_share_event)
+}
+
+
+# Parses a JSON event line into its action type and record
+# An event is an object with a "type" (comment, reaction or share) and the fields of the dataset row of that type,
+# with dates in the dataset's "%Y-%m-%d %H:%M:%S" format, e.g.
+# {"type": "share", "status_id": "1_2", "sharer": "Ana", "status_shared": "2018-05-01 10:00:00"}
+def parse_event(line: str):
+    try:
+        event = json.loads(line)
+    except json.JSONDecodeError as error:
+        raise EventError(f"Malformed JSON: {error}")
+    if not isinstance(event, dict) or event.get('type') not in event_types:
+        raise EventError(f"Unknown event type {event.get('type') if isinstance(event, dict) else None}")
+
+    action_type, parse = event_types[event['type']]
+    try:
+        return action_type, parse(event)
+    except KeyError as error:
+        raise EventError(f"Missing field {error}")
+    except (TypeError, ValueError) as error:
+        raise EventError(f"Malformed {event['type']} event: {error}")
+
+
+# Applies a stream of comment, reaction and share events to a live affinity graph
+# Only the edges of the users that performed the actions change, so only their cached feeds are invalidated. Actions on
+# statuses that are not loaded yet are kept by the graph until their status is added
+# With an event log, every ingested event is appended to it before it is applied. The log is the durable copy of the
+# streamed events: live_graph.obj is only saved on shutdown and is rebuilt from the dataset when the dataset changes
+class EventIngestor:
+    def __init__(self, graph: LiveAffinityGraph, statuses: dict, feed_cache: FeedCache = None):
+        self.graph = graph
+        self.statuses = statuses
+        self.feed_cache = feed_cache
+        self.log = None
+        self.ingested = 0
+        self.skipped = 0
+
+    # Replays the events of the log that the graph does not include yet, e.g. all of them after the graph was rebuilt
+    # or the ones after the last save, and appends the events that are ingested from now on to the log
+    # Returns the number of replayed events
+    def open_log(self, path: str = "events.jsonl") -> int:
+        replayed = 0
+        line_count = 0
+        last_line = "\n"
+        try:
+            with open(path) as file:
+                for line_count, last_line in enumerate(file, 1):
+                    if line_count <= self.graph.logged_events:
+                        continue
+                    # A line that was cut off by a crash is counted like the others, but not applied
+                    try:
+                        self.graph.add_action(*parse_event(last_line), self.statuses)
+                        replayed += 1
+                    except EventError:
+                        pass
+        except FileNotFoundError:
+            pass
+        # The log can also be shorter than the events in the graph, if it has been removed
+        self.graph.logged_events = line_count
+
+        self.log = open(path, "a")
+        if not last_line.endswith("\n"):
+            self.log.write("\n")
+        return replayed
+
+    def close_log(self):
+        if self.log is not None:
+            self.log.close()
+            self.log = None
+
+    # Ingests one JSON event line and returns the (user, author) pair whose edge has changed, None if the status of
+    # the action is unknown. Raises EventError for a malformed event
+    def ingest(self, line: str):
+        action_type, action = parse_event(line)
+        with self.graph.lock:
+            if self.log is not None:
+                self.log.write(line.strip() + "\n")
+                self.log.flush()
+                self.graph.logged_events += 1
+            changed_pair = self.graph.add_action(action_type, action, self.statuses)
+        if changed_pair is not None and self.feed_cache is not None:
+            self.feed_cache.invalidate_user(changed_pair[0])
+        self.ingested += 1
+        return changed_pair
+
+    # Ingests the event lines, malformed events are reported and skipped. Returns the set of changed (user, author)
+    # pairs
+    def ingest_lines(self, lines) -> set:
+        changed_pairs = set()
+        for line_number, line in enumerate(lines, 1):
+            if not line.strip():
+                continue
+            try:
+                changed_pair = self.ingest(line)
+            except EventError as error:
+                self.skipped += 1
+                print(f"Skipped event on line {line_number}: {error}")
+                continue
+            if changed_pair is not None:
+                changed_pairs.add(changed_pair)
+        return changed_pairs
+
+    # Ingests the events of a JSONL file
+    def ingest_file(self, path: str) -> set:
+        with open(path) as file:
+            return self.ingest_lines(file)
+
+    def stats(self) -> dict:
+        return {"ingested": self.ingested, "skipped": self.skipped,
+                "pending": sum(len(actions) for actions in self.graph.unknown_status_actions.values())}
+
+
+# Reads event lines from one connection until the client closes it and answers every line with a JSON line: the
+# changed edge, or the error of a malformed event
+async def handle_connection(ingestor: EventIngestor, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+    try:
+        while True:
+            line = await reader.readline()
+            if not line:
+                break
+            if not line.strip():
+                continue
+
+            try:
+                changed_pair = ingestor.ingest(line.decode())
+                response = {"changed": list(changed_pair) if changed_pair is not None else None}
+            except (EventError, UnicodeDecodeError) as error:
+                ingestor.skipped += 1
+                response = {"error": str(error)}
+
+            writer.write(json.dumps(response).encode() + b"\n")
+            await writer.drain()
+    except ConnectionError:
+        pass
+    finally:
+        writer.close()
+
+
+# Starts receiving events on the host and port, e.g. next to the HTTP server in the same event loop
+async def start_event_server(ingestor: EventIngestor, host: str = "127.0.0.1",
+                             port: int = 8081) -> asyncio.base_events.Server:
+    return await asyncio.start_server(lambda reader, writer: handle_connection(ingestor, reader, writer), host, port)
+
+
+async def serve_events(ingestor: EventIngestor, host: str, port: int):
+    server = await start_event_server(ingestor, host, port)
+    print(f"Receiving events on {host}:{port}")
+    async with server:
+        await server.serve_forever()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Ingests comment, reaction and share events into live_graph.obj")
+    parser.add_argument("--file", help="JSONL file of events")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, help="Receive events on a local socket, until interrupted")
+    args = parser.parse_args()
+    if args.file is None and args.port is None:
+        parser.error("either --file or --port is required")
+
+    sys.setrecursionlimit(30000)
+    graph, sentence_trie, statuses, statuses_by_users = load_data(live=True)
+    ingestor = EventIngestor(graph, statuses)
+    print(f"Replayed {ingestor.open_log()} events from the event log")
+    try:
+        if args.file is not None:
+            print("Ingesting events")
+            timer = datetime.now()
+            changed_pairs = ingestor.ingest_file(args.file)
+            print(f"Finished event ingestion after {datetime.now() - timer} seconds, {len(changed_pairs)} edges "
+                  f"changed. {ingestor.stats()}")
+        if args.port is not None:
+            asyncio.run(serve_events(ingestor, args.host, args.port))
+    except KeyboardInterrupt:
+        pass
+    finally:
+        # The next start only replays the events that are logged after this save
+        ingestor.close_log()
+        save_live_graph(graph)
+        print(f"Saved live graph. {ingestor.stats()}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,138 @@
+import sys
+import threading
+import time
+from collections import OrderedDict
+
+
+# Returns the approximate number of bytes that a cached feed holds
+def feed_size(feed: list) -> int:
+    size = sys.getsizeof(feed)
+    for feed_status in feed:
+        size += sys.getsizeof(feed_status) + sys.getsizeof(feed_status.__dict__) + sys.getsizeof(feed_status.message)
+    return size
+
+
+# A least recently used cache of ranked feeds with a time to live and a memory bound
+# Feeds are keyed by the user, the dataset version and the parameters of the feed (search query, k, day)
+# An entry is invalidated when the out-edges of its user change or when a status of an author that the user has an
+# edge to (or that is in the cached feed) changes. Other authors' statuses only reach a feed through their popularity,
+# entries pick up those changes when they expire
+# The cache can be shared between threads. A feed that is ranked while its user or authors are invalidated is not
+# stored: callers read the generation before ranking and put only stores the feed if it is unchanged
+class FeedCache:
+    def __init__(self, max_entries: int = 1024, max_bytes: int = 64 * 2 ** 20, ttl: float = 300,
+                 timer=time.monotonic):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.timer = timer
+        self.version = 0
+
+        self.entries: OrderedDict = OrderedDict()  # Maps a key to (feed, expiry time, size, authors)
+        self.user_keys: dict = {}  # Maps a user to the keys of their entries
+        self.author_keys: dict = {}  # Maps an author to the keys of the entries that depend on their statuses
+        self.size = 0
+        self.user_generations: dict = {}  # Maps a user to the number of times their feeds were invalidated
+        self.author_generation = 0  # The number of author invalidations, an author's statuses can reach any feed
+        self.lock = threading.RLock()
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0  # Entries removed to stay within the entry or memory bound
+        self.expirations = 0
+        self.invalidations = 0
+
+    def key(self, user_name: str, *parameters) -> tuple:
+        return (user_name, self.version) + parameters
+
+    # Returns the generation of the user's feeds, to pass to put after the feed has been ranked
+    def generation(self, user_name: str) -> tuple:
+        with self.lock:
+            return self.user_generations.get(user_name, 0), self.author_generation
+
+    # Returns the cached feed for the key, None if it is not cached or has expired
+    def get(self, key: tuple):
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is not None and entry[1] <= self.timer():
+                self.remove(key)
+                self.expirations += 1
+                entry = None
+
+            if entry is None:
+                self.misses += 1
+                return None
+
+            self.entries.move_to_end(key)
+            self.hits += 1
+            return entry[0]
+
+    # Caches the feed of the key's user, which depends on the statuses of the given authors
+    # With a generation, the feed is dropped if the user or an author was invalidated since the generation was read
+    def put(self, key: tuple, feed: list, authors, generation: tuple = None):
+        with self.lock:
+            if generation is not None and generation != self.generation(key[0]):
+                return
+            if key in self.entries:
+                self.remove(key)
+
+            size = feed_size(feed)
+            if size > self.max_bytes:
+                return
+
+            authors = frozenset(authors)
+            self.entries[key] = (feed, self.timer() + self.ttl, size, authors)
+            self.size += size
+            self.user_keys.setdefault(key[0], set()).add(key)
+            for author in authors:
+                self.author_keys.setdefault(author, set()).add(key)
+
+            # Evict the least recently used entries
+            while len(self.entries) > self.max_entries or self.size > self.max_bytes:
+                self.remove(next(iter(self.entries)))
+                self.evictions += 1
+
+    def remove(self, key: tuple):
+        feed, expiry, size, authors = self.entries.pop(key)
+        self.size -= size
+
+        user_keys = self.user_keys[key[0]]
+        user_keys.discard(key)
+        if not user_keys:
+            del self.user_keys[key[0]]
+        for author in authors:
+            author_keys = self.author_keys[author]
+            author_keys.discard(key)
+            if not author_keys:
+                del self.author_keys[author]
+
+    # Removes the feeds of a user whose out-edges have changed
+    def invalidate_user(self, user_name: str):
+        with self.lock:
+            self.user_generations[user_name] = self.user_generations.get(user_name, 0) + 1
+            for key in list(self.user_keys.get(user_name, ())):
+                self.remove(key)
+                self.invalidations += 1
+
+    # Removes the feeds that depend on the statuses of an author whose status has changed
+    def invalidate_author(self, author: str):
+        with self.lock:
+            self.author_generation += 1
+            for key in list(self.author_keys.get(author, ())):
+                self.remove(key)
+                self.invalidations += 1
+
+    # Starts a new dataset version, e.g. after the whole dataset has been reloaded, and drops all feeds
+    def new_version(self):
+        with self.lock:
+            self.version += 1
+            self.invalidations += len(self.entries)
+            self.entries.clear()
+            self.user_keys.clear()
+            self.author_keys.clear()
+            self.size = 0
+
+    def stats(self) -> dict:
+        with self.lock:
+            return {"entries": len(self.entries), "bytes": self.size, "hits": self.hits, "misses": self.misses,
+                    "evictions": self.evictions, "expirations": self.expirations, "invalidations": self.invalidations}
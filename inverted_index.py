@@ -0,0 +1,147 @@
+import heapq
+from bisect import bisect_left
+
+from postings import decode_postings, encode_postings, encode_varint, prefix_range, rebase_postings
+from normalization import search_letters, split_status
+from search_trie import PositionalIndex, SearchIndex, word_rank
+
+
+# An inverted index with the same search interface as the trie
+# Every distinct word stores one sorted posting list of integer document numbers, compressed with delta and varint
+# encoding, instead of copying the status id into a set on every node along the word
+class InvertedIndex(SearchIndex):
+    def __init__(self):
+        self.status_ids: list[str] = []  # Maps a document number to its status id
+        self.documents: dict = {}  # Maps a status id to its document number
+
+        self.postings: dict = {}  # Maps a word to its encoded posting list
+        self.last_documents: dict = {}  # Maps a word to the largest document number in its posting list
+        self.counters: dict = {}  # Maps a word to the number of times it has been inserted
+
+        # Sorted views of the vocabulary, rebuilt lazily after insertions
+        self.sorted_words: list[str] = []
+        # Every word of 2+ letters without its first letter, followed by a separator and the first letter
+        self.sorted_shifted_words: list[str] = []
+        self.is_sorted = True
+        self.phrase_index = PositionalIndex()
+
+    def insert(self, status, status_id):
+        """Inserts a status into the index"""
+        self.phrase_index.insert(status, status_id)
+        document = self.documents.get(status_id)
+        if document is None:
+            document = len(self.status_ids)
+            self.status_ids.append(status_id)
+            self.documents[status_id] = document
+
+        for word in split_status(status, True):
+            if word not in self.counters:
+                self.counters[word] = 0
+                self.is_sorted = False
+            self.counters[word] += 1
+
+            # Empty words are only kept for autocompletion, they are never matched by a query
+            if word != '':
+                self.add_posting(word, document)
+
+    # Appends the statuses of a separately built index, e.g. a shard of a parallel build, as if they were inserted
+    # after the statuses of this index. The other index is consumed
+    def merge(self, other):
+        if not self.documents.keys().isdisjoint(other.documents):
+            raise ValueError("Only indexes of different statuses can be merged")
+        self.phrase_index.merge(other.phrase_index)
+        offset = len(self.status_ids)
+        self.status_ids.extend(other.status_ids)
+        for status_id, document in other.documents.items():
+            self.documents[status_id] = document + offset
+
+        for word, buffer in other.postings.items():
+            if word in self.postings:
+                self.postings[word] += rebase_postings(buffer, offset, self.last_documents[word])
+            else:
+                self.postings[word] = rebase_postings(buffer, offset, 0)
+            self.last_documents[word] = other.last_documents[word] + offset
+
+        for word, counter in other.counters.items():
+            if word not in self.counters:
+                self.counters[word] = 0
+                self.is_sorted = False
+            self.counters[word] += counter
+
+    # Adds a document to the posting list of the word
+    def add_posting(self, word: str, document: int):
+        last_document = self.last_documents.get(word)
+        if last_document is None:
+            self.postings[word] = encode_postings([document])
+            self.last_documents[word] = document
+        elif document > last_document:
+            encode_varint(document - last_document, self.postings[word])
+            self.last_documents[word] = document
+        elif document < last_document:
+            # A status that was inserted again, the posting list has to be re-encoded to stay sorted
+            documents = decode_postings(self.postings[word])
+            position = bisect_left(documents, document)
+            if position == len(documents) or documents[position] != document:
+                documents.insert(position, document)
+                self.postings[word] = encode_postings(documents)
+
+    def sort(self):
+        if self.is_sorted:
+            return
+        self.sorted_words = sorted(self.counters)
+        self.sorted_shifted_words = sorted(word[1:] + '\0' + word[0] for word in self.counters if len(word) > 1)
+        self.is_sorted = True
+
+    # Returns a set of status ids that hold the given search term
+    # Matches the trie: words that start with the term, or that continue with the term after a different first letter
+    def query(self, search_term: str) -> set[str]:
+        letters = search_letters(search_term)
+        if len(letters) == 0:
+            return set()
+
+        self.sort()
+        documents = set()
+        start, end = prefix_range(self.sorted_words, letters)
+        for word in self.sorted_words[start:end]:
+            documents.update(decode_postings(self.postings[word]))
+
+        start, end = prefix_range(self.sorted_shifted_words, letters)
+        for shifted_word in self.sorted_shifted_words[start:end]:
+            if shifted_word[-1] != letters[0]:
+                documents.update(decode_postings(self.postings[shifted_word[-1] + shifted_word[:-2]]))
+
+        status_ids = self.status_ids
+        return {status_ids[document] for document in documents}
+
+    # Returns a list of (word, occurrences) pairs in alphabetical order for the words that start with the prefix
+    # A word counts every inserted word that it is a prefix of, like the counter of a trie node
+    def prefix_counters(self, prefix: str) -> list[(str, int)]:
+        self.sort()
+        start, end = prefix_range(self.sorted_words, prefix)
+        words = self.sorted_words[start:end]
+
+        cumulative_counters = [0]
+        for word in words:
+            cumulative_counters.append(cumulative_counters[-1] + self.counters[word])
+
+        word_counters = []
+        for word in words:
+            if word == '':
+                counter = 0  # The root of the trie is never counted
+            else:
+                word_start, word_end = prefix_range(words, word)
+                counter = cumulative_counters[word_end] - cumulative_counters[word_start]
+            word_counters.append((word, counter))
+        return word_counters
+
+    # Returns a list of the limit most frequent autocompleted search terms, equally frequent words alphabetically
+    def autocomplete(self, prefix, limit: int = 10):
+        prefix = search_letters(prefix)
+        return heapq.nsmallest(limit, self.prefix_counters(prefix), key=word_rank)
+
+    # Returns a page of all autocompleted search terms, sorted by the occurrence descending and equally frequent words
+    # alphabetically, like the trie
+    def autocomplete_all(self, prefix, offset: int = 0, count: int = None):
+        prefix = search_letters(prefix)
+        words = sorted(self.prefix_counters(prefix), key=word_rank)
+        return words[offset:] if count is None else words[offset:offset + count]
@@ -0,0 +1,216 @@
+import math
+import pickle
+import threading
+from datetime import datetime
+
+from affinity_graph import DecayClock, action_types
+from csr_graph import CSRGraph
+
+# The day that action dates are counted from
+reference_epoch = datetime(1970, 1, 1)
+# Days of an edge that are at least fold_age days old are folded into buckets of ages that grow by fold_growth
+fold_age = 64
+fold_growth = 1.125
+
+
+# Folds the days of an edge (a dictionary of days to weights) that are at least fold_age days older than today into
+# one day per bucket of ages
+# Past fold_age the date multiplier is 1/age within 1e-13, so every bucket is kept as the day of its harmonic mean age
+# with the weight that gives the bucket's summed weight on today. The folded weight is exact on today and drifts by
+# less than 0.2% of the folded days' weight on later days (also when an edge is folded again and again), as the ages
+# of a bucket grow closer together
+def fold_days(days: dict, today: int):
+    buckets = {}
+    for day, weight in days.items():
+        age = today - day
+        if age >= fold_age:
+            buckets.setdefault(int(math.log(age / fold_age, fold_growth)), []).append((day, weight))
+
+    for bucket_days in buckets.values():
+        if len(bucket_days) < 2:
+            continue
+        weight_sum = sum(weight for day, weight in bucket_days)
+        today_weight = sum(weight / (today - day) for day, weight in bucket_days)
+        for day, weight in bucket_days:
+            del days[day]
+        age = round(weight_sum / today_weight)
+        days[today - age] = today_weight * age
+
+
+# An affinity graph that takes new comments, reactions and shares one at a time and decays the weights when they are
+# read, so it never has to be rebuilt to keep up with the current date
+# Every (user, author) edge stores the summed action weights per day since the reference epoch. A weight is read as
+# the sum of every day's weight times the date multiplier of that day's age, in whole calendar days, so the weights of
+# a stored graph are current on any later day. Old days are folded (see fold_days), so an edge keeps a bounded number of
+# days however long its user stays active. Edges connect the same users as in insert_data: friends have a weight of
+# 5000, other users that have statuses get their affinity. The affinity is not the one of insert_data, which counts the
+# whole 24 hour periods before the current time: an action performed at a later time of day than the current time is a
+# day older here, so the weights only equal those of insert_data with a clock at the end of the day
+class LiveAffinityGraph:
+    def __init__(self, friends: dict, statuses_by_users: dict, epoch: datetime = reference_epoch):
+        self.friends = friends
+        self.statuses_by_users = statuses_by_users
+        self.epoch = epoch
+        # Maps a user to a dictionary of authors, which maps a day since the epoch to the summed weight of the actions
+        self.histograms: dict = {}
+        # Maps an unknown status id to the actions performed on it: (user, day, weight)
+        self.unknown_status_actions: dict = {}
+        # The number of lines of the event log that the graph includes (see EventIngestor.open_log)
+        self.logged_events = 0
+        # Readers and writers can be in different threads, e.g. an event stream and the HTTP handlers
+        self.lock = threading.RLock()
+
+    # Returns a graph with the actions of the given comments, reactions and shares (dictionaries of user action lists)
+    @classmethod
+    def from_data(cls, friends: dict, comments, reactions, shares, statuses: dict, statuses_by_users: dict,
+                  epoch: datetime = reference_epoch):
+        graph = cls(friends, statuses_by_users, epoch)
+        for action_type, actions in enumerate((comments, reactions, shares)):
+            for user_actions in actions.values():
+                for action in user_actions:
+                    graph.add_action(action_type, action, statuses)
+        return graph
+
+    # The lock is not pickled, and neither are the statuses by users, which are loaded with the statuses
+    def __getstate__(self) -> dict:
+        state = self.__dict__.copy()
+        del state['lock'], state['statuses_by_users']
+        return state
+
+    def __setstate__(self, state: dict):
+        self.__dict__.update(state)
+        self.__dict__.setdefault('logged_events', 0)
+        self.statuses_by_users = {}
+        self.lock = threading.RLock()
+
+    def epoch_day(self, date: datetime) -> int:
+        return (date - self.epoch).days
+
+    # Adds a comment (action type 0), reaction (1) or share (2) and returns the (user, author) pair whose edge has
+    # changed, None if the status is not known yet. The action is counted once its status is added
+    def add_action(self, action_type: int, action, statuses: dict):
+        date_key, weight = action_types[action_type]
+        user_name = ('comment_author', 'reactor', 'sharer')[action_type]
+        user_name = action[user_name]
+        day = self.epoch_day(action[date_key])
+        with self.lock:
+            status = statuses.get(action['status_id'])
+            if status is None:
+                self.unknown_status_actions.setdefault(action['status_id'], []).append(
+                    (user_name, day, weight(action)))
+                return None
+            self.add_weight(user_name, status['author'], day, weight(action))
+            return user_name, status['author']
+
+    # Adds the actions that were waiting for the status and returns the (user, author) pairs whose edges have changed
+    def add_status(self, status) -> set:
+        changed_pairs = set()
+        with self.lock:
+            for user_name, day, weight in self.unknown_status_actions.pop(status['status_id'], ()):
+                self.add_weight(user_name, status['author'], day, weight)
+                changed_pairs.add((user_name, status['author']))
+        return changed_pairs
+
+    # Adds the waiting actions of the statuses that are known now, e.g. after the statuses of the additional dataset
+    # have been loaded, and returns the (user, author) pairs whose edges have changed
+    def add_known_statuses(self, statuses: dict) -> set:
+        changed_pairs = set()
+        with self.lock:
+            for status_id in [status_id for status_id in self.unknown_status_actions if status_id in statuses]:
+                changed_pairs |= self.add_status(statuses[status_id])
+        return changed_pairs
+
+    def add_weight(self, user_name: str, author: str, day: int, weight: float):
+        days = self.histograms.setdefault(user_name, {}).setdefault(author, {})
+        days[day] = days.get(day, 0) + weight
+        # Folding leaves fold_age days and one day per bucket, so an edge is only folded again after dozens of new days
+        if len(days) > 2 * fold_age:
+            fold_days(days, max(days))
+
+    # Folds the old days of every edge, e.g. after loading a graph that was saved long ago
+    def fold(self, clock: DecayClock = None):
+        if clock is None:
+            clock = DecayClock()
+        today = self.epoch_day(clock.current_date)
+        with self.lock:
+            for author_days in self.histograms.values():
+                for days in author_days.values():
+                    fold_days(days, today)
+
+    # Returns the affinity between the user and the author on the day of the clock
+    def affinity(self, user_name: str, author: str, clock: DecayClock = None) -> float:
+        if clock is None:
+            clock = DecayClock()
+        days = self.histograms.get(user_name, {}).get(author)
+        if days is None:
+            return 0
+        today = self.epoch_day(clock.current_date)
+        return sum(weight * clock.day_multiplier(today - day) for day, weight in days.items())
+
+    # Returns the edge weight between the user and the second user on the day of the clock, 0 if there is no edge
+    def edge_weight(self, user_name: str, second_user_name: str, clock: DecayClock = None) -> float:
+        if user_name not in self.friends or second_user_name not in self.friends:
+            return 0
+        if second_user_name in self.friends[user_name]:
+            return 5000
+        if second_user_name not in self.statuses_by_users or second_user_name == user_name:
+            return 0
+        return self.affinity(user_name, second_user_name, clock)
+
+    # Returns a dictionary which maps every user that the user has an edge to, to the edge weight on the day of the
+    # clock, like affinity_graph.out_weights
+    def out_weights(self, user_name: str, clock: DecayClock = None) -> dict:
+        if clock is None:
+            clock = DecayClock()
+        with self.lock:
+            if user_name not in self.friends:
+                return {}
+            weights = {}
+            for second_user_name in set(self.friends[user_name]) | self.histograms.get(user_name, {}).keys():
+                weight = self.edge_weight(user_name, second_user_name, clock)
+                if weight > 0:
+                    weights[second_user_name] = weight
+            return weights
+
+    def __contains__(self, user_name) -> bool:
+        return user_name in self.friends
+
+    def __len__(self) -> int:
+        return len(self.friends)
+
+    # Returns a read-only CSRGraph with the weights on the day of the clock, e.g. for batch feeds or a snapshot
+    def to_csr(self, clock: DecayClock = None) -> CSRGraph:
+        if clock is None:
+            clock = DecayClock()
+        with self.lock:
+            return CSRGraph.from_edges((user_name, second_user_name, weight) for user_name in self.friends
+                                       for second_user_name, weight in self.out_weights(user_name, clock).items())
+
+
+# Returns the live affinity graph from live_graph.obj, or builds and saves it if the file does not exist or rebuild is
+# set. The stored weights do not go stale, the graph only has to be rebuilt when the dataset files change
+# A rebuilt graph only holds the dataset's actions, the streamed events are replayed from the event log. The actions on
+# statuses that were unknown when they were streamed are added once their statuses are loaded
+def get_live_graph(friends, comments, reactions, shares, statuses, statuses_by_users,
+                   rebuild: bool = False) -> LiveAffinityGraph:
+    try:
+        if rebuild:
+            raise FileNotFoundError
+        with open("live_graph.obj", "rb") as graph_file_obj:
+            graph = pickle.load(graph_file_obj)
+        graph.statuses_by_users = statuses_by_users
+        graph.add_known_statuses(statuses)
+        graph.fold()
+        print("Found live graph in file")
+    except FileNotFoundError:
+        print("Live graph in file is out of date" if rebuild else "Live graph not found in file")
+        graph = LiveAffinityGraph.from_data(friends, comments, reactions, shares, statuses, statuses_by_users)
+        save_live_graph(graph)
+
+    print(f"LiveAffinityGraph with {len(graph)} users")
+    return graph
+
+
+def save_live_graph(graph: LiveAffinityGraph, path: str = "live_graph.obj"):
+    with graph.lock, open(path, "wb") as graph_file_obj:
+        pickle.dump(graph, graph_file_obj)
@@ -1,10 +1,30 @@
+import heapq
 import operator
+import os
 import sys
 
 import affinity_graph
 from parse_files_dict import *
+from parallel_loader import load_comments_parallel, load_reactions_parallel, load_shares_parallel
+from parallel_index import build_index_parallel
 from affinity_graph import *
 from search_trie import *
+from inverted_index import InvertedIndex
+from snapshot import Snapshot, is_mappable, write_snapshot
+from manifest import Manifest
+from feed_cache import FeedCache
+from candidates import CandidateIndex
+from ranked_search import SearchRanker
+from live_graph import get_live_graph
+
+# The dataset files that the graph and the trie are built from, and the additional dataset of insert_data
+graph_sources = ["dataset/friends.csv", "dataset/original_comments.csv", "dataset/original_reactions.csv",
+                 "dataset/original_shares.csv", "dataset/original_statuses.csv"]
+trie_sources = ["dataset/original_statuses.csv"]
+delta_sources = ["dataset/test_comments.csv", "dataset/test_reactions.csv", "dataset/test_shares.csv",
+                 "dataset/test_statuses.csv"]
+# The edit distances that a search without results is repeated with
+fuzzy_distances = [1, 2]
 
 
 class FeedStatus:
@@ -17,71 +37,153 @@ class FeedStatus:
                        + "\nPublished: " + str(status['status_published']) \
                        + "\nAuthor: " + status['author']
         self.relevance = relevance
+        self.author = status['author']
+        self.status_id = status['status_id']
 
 
-# Returns the 10 most relevant statuses for the given user
-def get_feed(graph: networkx.DiGraph, user_name: str, statuses: dict, word_count_map: dict) -> list[FeedStatus]:
-    # Add the user to the graph if he is not in it
-    try:
-        user = graph[user_name]
-    except KeyError:
-        graph.add_node(user_name)
-        user = graph[user_name]
+# A ranked search feed that also holds the number of statuses that the search found, so that a cached search feed
+# gives the number of results without running the search again
+class SearchFeed(list):
+    def __init__(self, feed: list[FeedStatus], result_count: int):
+        super().__init__(feed)
+        self.result_count = result_count
+
 
-    feed = []
+# Returns the k most relevant statuses for a user with the given out-edge weights, without touching the graph
+# Authors without an edge from the user have an affinity of 0
+def rank_feed(user_weights: dict, statuses: dict, word_count_map: dict, k: int = 10,
+              clock: DecayClock = None) -> list[FeedStatus]:
+    if clock is None:
+        clock = DecayClock()
+
+    ranked_statuses = []
     for status_id, status in statuses.items():
-        # Add the author and an edge between the user and author (with weight = 0) to the graph if the author is missing
-        author = status['author']
-        try:
-            second_user = user[author]
-        except KeyError:
-            graph.add_node(author)
-            graph.add_edge(user_name, author, weight=0)
-            second_user = user[author]
-
-        status_popularity = status_popularity_rank(status['num_comments'], status['num_shares'], status['num_likes'],
-                                                   status['num_loves'], status['num_wows'], status['num_hahas'],
-                                                   status['num_sads'], status['num_angrys'], status['num_special'])
-        status_relevance = (second_user['weight'] + status_popularity) * date_difference_rank_multiplier(
+        status_relevance = (user_weights.get(status['author'], 0) + status_popularity(status)) * clock.multiplier(
             status['status_published'])
 
         if word_count_map != {}:
             status_relevance *= pow(word_count_map[status_id], 5)
 
-        feed.append(FeedStatus(status, status_relevance))
+        ranked_statuses.append((status_relevance, status))
+
+    # Keep the k most relevant statuses with a bounded heap (ties keep the order of the statuses, like a stable sort)
+    # and only build the feed statuses for them
+    top_statuses = heapq.nlargest(k, ranked_statuses, key=operator.itemgetter(0))
+    return [FeedStatus(status, status_relevance) for status_relevance, status in top_statuses]
+
+
+# Returns the feed of get_feed from the feed cache, or ranks it without modifying the graph and caches it
+# query identifies the statuses and word counts of a search feed, None for the feed of all statuses
+# With a CandidateIndex of the statuses, a feed without word counts only scores the index's candidates, with the clock
+# of today's index
+def get_cached_feed(feed_cache: FeedCache, graph, user_name: str, statuses: dict, word_count_map: dict,
+                    k: int = 10, clock: DecayClock = None, query: str = None,
+                    candidate_index: CandidateIndex = None) -> list[FeedStatus]:
+    if candidate_index is not None:
+        candidate_index = candidate_index.today()
+        clock = candidate_index.clock
+    if clock is None:
+        clock = DecayClock()
+
+    key = feed_cache.key(user_name, query, k, clock.current_date.date())
+    feed = feed_cache.get(key)
+    if feed is None:
+        # Read before the graph, so a feed ranked from edges that change meanwhile is not cached
+        generation = feed_cache.generation(user_name)
+        user_weights = out_weights(graph, user_name)
+        if candidate_index is not None:
+            feed = [FeedStatus(status, status_relevance)
+                    for status_relevance, status in candidate_index.top_statuses(user_weights, k)]
+        else:
+            feed = rank_feed(user_weights, statuses, word_count_map, k, clock)
+        feed_cache.put(key, feed, set(user_weights) | {feed_status.author for feed_status in feed}, generation)
+    return feed
+
+
+# Returns the k most relevant statuses for the given user
+# The graph is only read, so it can be shared between threads and processes: unknown users and authors without an
+# edge from the user have an affinity of 0
+def get_feed(graph, user_name: str, statuses: dict, word_count_map: dict, k: int = 10,
+             clock: DecayClock = None) -> list[FeedStatus]:
+    return rank_feed(out_weights(graph, user_name), statuses, word_count_map, k, clock)
+
+
+# Returns the k most relevant statuses for the given user, only scoring the candidates of a CandidateIndex
+# The feed is the same as get_feed with the index's clock, unless approximate is set
+def get_candidate_feed(candidate_index: CandidateIndex, graph, user_name: str, k: int = 10,
+                       approximate: bool = False) -> list[FeedStatus]:
+    return [FeedStatus(status, status_relevance)
+            for status_relevance, status in candidate_index.user_top_statuses(graph, user_name, k, approximate)]
 
-    # Sort the feed descending by relevance
-    feed.sort(key=operator.attrgetter("relevance"), reverse=True)
 
-    # Return the 10 most relevant feed statuses
-    return feed[:10]
+# Returns the k most relevant statuses for the given user, scored with NumPy over a StatusColumns store
+# The graph is only read, authors without an edge are treated as having an affinity of 0
+def get_columnar_feed(graph: networkx.DiGraph, user_name: str, statuses: dict, status_columns,
+                      k: int = 10, clock: DecayClock = None) -> list[FeedStatus]:
+    return [FeedStatus(statuses[status_id], status_relevance)
+            for status_id, status_relevance in status_columns.top_statuses(graph, user_name, k, clock)]
+
+
+# Returns the found status ids and the k most relevant found statuses of a case-insensitive union search for the
+# given user, ranked while the postings are merged (see SearchRanker). The feed is the same as get_feed of the found
+# statuses with their word counts and the ranker's clock
+def get_search_feed(search_ranker: SearchRanker, graph, sentence_trie, user_name: str, search_input: str,
+                    k: int = 10, max_distance: int = 0) -> (set, list[FeedStatus]):
+    search_ids, top_statuses = search_ranker.search(sentence_trie, search_input, out_weights(graph, user_name), k,
+                                                    max_distance)
+    return search_ids, [FeedStatus(status, status_relevance) for status_relevance, status in top_statuses]
 
 
 # Inserts additional data into a given sentence trie
-def insert_sentence_trie_data(sentence_trie: Trie, statuses: dict) -> Trie:
+def insert_sentence_trie_data(sentence_trie: SearchIndex, statuses: dict) -> SearchIndex:
     for status in statuses.values():
         sentence_trie.insert(status['status_message'], status['status_id'])
 
+    return sentence_trie
+
+
+# Saves the graph and sentence trie, so that inserted data is used the next time the data is loaded
+# The manifest records that they include the additional dataset, so load_data checks them against the sources with the
+# additional dataset and loads its statuses as well
+def save_data(graph, sentence_trie):
+    graph_file_obj = open("graph.obj", "wb")
+    pickle.dump(graph, graph_file_obj)
+    graph_file_obj.close()
+
     trie_file_obj = open("trie.obj", "wb")
     pickle.dump(sentence_trie, trie_file_obj)
     trie_file_obj.close()
-    return sentence_trie
 
+    # The compact graph was converted from the graph before the insertion
+    if os.path.exists("graph_csr.obj"):
+        os.remove("graph_csr.obj")
+
+    manifest = Manifest()
+    manifest.record("graph.obj", graph_sources + delta_sources)
+    manifest.record("trie.obj", trie_sources + delta_sources)
 
-# Returns a sentence trie from a file, creates a new one if not found
-def get_sentence_trie(statuses) -> Trie:
+
+# Returns a sentence trie from a file, creates a new one if not found, if rebuild is set or if the file holds an index
+# of another class
+# index_class can be InvertedIndex, which answers the same searches with compressed posting lists
+# With more than one worker, a new inverted index is built from shards of the statuses by a pool of processes, as long
+# as there are enough cores and statuses for the pool to pay off (see parallel_workers). A trie is built serially
+def get_sentence_trie(statuses, index_class=Trie, rebuild: bool = False, workers: int = 1) -> SearchIndex:
     try:
+        if rebuild:
+            raise FileNotFoundError
         trie_file_obj = open("trie.obj", "rb")
         sentence_trie = pickle.load(trie_file_obj)
         trie_file_obj.close()
+        if type(sentence_trie) is not index_class:
+            rebuild = True
+            raise FileNotFoundError
         print("Trie found in file")
 
         return sentence_trie
     except FileNotFoundError:
-        print("Trie not found in file")
-        sentence_trie = Trie()
-        for status in statuses.values():
-            sentence_trie.insert(status['status_message'], status['status_id'])
+        print("Trie in file is out of date" if rebuild else "Trie not found in file")
+        sentence_trie = build_index_parallel(statuses, workers, index_class)
 
         print("Saved trie in file")
         trie_file_obj = open("trie.obj", "wb")
@@ -91,62 +193,162 @@ def get_sentence_trie(statuses) -> Trie:
         return sentence_trie
 
 
+# Adds the new statuses to the status dictionary and the statuses by users
+def merge_statuses(statuses: dict, statuses_by_users: dict, new_statuses: dict, new_statuses_by_users: dict):
+    statuses.update(new_statuses)
+    for key, val in new_statuses_by_users.items():
+        statuses_by_users.setdefault(key, {}).update(val)
+
+
+# Appends the new actions to the actions of their users (dictionaries of user action lists)
+def merge_actions(actions: dict, new_actions: dict):
+    for user_name, user_actions in new_actions.items():
+        actions.setdefault(user_name, []).extend(user_actions)
+
+
 # Inserts an additional dataset into the given graph, sentence trie and status dictionary
-def insert_data(graph, sentence_trie, statuses: dict, statuses_by_users):
+# Only the new comments, reactions, shares and statuses are processed: the graph edges they affect are updated and
+# only the statuses that weren't loaded before are inserted into the trie. The graph has to be built on the same day,
+# otherwise insert_delta raises ValueError
+# If a StatusColumns store is given, the new statuses are inserted into it as well
+# If a FeedCache is given, the feeds of users whose edges changed and the feeds that depend on the authors of the new
+# statuses are invalidated. If a CandidateIndex or SearchRanker is given, it is rebuilt with the merged statuses
+def insert_data(graph, sentence_trie, statuses: dict, statuses_by_users, status_columns=None, feed_cache=None,
+                candidate_index=None, search_ranker=None):
     print("Loading additional dataset")
     timer = datetime.now()
-    friends = load_friends("dataset/friends.csv")
     comments = load_comments("dataset/test_comments.csv")
     reactions = load_reactions("dataset/test_reactions.csv")
     shares = load_shares("dataset/test_shares.csv")
-    new_statuses = load_statuses("dataset/test_statuses.csv")
-    new_statuses_by_users = load_statuses_by_users("dataset/test_statuses.csv")
+    new_statuses, new_statuses_by_users = load_statuses_with_users("dataset/test_statuses.csv")
+    insert_status_popularity(new_statuses)
     print(f"Finished additional dataset loading after {datetime.now() - timer} seconds.")
 
     print("Adding new statuses")
     timer = datetime.now()
-    for key, val in new_statuses.items():
-        statuses.update({key: val})
-    for key, val in new_statuses_by_users.items():
-        statuses_by_users.update({key: val})
+    unseen_statuses = {key: val for key, val in new_statuses.items() if key not in statuses}
+    merge_statuses(statuses, statuses_by_users, new_statuses, new_statuses_by_users)
+    if status_columns is not None:
+        status_columns.insert(new_statuses)
+    if candidate_index is not None:
+        candidate_index.build(statuses, statuses_by_users, candidate_index.clock)
+    if search_ranker is not None:
+        search_ranker.build(statuses, search_ranker.clock)
     print(f"Finished adding new statuses after {datetime.now() - timer} seconds.")
 
     print("Adding new data to graph")
     timer = datetime.now()
-    graph = affinity_graph.insert_data(graph, friends, comments, reactions, shares, statuses, statuses_by_users)
+    changed_edges = set()
+    graph = affinity_graph.insert_delta(graph, comments, reactions, shares, new_statuses, statuses, statuses_by_users,
+                                        changed_edges)
+    if feed_cache is not None:
+        for user_id, second_user_id in changed_edges:
+            feed_cache.invalidate_user(user_id)
+        for status in new_statuses.values():
+            feed_cache.invalidate_author(status['author'])
     print(f"Finished new data insertion in graph after {datetime.now() - timer} seconds.")
 
     print("Adding new data to trie")
     timer = datetime.now()
-    sentence_trie = insert_sentence_trie_data(sentence_trie, new_statuses)
+    sentence_trie = insert_sentence_trie_data(sentence_trie, unseen_statuses)
     print(f"Finished new data insertion in trie after {datetime.now() - timer} seconds.")
     print("\n")
     return graph, sentence_trie, statuses
 
 
 # Loads / generates the graph, sentence trie and status dictionary
-def load_data():
+# The graph and trie files are only used while the manifest shows that their sources haven't changed, otherwise they
+# are rebuilt. Friends, comments, reactions and shares are only parsed when the graph has to be rebuilt
+# With more than one worker, comments, reactions and shares are parsed in chunks by a pool of processes, and a trie
+# that has to be rebuilt is built from shards in parallel
+# index_class is the search index backend, Trie or InvertedIndex (see get_sentence_trie)
+# With snapshot set, the graph and trie are read-only views of a mapped snapshot.bin, which is written on the first run
+# With live set, the graph is a LiveAffinityGraph from live_graph.obj that takes new events and decays its weights when
+# they are read, it is never compact or mapped from a snapshot. The events streamed into it are replayed from the event
+# log by EventIngestor.open_log, also after the graph has been rebuilt
+def load_data(workers: int = 1, compact: bool = False, snapshot: bool = False, live: bool = False,
+              index_class=Trie):
+    manifest = Manifest()
+    snapshot = snapshot and not live
+    graph_file = "live_graph.obj" if live else "graph.obj"
+    # After save_data, the graph and trie also hold the additional dataset. The manifest records that for every
+    # artifact, so the additional dataset stays loaded when only some of them are stale: every artifact is checked
+    # against its own sources with the additional dataset, and a stale one is rebuilt with the additional dataset
+    with_delta = all(os.path.exists(source) for source in delta_sources) and any(
+        set(delta_sources) <= set(manifest.recorded_sources(artifact)) for artifact in ("graph.obj", "trie.obj"))
+    graph_delta = with_delta and not live
+    sources = graph_sources + delta_sources if graph_delta else graph_sources
+    index_sources = trie_sources + delta_sources if with_delta else trie_sources
+    use_snapshot = snapshot and manifest.is_valid("snapshot.bin", sources) and is_mappable("snapshot.bin")
+    # A compact graph is loaded from graph_csr.obj, without the networkx graph
+    compact_valid = compact and not live and manifest.is_valid("graph_csr.obj", sources)
+    graph_valid = use_snapshot or compact_valid or manifest.is_valid(graph_file, sources)
+    trie_valid = use_snapshot or manifest.is_valid("trie.obj", index_sources)
+
     print("Loading dataset")
     timer = datetime.now()
-    friends = load_friends("dataset/friends.csv")
-    comments = load_comments("dataset/original_comments.csv")
-    reactions = load_reactions("dataset/original_reactions.csv")
-    shares = load_shares("dataset/original_shares.csv")
-    statuses = load_statuses("dataset/original_statuses.csv")
-    statuses_by_users = load_statuses_by_users("dataset/original_statuses.csv")
+    statuses, statuses_by_users = load_statuses_with_users("dataset/original_statuses.csv")
+    if with_delta:
+        merge_statuses(statuses, statuses_by_users, *load_statuses_with_users("dataset/test_statuses.csv"))
+    insert_status_popularity(statuses)
+
+    friends = comments = reactions = shares = None
+    if not graph_valid:
+        friends = load_friends("dataset/friends.csv")
+        if workers > 1:
+            comments = load_comments_parallel("dataset/original_comments.csv", workers)
+            reactions = load_reactions_parallel("dataset/original_reactions.csv", workers)
+            shares = load_shares_parallel("dataset/original_shares.csv", workers)
+        else:
+            comments = load_comments("dataset/original_comments.csv")
+            reactions = load_reactions("dataset/original_reactions.csv")
+            shares = load_shares("dataset/original_shares.csv")
+        if graph_delta:
+            # A full build over the merged actions gives the same weights as insert_delta on the same day
+            merge_actions(comments, load_comments("dataset/test_comments.csv"))
+            merge_actions(reactions, load_reactions("dataset/test_reactions.csv"))
+            merge_actions(shares, load_shares("dataset/test_shares.csv"))
 
     print(f"Finished dataset loading after {datetime.now() - timer} seconds.")
 
+    if use_snapshot:
+        timer = datetime.now()
+        data_snapshot = Snapshot("snapshot.bin")
+        print(f"Finished snapshot mapping after {datetime.now() - timer} seconds.")
+        print("\n")
+        return data_snapshot.graph, data_snapshot.index, statuses, statuses_by_users
+
     print("Loading graph")
     timer = datetime.now()
-    graph = get_affinity_graph(friends, comments, reactions, shares, statuses, statuses_by_users)
+    if live:
+        graph = get_live_graph(friends, comments, reactions, shares, statuses, statuses_by_users,
+                               rebuild=not graph_valid)
+    elif compact_valid:
+        graph = load_compact_graph()
+    else:
+        graph = get_affinity_graph(friends, comments, reactions, shares, statuses, statuses_by_users, compact,
+                                   rebuild=not graph_valid)
+        if compact:
+            manifest.record("graph_csr.obj", sources)
+    # A rebuilt compact graph is only saved to graph_csr.obj
+    if not graph_valid and (live or not compact):
+        manifest.record(graph_file, sources)
     print(f"Finished graph loading / generation after {datetime.now() - timer} seconds.")
 
     timer = datetime.now()
-    sentence_trie = get_sentence_trie(statuses)
+    sentence_trie = get_sentence_trie(statuses, index_class, rebuild=not trie_valid, workers=workers)
+    if not trie_valid:
+        manifest.record("trie.obj", index_sources)
     print(f"Finished trie generation after {datetime.now() - timer} seconds.")
     print("\n")
 
+    if snapshot:
+        # The next start maps the snapshot instead of unpickling the graph and trie
+        write_snapshot("snapshot.bin", graph, sentence_trie)
+        manifest.record("snapshot.bin", sources)
+        data_snapshot = Snapshot("snapshot.bin")
+        return data_snapshot.graph, data_snapshot.index, statuses, statuses_by_users
+
     return graph, sentence_trie, statuses, statuses_by_users
 
 
@@ -156,14 +358,68 @@ def login():
     return username
 
 
-def run_search(graph, sentence_trie, username, statuses):
+# Returns the number of statuses found for the search input and the feed of the found statuses for the user
+# Input in quotes is a case-sensitive phrase search, anything else a case-insensitive union search whose feed ranks
+# statuses by the number of search words that they contain
+# If a SearchRanker is given, union searches are ranked while the postings are merged
+# With a max_distance above 0, the words of a union search also match the words within that many edits of them
+def search_feed(graph, sentence_trie, username: str, statuses: dict, search_input: str,
+                feed_cache: FeedCache = None, search_ranker: SearchRanker = None,
+                max_distance: int = 0) -> (int, list[FeedStatus]):
+    # Fuzzy searches are cached separately from exact ones
+    query = search_input if max_distance == 0 else f"{search_input}~{max_distance}"
+    if search_ranker is not None and not (search_input[0] == '"' and search_input[-1] == '"'):
+        # The date multipliers and the cache key move on to the next day like the ones of get_feed
+        search_ranker = search_ranker.today()
+        if feed_cache is None:
+            search_ids, feed = get_search_feed(search_ranker, graph, sentence_trie, username, search_input,
+                                               max_distance=max_distance)
+            return len(search_ids), feed
+        key = feed_cache.key(username, query, 10, search_ranker.clock.current_date.date())
+        feed = feed_cache.get(key)
+        if feed is None:
+            generation = feed_cache.generation(username)
+            search_ids, feed = get_search_feed(search_ranker, graph, sentence_trie, username, search_input,
+                                               max_distance=max_distance)
+            feed = SearchFeed(feed, len(search_ids))
+            feed_cache.put(key, feed, set(out_weights(graph, username)) | {status.author for status in feed},
+                           generation)
+        return feed.result_count, feed
+
+    # A case-insensitive union search returns the number of words that a status contains from the given input
+    should_count_words = False
+
+    # Case-sensitive phrase search
+    if search_input[0] == '"' and search_input[-1] == '"':
+        search_ids = sentence_trie.search_phrase(search_input, statuses)
+    else:
+        search_ids = sentence_trie.search_union_case_insensitive(search_input, max_distance)
+        should_count_words = True
+
+    # Create a map of statuses that have been found when searching
+    relevant_statuses = {}
+    for status_id in search_ids:
+        if status_id in statuses:
+            relevant_statuses[status_id] = statuses[status_id]
+
+    word_count_map = search_ids if should_count_words else {}
+    if feed_cache is not None:
+        feed = get_cached_feed(feed_cache, graph, username, relevant_statuses, word_count_map, query=query)
+    else:
+        feed = get_feed(graph, username, relevant_statuses, word_count_map)
+    return len(search_ids), feed
+
+
+# Repeated searches are ranked once if a FeedCache is given
+def run_search(graph, sentence_trie, username, statuses, feed_cache: FeedCache = None,
+               search_ranker: SearchRanker = None):
     should_run = True
     while should_run:
         print("")
         search_input = input("Enter the term that you wish to search for\n>>")
         # Word autocompletion
         if search_input[-1] == '*':
-            autocompleted_words: (str, int) = sentence_trie.autocomplete(search_input)
+            autocompleted_words: (str, int) = sentence_trie.autocomplete(search_input, 10)
             print("Autocompleted words:")
             for word, occurrence in autocompleted_words:
                 print(word)
@@ -171,28 +427,19 @@ def run_search(graph, sentence_trie, username, statuses):
             if search_input == '':
                 continue
 
-            # A case-insensitive union search returns the number of words that a status contains from the given input
-            should_count_words = False
-
-            # Case-sensitive phrase search
-            if search_input[0] == '"' and search_input[-1] == '"':
-                search_ids = sentence_trie.search_phrase(search_input, statuses)
-            else:
-                search_ids = sentence_trie.search_union_case_insensitive(search_input)
-                should_count_words = True
-            print(f"Found {len(search_ids)} results.")
-
-            # Create a map of statuses that have been found when searching
-            relevant_statuses = {}
-            for status_id in search_ids:
-                if status_id in statuses:
-                    relevant_statuses[status_id] = statuses[status_id]
-
-            if should_count_words:
-                feed = get_feed(graph, username, relevant_statuses, search_ids)
-            else:
-                feed = get_feed(graph, username, relevant_statuses, {})
-
+            result_count, feed = search_feed(graph, sentence_trie, username, statuses, search_input, feed_cache,
+                                              search_ranker)
+            # A misspelled word finds nothing, so the union search is repeated with words that are 1, then 2 edits
+            # away, if the index supports fuzzy searches
+            is_phrase = search_input[0] == '"' and search_input[-1] == '"'
+            for max_distance in fuzzy_distances:
+                if result_count > 0 or is_phrase or not sentence_trie.supports_fuzzy:
+                    break
+                result_count, feed = search_feed(graph, sentence_trie, username, statuses, search_input, feed_cache,
+                                                  search_ranker, max_distance)
+                if result_count > 0:
+                    print(f"No exact matches, showing words with an edit distance of up to {max_distance}.")
+            print(f"Found {result_count} results.")
             print(f"Search feed size: {len(feed)}.")
             for status in feed:
                 print(status.message, "\nRelevance:", status.relevance)
@@ -201,17 +448,23 @@ def run_search(graph, sentence_trie, username, statuses):
 def run():
     graph, sentence_trie, statuses, statuses_by_users = load_data()
 
-    # Uncomment this line and change the file paths in insert_data to insert additional data into the graph and trie
-    # insert_data(graph, sentence_trie, statuses, statuses_by_users)
+    feed_cache = FeedCache()
+    search_ranker = SearchRanker(statuses)
+    candidate_index = CandidateIndex(statuses, statuses_by_users)
+
+    # Uncomment these lines and change the file paths in insert_data to insert additional data into the graph and trie
+    # insert_data(graph, sentence_trie, statuses, statuses_by_users, feed_cache=feed_cache,
+    #             candidate_index=candidate_index, search_ranker=search_ranker)
+    # save_data(graph, sentence_trie)
 
     username = login()
     # Displays the feed for the current user
-    feed = get_feed(graph, username, statuses, {})
+    feed = get_cached_feed(feed_cache, graph, username, statuses, {}, candidate_index=candidate_index)
     print(f"Welcome, {username}. Here's your recommended feed:\n")
     for status in feed:
         print(status.message, "\nRelevance:", status.relevance)
 
-    run_search(graph, sentence_trie, username, statuses)
+    run_search(graph, sentence_trie, username, statuses, feed_cache, search_ranker)
 
 
 if __name__ == '__main__':
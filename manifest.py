@@ -0,0 +1,70 @@
+import hashlib
+import json
+import os
+
+# The manifest records the source files that every saved artifact (graph.obj, trie.obj, snapshot.bin) was built from
+manifest_version = 1
+
+
+# Returns the SHA-256 of the file contents
+def file_hash(path: str) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as file:
+        for block in iter(lambda: file.read(1 << 20), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+# Returns the size, modification time and content hash of a source file, None if the file does not exist
+def source_fingerprint(path: str, with_hash: bool = True):
+    try:
+        stat = os.stat(path)
+    except FileNotFoundError:
+        return None
+    return {"size": stat.st_size, "mtime": stat.st_mtime_ns, "hash": file_hash(path) if with_hash else None}
+
+
+# Returns True if the source still has the recorded contents
+# The hash is only computed when the size matches but the modification time changed, e.g. after a copy or checkout
+def is_source_unchanged(path: str, fingerprint) -> bool:
+    current = source_fingerprint(path, with_hash=False)
+    if current is None or fingerprint is None:
+        return current is None and fingerprint is None
+    if current["size"] != fingerprint["size"]:
+        return False
+    return current["mtime"] == fingerprint["mtime"] or file_hash(path) == fingerprint["hash"]
+
+
+class Manifest:
+    def __init__(self, path: str = "manifest.json"):
+        self.path = path
+        try:
+            with open(path) as file:
+                data = json.load(file)
+        except (FileNotFoundError, ValueError):
+            data = {}
+        # A manifest of another version is ignored, all artifacts are rebuilt
+        self.artifacts: dict = data.get("artifacts", {}) if data.get("version") == manifest_version else {}
+
+    # Returns True if the artifact exists and was built from exactly the given sources, in their current state
+    # Artifacts that are not in the manifest (e.g. saved by an older version) are never valid
+    def is_valid(self, artifact: str, sources: list[str]) -> bool:
+        recorded = self.artifacts.get(artifact)
+        if recorded is None or not os.path.exists(artifact) or sorted(recorded) != sorted(sources):
+            return False
+        return all(is_source_unchanged(source, recorded[source]) for source in sources)
+
+    # Returns the sources that the artifact was recorded with, an empty list if it is not in the manifest
+    def recorded_sources(self, artifact: str) -> list[str]:
+        return list(self.artifacts.get(artifact, {}))
+
+    # Records that the artifact has been built from the given sources and saves the manifest
+    def record(self, artifact: str, sources: list[str]):
+        self.artifacts[artifact] = {source: source_fingerprint(source) for source in sources}
+        self.save()
+
+    def save(self):
+        temporary_path = self.path + ".tmp"
+        with open(temporary_path, "w") as file:
+            json.dump({"version": manifest_version, "artifacts": self.artifacts}, file, indent=2)
+        os.replace(temporary_path, self.path)
@@ -0,0 +1,55 @@
+import re
+
+# Normalizes and tokenizes status messages and search input for the trie, the inverted index and the phrase index
+# Only lowercase letters, numeric characters and spaces are kept (and uppercase letters in case-sensitive mode), every
+# other character is replaced with a space
+
+
+# A str.translate table that maps every character to itself or to a space
+# The characters are decided the first time they are seen and cached, so a message is translated in C without
+# calling ord() or isnumeric() for every character
+class CharacterTable(dict):
+    def __init__(self, keep_uppercase: bool):
+        super().__init__()
+        self.keep_uppercase = keep_uppercase
+
+    def __missing__(self, code: int) -> str:
+        char = chr(code)
+        if (self.keep_uppercase and 65 <= code <= 90) or 97 <= code <= 122 or char == ' ' or char.isnumeric():
+            self[code] = char
+        else:
+            self[code] = ' '
+        return self[code]
+
+
+case_sensitive_table = CharacterTable(True)
+case_insensitive_table = CharacterTable(False)
+non_ascii_pattern = re.compile('[^\x00-\x7f]+')
+
+
+# Leaves only lowercase letters and spaces inside a string. Replaces all other characters with spaces.
+# Numeric characters are kept, and uppercase letters too unless to_lower is set
+def filter_status_characters(status: str, to_lower: bool) -> str:
+    if to_lower:
+        status = status.lower()
+    table = case_insensitive_table if to_lower else case_sensitive_table
+    # str.translate only takes its fast path while the string is ASCII, so the (usually few) other characters are
+    # translated first
+    if not status.isascii():
+        status = non_ascii_pattern.sub(lambda match: match.group().translate(table), status)
+    return status.translate(table)
+
+
+# Returns the filtered status split at every space, including the empty words between consecutive spaces
+def split_status(status: str, to_lower: bool) -> list[str]:
+    return filter_status_characters(status, to_lower).split(' ')
+
+
+# Returns the words of a status in the order they appear, case-sensitive unless to_lower is set
+def status_words(status: str, to_lower: bool) -> list[str]:
+    return filter_status_characters(status, to_lower).split()
+
+
+# Returns the lowercase letters of a search term or prefix without spaces, e.g. "MAG#$! A" -> "maga"
+def search_letters(search_term: str) -> str:
+    return filter_status_characters(search_term, True).replace(' ', '')
@@ -0,0 +1,51 @@
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+from inverted_index import InvertedIndex
+from search_trie import SearchIndex, Trie
+
+
+# Builds the index of one shard of (status message, status id) pairs
+def build_shard(index_class, shard: list[(str, str)]) -> SearchIndex:
+    index = index_class()
+    for status_message, status_id in shard:
+        index.insert(status_message, status_id)
+    return index
+
+
+# Shards with fewer statuses are not worth a process: starting it and merging its index cost more than building them
+min_shard_size = 5000
+# The index classes that are built in a pool. An inverted index shard is a few dictionaries of flat posting buffers,
+# which the parent unpickles and appends quickly. A trie shard is a tree of node objects, which the parent unpickles
+# and merges node by node, serially, so a pool of trie shards is not faster than a serial build
+parallel_index_classes = (InvertedIndex,)
+
+
+# Returns the number of processes that build_index_parallel uses for the number of statuses and the index class
+# The build only scales with a core per process, large enough shards and a cheap merge, otherwise it is slower than a
+# serial build
+def parallel_workers(status_count: int, workers: int, index_class=InvertedIndex) -> int:
+    if index_class not in parallel_index_classes:
+        return 1
+    return max(1, min(workers, os.cpu_count() or 1, status_count // min_shard_size))
+
+
+# Returns an index of the statuses, built by a pool of processes
+# The statuses are split into one shard of consecutive statuses per worker, and the shard indexes are merged in the
+# order of the statuses, so the index is the same as inserting the statuses one by one. index_class can be Trie or
+# InvertedIndex. The number of workers is limited by parallel_workers, unless fixed_workers is set
+def build_index_parallel(statuses: dict, workers: int, index_class=Trie, fixed_workers: bool = False) -> SearchIndex:
+    messages = [(status['status_message'], status['status_id']) for status in statuses.values()]
+    if not fixed_workers:
+        workers = parallel_workers(len(messages), workers, index_class)
+    if workers <= 1 or len(messages) < 2:
+        return build_shard(index_class, messages)
+
+    shard_size = -(-len(messages) // workers)
+    shards = [messages[i:i + shard_size] for i in range(0, len(messages), shard_size)]
+    with ProcessPoolExecutor(max_workers=len(shards)) as executor:
+        indexes = executor.map(build_shard, [index_class] * len(shards), shards)
+        index = next(indexes)
+        for shard_index in indexes:
+            index.merge(shard_index)
+    return index
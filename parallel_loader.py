@@ -0,0 +1,122 @@
+import io
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+from parse_files_dict import group_by_user, parse_comments, parse_reactions, parse_shares
+
+# Maps a file kind to its record parser and the key of the user that the records are grouped by
+record_parsers = {
+    "comments": (parse_comments, "comment_author"),
+    "reactions": (parse_reactions, "reactor"),
+    "shares": (parse_shares, "sharer")
+}
+
+# How far back from a chunk boundary to start looking for a line with quotes
+lookback_size = 1 << 16
+
+
+# Returns True if the comment parser is guaranteed to have finished a comment before the line at the given offset
+# After a line with two or more quotes the parser always outputs a comment, after a line with a single quote it
+# always waits for the next line, and lines without quotes keep the state of the previous line
+def is_comment_boundary(file, offset: int, data_start: int) -> bool:
+    window_size = lookback_size
+    while True:
+        window_start = max(data_start, offset - window_size)
+        file.seek(window_start)
+        lines = file.read(offset - window_start).splitlines()
+        # The first line of the window may be cut off, unless the window starts at the beginning of the data
+        first_line = 0 if window_start == data_start else 1
+        for line in reversed(lines[first_line:]):
+            quotes = line.count(b'"')
+            if quotes >= 2:
+                return True
+            if quotes == 1:
+                return False
+
+        # The parser starts with a reset state
+        if window_start == data_start:
+            return True
+        window_size *= 2
+
+
+# Returns the offset of the line after the next line (starting at the given offset) with two or more quotes
+def next_comment_boundary(file, offset: int) -> int:
+    file.seek(offset)
+    for line in file:
+        if any(part.count(b'"') >= 2 for part in line.splitlines()):
+            break
+    return file.tell()
+
+
+# Returns the offset of the first line that starts after the given offset
+def next_line_start(file, offset: int) -> int:
+    file.seek(offset)
+    file.readline()
+    return file.tell()
+
+
+# Returns the offsets that split the file into roughly equal chunks which start at the beginning of a record
+def find_chunk_boundaries(path: str, kind: str, chunk_count: int) -> list[int]:
+    with open(path, "rb") as file:
+        file.readline()  # Skip the header
+        data_start = file.tell()
+        size = os.path.getsize(path)
+
+        boundaries = [data_start]
+        for chunk in range(1, chunk_count):
+            offset = next_line_start(file, data_start + (size - data_start) * chunk // chunk_count - 1)
+            if kind == "comments" and offset < size and not is_comment_boundary(file, offset, data_start):
+                # The parser is in the middle of a comment, it is reset after the next line that closes the quotes
+                offset = next_comment_boundary(file, offset)
+            if boundaries[-1] < offset < size:
+                boundaries.append(offset)
+
+        boundaries.append(size)
+    return boundaries
+
+
+# Parses the records between the two offsets of a file and groups them by user
+def load_chunk(path: str, kind: str, start: int, end: int) -> dict:
+    parser, user_key = record_parsers[kind]
+    with open(path, "rb") as file:
+        file.seek(start)
+        data = file.read(end - start)
+
+    # Decode the chunk like open() decodes the whole file
+    with io.TextIOWrapper(io.BytesIO(data)) as lines:
+        return group_by_user(parser(lines), user_key)
+
+
+# Returns the same dictionary as the serial loader of the given kind (comments, reactions or shares), parsing chunks
+# of the file in a pool of worker processes
+def load_parallel(path: str, kind: str, workers: int = None) -> dict:
+    if workers is None:
+        workers = os.cpu_count()
+
+    boundaries = find_chunk_boundaries(path, kind, workers)
+    chunks = list(zip(boundaries[:-1], boundaries[1:]))
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        futures = [executor.submit(load_chunk, path, kind, start, end) for start, end in chunks]
+
+        # Merge the chunks in file order, so that users and their records keep the serial order
+        output_data = {}
+        for future in futures:
+            for user, records in future.result().items():
+                if user not in output_data:
+                    output_data[user] = records
+                else:
+                    output_data[user].extend(records)
+
+    return output_data
+
+
+def load_comments_parallel(path, workers: int = None):
+    return load_parallel(path, "comments", workers)
+
+
+def load_reactions_parallel(path, workers: int = None):
+    return load_parallel(path, "reactions", workers)
+
+
+def load_shares_parallel(path, workers: int = None):
+    return load_parallel(path, "shares", workers)
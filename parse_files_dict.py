@@ -1,12 +1,34 @@
 import datetime
+import sys
+
+from records import Comment, Reaction, Share, Status
+
+date_format = "%Y-%m-%d %H:%M:%S"
+
+
+# Parses a "%Y-%m-%d %H:%M:%S" timestamp
+# Timestamps with the fixed layout are parsed by the much faster fromisoformat, anything else falls back to strptime
+def parse_date(value: str) -> datetime.datetime:
+    if len(value) == 19 and value[4] == '-' and value[7] == '-' and value[10] == ' ' and value[13] == ':' \
+            and value[16] == ':':
+        try:
+            return datetime.datetime.fromisoformat(value)
+        except ValueError:
+            pass
+    return datetime.datetime.strptime(value, date_format)
+
+
+# Reads the file line by line and returns the opened file positioned after the header
+def open_data_file(path):
+    file = open(path)
+    file.readline()
+    return file
 
 
 def load_friends(path):
     output_data = {}
-    with open(path) as file:
-        lines = file.readlines()
-
-        for line in lines[1:]:
+    with open_data_file(path) as file:
+        for line in file:
             values = line.split(',')
             person = values[0]
             friends = values[2:]
@@ -15,254 +37,184 @@ def load_friends(path):
     return output_data
 
 
-# Returns a dictionary where the key is a user_id and the value is a list of the user's comments
-def load_comments(path):
+# Returns a dictionary where the key is a user and the value is a list of the user's records
+def group_by_user(records, user_key: str) -> dict:
     output_data = {}
-    with open(path) as file:
-        lines = file.readlines()
-        comment = ""
-        found_open_ellipsis = False
-        found_close_ellipsis = False
-
-        for index in range(1, len(lines)):
-            line = lines[index]
-
-            if line == "\n":
-                comment += line
-
-            if line[-1] == "\n":
-                line = line[:-1]
-
-            first_index = line.index("\"") if "\"" in line else -1
-            if first_index > -1:
-                found_open_ellipsis = True
-
-            next_index = line.index("\"", first_index + 1) if "\"" in line[first_index + 1:] else -1
-            if next_index > -1:
-                found_close_ellipsis = True
-
-            if found_open_ellipsis and not found_close_ellipsis:
-                comment += line
-                continue
-            else:
-                comment = line
-
-            data = comment.split(",")
-            n = len(data)
-
-            if n < 14:
-                raise Exception("Comment does not contain necessary data.")
-            elif n > 14:
-                comment_text = "".join(data[3:n - 10])
-            else:
-                comment_text = data[3]
-
-            content = {
-                "comment_id": data[0],
-                "status_id": data[1],
-                "parent_id": data[2],
-                "comment_message": comment_text,
-                "comment_author": data[n - 10],
-                "comment_published": datetime.datetime.strptime(data[n - 9], "%Y-%m-%d %H:%M:%S"),
-                "num_reactions": int(data[n - 8]),
-                "num_likes": int(data[n - 7]),
-                "num_loves": int(data[n - 6]),
-                "num_wows": int(data[n - 5]),
-                "num_hahas": int(data[n - 4]),
-                "num_sads": int(data[n - 3]),
-                "num_angrys": int(data[n - 2]),
-                "num_special": int(data[n - 1])
-            }
-
-            if data[n - 10] not in output_data:
-                output_data[data[n - 10]] = []
-            output_data[data[n - 10]].append(content)
-
-            found_open_ellipsis = found_close_ellipsis = False
-            comment = ""
+    for record in records:
+        user = record[user_key]
+        if user not in output_data:
+            output_data[user] = []
+        output_data[user].append(record)
 
     return output_data
 
 
-# Returns a dictionary where the key is a status id and the value is the status data
-def load_statuses(path):
-    extracted_statuses = {}
-    with open(path) as file:
-        lines = file.readlines()
+# Yields a Comment for every comment in the given lines (without the header)
+def parse_comments(lines):
+    comment = ""
+    found_open_ellipsis = False
+    found_close_ellipsis = False
+
+    for line in lines:
+        if line == "\n":
+            comment += line
+
+        if line[-1] == "\n":
+            line = line[:-1]
+
+        first_index = line.index("\"") if "\"" in line else -1
+        if first_index > -1:
+            found_open_ellipsis = True
+
+        next_index = line.index("\"", first_index + 1) if "\"" in line[first_index + 1:] else -1
+        if next_index > -1:
+            found_close_ellipsis = True
+
+        if found_open_ellipsis and not found_close_ellipsis:
+            comment += line
+            continue
+        else:
+            comment = line
+
+        data = comment.split(",")
+        n = len(data)
+
+        if n < 14:
+            raise Exception("Comment does not contain necessary data.")
+        elif n > 14:
+            comment_text = "".join(data[3:n - 10])
+        else:
+            comment_text = data[3]
+
+        # Status ids and user names repeat on many rows, so a single copy of each is kept
+        yield Comment(data[0], sys.intern(data[1]), data[2], comment_text, sys.intern(data[n - 10]),
+                      parse_date(data[n - 9]), int(data[n - 8]), int(data[n - 7]), int(data[n - 6]), int(data[n - 5]),
+                      int(data[n - 4]), int(data[n - 3]), int(data[n - 2]), int(data[n - 1]))
+
+        found_open_ellipsis = found_close_ellipsis = False
         comment = ""
-        paired_ellipses = True
 
-        for index in range(1, len(lines)):
-            line = lines[index]
 
-            if line == "\n":
-                comment += line
-                continue
+# Returns a dictionary where the key is a user_id and the value is a list of the user's comments
+def load_comments(path):
+    with open_data_file(path) as file:
+        return group_by_user(parse_comments(file), "comment_author")
+
+
+# Returns the Status of a complete status row
+def parse_status(comment: str) -> Status:
+    data = comment.split(",")
+    n = len(data)
+
+    if n < 16:
+        raise Exception("Status does not contain necessary data.")
+    elif n > 16:
+        comment_text = "".join(data[1:n - 14])
+    else:
+        comment_text = data[1]
 
-            # if line[-1] == "\n":
-            #     line = line[:-1]
-            line = line.strip()
+    return Status(sys.intern(data[0]), comment_text, sys.intern(data[n - 14]), data[n - 13], parse_date(data[n - 12]),
+                  sys.intern(data[n - 11]), int(data[n - 10]), int(data[n - 9]), int(data[n - 8]), int(data[n - 7]),
+                  int(data[n - 6]), int(data[n - 5]), int(data[n - 4]), int(data[n - 3]), int(data[n - 2]),
+                  int(data[n - 1]))
 
-            previous_index = -1
 
-            while True:
-                index = line.index("\"", previous_index + 1) if "\"" in line[previous_index + 1:] else -1
-                if index == -1:
-                    break
-                paired_ellipses = not paired_ellipses
-                previous_index = index
+# Yields a Status for every status in the given lines (without the header)
+# A status message can span multiple lines, the lines are joined until all of its quotes are paired
+def parse_statuses(lines):
+    comment = ""
+    paired_ellipses = True
 
+    for line in lines:
+        if line == "\n":
             comment += line
-            if not paired_ellipses:
-                continue
-
-            data = comment.split(",")
-            n = len(data)
-
-            if n < 16:
-                raise Exception("Status does not contain necessary data.")
-            elif n > 16:
-                comment_text = "".join(data[1:n - 14])
-            else:
-                comment_text = data[1]
-
-            content = {
-                "status_id": data[0],
-                "status_message": comment_text,
-                "status_type": data[n - 14],
-                "status_link": data[n - 13],
-                "status_published": datetime.datetime.strptime(data[n - 12], "%Y-%m-%d %H:%M:%S"),
-                "author": data[n - 11],
-                "num_reactions": int(data[n - 10]),
-                "num_comments": int(data[n - 9]),
-                "num_shares": int(data[n - 8]),
-                "num_likes": int(data[n - 7]),
-                "num_loves": int(data[n - 6]),
-                "num_wows": int(data[n - 5]),
-                "num_hahas": int(data[n - 4]),
-                "num_sads": int(data[n - 3]),
-                "num_angrys": int(data[n - 2]),
-                "num_special": int(data[n - 1])
-            }
-
-            extracted_statuses[data[0]] = content
-
-            comment = ""
-            paired_ellipses = True
+            continue
 
-    return extracted_statuses
+        line = line.strip()
 
+        previous_index = -1
+
+        while True:
+            index = line.index("\"", previous_index + 1) if "\"" in line[previous_index + 1:] else -1
+            if index == -1:
+                break
+            paired_ellipses = not paired_ellipses
+            previous_index = index
+
+        comment += line
+        if not paired_ellipses:
+            continue
+
+        yield parse_status(comment)
 
-# Returns a dictionary where the key is a user_id and the value is a dictionary of statuses that the user has posted
-def load_statuses_by_users(path):
-    extracted_statuses = {}
-    with open(path) as file:
-        lines = file.readlines()
         comment = ""
         paired_ellipses = True
 
-        for index in range(1, len(lines)):
-            line = lines[index]
 
-            if line == "\n":
-                comment += line
-                continue
+# Yields every status in the file, reading it one line at a time
+def iter_statuses(path):
+    with open_data_file(path) as file:
+        yield from parse_statuses(file)
 
-            # if line[-1] == "\n":
-            #     line = line[:-1]
-            line = line.strip()
 
-            previous_index = -1
+# Inserts a status into the dictionary of statuses by users
+def insert_status_by_user(statuses_by_users: dict, status: dict):
+    if status['author'] not in statuses_by_users:
+        statuses_by_users[status['author']] = {}
 
-            while True:
-                index = line.index("\"", previous_index + 1) if "\"" in line[previous_index + 1:] else -1
-                if index == -1:
-                    break
-                paired_ellipses = not paired_ellipses
-                previous_index = index
+    statuses_by_users[status['author']][status['status_id']] = status
 
-            comment += line
-            if not paired_ellipses:
-                continue
-
-            data = comment.split(",")
-            n = len(data)
-
-            if n < 16:
-                raise Exception("Status does not contain necessary data.")
-            elif n > 16:
-                comment_text = "".join(data[1:n - 14])
-            else:
-                comment_text = data[1]
-
-            content = {
-                "status_id": data[0],
-                "status_message": comment_text,
-                "status_type": data[n - 14],
-                "status_link": data[n - 13],
-                "status_published": datetime.datetime.strptime(data[n - 12], "%Y-%m-%d %H:%M:%S"),
-                "author": data[n - 11],
-                "num_reactions": int(data[n - 10]),
-                "num_comments": int(data[n - 9]),
-                "num_shares": int(data[n - 8]),
-                "num_likes": int(data[n - 7]),
-                "num_loves": int(data[n - 6]),
-                "num_wows": int(data[n - 5]),
-                "num_hahas": int(data[n - 4]),
-                "num_sads": int(data[n - 3]),
-                "num_angrys": int(data[n - 2]),
-                "num_special": int(data[n - 1])
-            }
-
-            if data[n - 11] not in extracted_statuses:
-                extracted_statuses[data[n - 11]] = {}
-
-            extracted_statuses[data[n - 11]][data[0]] = content
-
-            comment = ""
-            paired_ellipses = True
+
+# Returns a dictionary where the key is a status id and the value is the status data
+def load_statuses(path):
+    return {status['status_id']: status for status in iter_statuses(path)}
+
+
+# Returns a dictionary where the key is a user_id and the value is a dictionary of statuses that the user has posted
+def load_statuses_by_users(path):
+    extracted_statuses = {}
+    for status in iter_statuses(path):
+        insert_status_by_user(extracted_statuses, status)
 
     return extracted_statuses
 
 
+# Returns both load_statuses and load_statuses_by_users from a single pass over the file
+# The two dictionaries share the same status dictionaries
+def load_statuses_with_users(path) -> (dict, dict):
+    statuses = {}
+    statuses_by_users = {}
+    for status in iter_statuses(path):
+        statuses[status['status_id']] = status
+        insert_status_by_user(statuses_by_users, status)
+
+    return statuses, statuses_by_users
+
+
+# Yields a Share for every share in the given lines (without the header)
+def parse_shares(lines):
+    for line in lines:
+        line_strip = line.strip().split(",")
+
+        yield Share(sys.intern(line_strip[0]), sys.intern(line_strip[1]), parse_date(line_strip[2]))
+
+
 # Returns a dictionary where the key is a user_id and the value is a list of the user's shares
 def load_shares(path):
-    shares = {}
-    with open(path) as file:
-        lines = file.readlines()
-        for line in lines[1:]:
-            line_strip = line.strip().split(",")
+    with open_data_file(path) as file:
+        return group_by_user(parse_shares(file), "sharer")
 
-            content = {
-                "status_id": line_strip[0],
-                "sharer": line_strip[1],
-                "status_shared": datetime.datetime.strptime(line_strip[2], "%Y-%m-%d %H:%M:%S")
-            }
 
-            if line_strip[1] not in shares:
-                shares[line_strip[1]] = []
-            shares[line_strip[1]].append(content)
+# Yields a Reaction for every reaction in the given lines (without the header)
+def parse_reactions(lines):
+    for line in lines:
+        line_strip = line.strip().split(",")
 
-    return shares
+        yield Reaction(sys.intern(line_strip[0]), sys.intern(line_strip[1]), sys.intern(line_strip[2]),
+                       parse_date(line_strip[3]))
 
 
 # Returns a dictionary where the key is a user_id and the value is a list of the user's reactions
 def load_reactions(path):
-    reactions = {}
-    with open(path) as file:
-        lines = file.readlines()
-        for line in lines[1:]:
-            line_strip = line.strip().split(",")
-
-            content = {
-                "status_id": line_strip[0],
-                "type_of_reaction": line_strip[1],
-                "reactor": line_strip[2],
-                "reacted": datetime.datetime.strptime(line_strip[3], "%Y-%m-%d %H:%M:%S")
-            }
-
-            if line_strip[2] not in reactions:
-                reactions[line_strip[2]] = []
-            reactions[line_strip[2]].append(content)
-
-    return reactions
+    with open_data_file(path) as file:
+        return group_by_user(parse_reactions(file), "reactor")
@@ -0,0 +1,80 @@
+from bisect import bisect_left
+
+# Appended to a prefix to get the upper bound of all strings that start with the prefix
+max_char = chr(0x10FFFF)
+
+
+# Appends the variable-length encoding of a non-negative integer to the buffer (7 bits per byte)
+def encode_varint(value: int, buffer: bytearray):
+    while value > 0x7F:
+        buffer.append((value & 0x7F) | 0x80)
+        value >>= 7
+    buffer.append(value)
+
+
+# Returns the list of document numbers stored in a delta and varint encoded posting list
+def decode_postings(data) -> list[int]:
+    documents = []
+    document = 0
+    value = 0
+    shift = 0
+    for byte in data:
+        value |= (byte & 0x7F) << shift
+        if byte & 0x80:
+            shift += 7
+            continue
+        document += value
+        documents.append(document)
+        value = 0
+        shift = 0
+    return documents
+
+
+# Returns the list of integers stored in a varint encoded buffer
+def decode_varints(data) -> list[int]:
+    values = []
+    value = 0
+    shift = 0
+    for byte in data:
+        value |= (byte & 0x7F) << shift
+        if byte & 0x80:
+            shift += 7
+            continue
+        values.append(value)
+        value = 0
+        shift = 0
+    return values
+
+
+# Returns the posting list of a separately built index, whose document numbers start at offset in the merged index
+# Both posting formats start every document with its delta, so only the first delta changes: it becomes relative to
+# previous, the last document number of the merged posting list
+def rebase_postings(data, offset: int, previous: int) -> bytearray:
+    first = 0
+    shift = 0
+    end = 0
+    for end, byte in enumerate(data):
+        first |= (byte & 0x7F) << shift
+        shift += 7
+        if not byte & 0x80:
+            break
+
+    buffer = bytearray()
+    encode_varint(first + offset - previous, buffer)
+    buffer += data[end + 1:]
+    return buffer
+
+
+# Returns a delta and varint encoded posting list of sorted document numbers
+def encode_postings(documents) -> bytearray:
+    buffer = bytearray()
+    previous = 0
+    for document in documents:
+        encode_varint(document - previous, buffer)
+        previous = document
+    return buffer
+
+
+# Returns the (start, end) indexes of the strings in a sorted sequence that start with the given prefix
+def prefix_range(sorted_strings, prefix: str) -> (int, int):
+    return bisect_left(sorted_strings, prefix), bisect_left(sorted_strings, prefix + max_char)
@@ -0,0 +1,105 @@
+import time
+from collections.abc import Set
+
+
+# The sets of status ids that a search term matches in an index (e.g. one set per matching trie node)
+# Their total size is an upper bound of the number of statuses with the term, which is used to order the terms
+class TermMatch:
+    def __init__(self, term: str, status_id_sets: list, seconds: float = None):
+        self.term = term
+        self.status_id_sets = status_id_sets
+        self.estimate = sum(len(status_ids) for status_ids in status_id_sets)
+        self.seconds = seconds  # The time it took to look up the term, only measured when debugging
+
+    def __contains__(self, status_id) -> bool:
+        return any(status_id in status_ids for status_ids in self.status_id_sets)
+
+    # Returns the statuses of the candidates that contain the term
+    # Few candidates are checked one by one, many are intersected with the union of the sets
+    def filter(self, candidates: set) -> set:
+        if len(self.status_id_sets) == 1:
+            return candidates & self.status_id_sets[0]
+        if len(candidates) * len(self.status_id_sets) < self.estimate:
+            return {status_id for status_id in candidates if status_id in self}
+        return candidates.intersection(*self.status_id_sets[:1]).union(
+            *(candidates.intersection(status_ids) for status_ids in self.status_id_sets[1:]))
+
+    def __iter__(self):
+        if len(self.status_id_sets) == 1:
+            yield from self.status_id_sets[0]
+            return
+        seen = set()
+        for status_ids in self.status_id_sets:
+            for status_id in status_ids:
+                if status_id not in seen:
+                    seen.add(status_id)
+                    yield status_id
+
+
+# The statuses that contain every term, evaluated lazily: iterating walks the rarest term and checks whether the
+# other terms contain each of its statuses, without building the sets of the common terms
+class IntersectionResult(Set):
+    def __init__(self, matches: list[TermMatch]):
+        self.matches = sorted(matches, key=lambda match: match.estimate)
+        self.status_ids = None  # Set by the first call that needs the whole result
+
+    # The results of set operations are plain sets
+    @classmethod
+    def _from_iterable(cls, iterable):
+        return set(iterable)
+
+    def __iter__(self):
+        if self.status_ids is not None:
+            yield from self.status_ids
+            return
+        if not self.matches:
+            return
+
+        # Terms with a single set are checked with the set itself
+        rarest = self.matches[0]
+        others = [match.status_id_sets[0] if len(match.status_id_sets) == 1 else match for match in self.matches[1:]]
+        for status_id in rarest:
+            if all(status_id in match for match in others):
+                yield status_id
+
+    def __contains__(self, status_id) -> bool:
+        if self.status_ids is not None:
+            return status_id in self.status_ids
+        return len(self.matches) > 0 and all(status_id in match for match in self.matches)
+
+    def __len__(self) -> int:
+        if self.status_ids is None:
+            self.status_ids = self.evaluate()
+        return len(self.status_ids)
+
+    # Returns the whole result as a set, the terms are applied from the rarest one until no status is left
+    def evaluate(self) -> set:
+        if not self.matches:
+            return set()
+        status_ids = set().union(*self.matches[0].status_id_sets)
+        for match in self.matches[1:]:
+            if not status_ids:
+                break
+            status_ids = match.filter(status_ids)
+        return status_ids
+
+    # Returns a list of (term, estimated size, lookup seconds) in the order that the terms are evaluated
+    @property
+    def timings(self) -> list[(str, int, float)]:
+        return [(match.term, match.estimate, match.seconds) for match in self.matches]
+
+
+# Returns the statuses that contain all terms
+# Every term is looked up with the index's term_sets(); as soon as a term matches nothing the remaining terms aren't
+# looked up, the result is empty. With debug set, the lookup time of every term is measured
+def plan_intersection(index, terms: list[str], debug: bool = False) -> IntersectionResult:
+    matches = []
+    for term in terms:
+        timer = time.perf_counter() if debug else None
+        status_id_sets = index.term_sets(term)
+        match = TermMatch(term, status_id_sets, time.perf_counter() - timer if debug else None)
+        if match.estimate == 0:
+            return IntersectionResult([match])
+        matches.append(match)
+
+    return IntersectionResult(matches)
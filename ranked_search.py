@@ -0,0 +1,122 @@
+import heapq
+
+from affinity_graph import DecayClock, index_of_today, status_popularity
+from top_k import TopK
+
+
+# Ranks the results of a case-insensitive union search for a user while the postings of the search words are merged,
+# instead of building the word count map and the dictionary of found statuses and scoring every found status
+# The relevance of a status is (affinity + popularity) * date multiplier * word count ** 5 like in get_feed, with the
+# date multiplier taken from the ranker's clock, which is pinned when the ranker is built. Searches use today() to get a
+# ranker with today's clock
+class SearchRanker:
+    def __init__(self, statuses: dict, clock: DecayClock = None):
+        self.build(statuses, clock)
+
+    # Builds the ranker, also after statuses have been inserted or the clock has moved on to another day
+    def build(self, statuses: dict, clock: DecayClock = None):
+        self.clock = DecayClock() if clock is None else clock
+        self.statuses = statuses
+        self.today_index = None  # The ranker of a later day, see today()
+        # A status' ordinal is its position in the status dictionary, which breaks ties between equally relevant
+        # statuses
+        self.ordinals: dict = {}
+        self.popularities: dict = {}
+        self.multipliers: dict = {}
+        self.static_relevances: dict = {}  # The relevance of a status for a user without an edge to its author
+        self.author_status_ids: dict = {}
+        for ordinal, (status_id, status) in enumerate(statuses.items()):
+            popularity = status_popularity(status)
+            multiplier = self.clock.multiplier(status['status_published'])
+            self.ordinals[status_id] = ordinal
+            self.popularities[status_id] = popularity
+            self.multipliers[status_id] = multiplier
+            self.static_relevances[status_id] = popularity * multiplier
+            self.author_status_ids.setdefault(status['author'], []).append(status_id)
+
+        # Maps a status to its position in the order of decreasing static relevance
+        self.static_ranks: dict = {status_id: rank for rank, status_id in enumerate(
+            sorted(statuses, key=lambda status_id: (-self.static_relevances[status_id], self.ordinals[status_id])))}
+
+        self.max_multiplier = max(self.multipliers.values(), default=0)
+        self.max_static_relevance = max(self.static_relevances.values(), default=0)
+
+    # Returns a ranker with today's clock, see index_of_today
+    def today(self):
+        return index_of_today(self, lambda clock: SearchRanker(self.statuses, clock))
+
+    # Returns the status id sets of a search word, of the words within max_distance edits of it if max_distance is set
+    @staticmethod
+    def word_sets(index, word: str, max_distance: int = 0) -> list[set]:
+        return index.fuzzy_term_sets(word, max_distance) if max_distance > 0 else index.term_sets(word)
+
+    # Returns a list of sets, the i-th one holding the found statuses that contain at least i + 1 of the search words
+    # The sets are merged word by word with set operations, without counting the words of every status in Python
+    @staticmethod
+    def word_count_levels(index, phrase: str, max_distance: int = 0) -> list[set]:
+        levels = []
+        for word in phrase.split(' '):
+            word_ids = set().union(*SearchRanker.word_sets(index, word, max_distance))
+            if not word_ids:
+                continue
+            levels.append(set())
+            for level in range(len(levels) - 1, 0, -1):
+                levels[level] |= levels[level - 1] & word_ids
+            levels[0] |= word_ids
+        return levels
+
+    # Returns the found status ids and a list of (relevance, status) pairs of the k most relevant found statuses for
+    # a user with the given out-edge weights, ordered like get_feed with the word count map of the search
+    # The statuses are scored from the largest word count down. A word count is skipped with all smaller ones as soon
+    # as the largest relevance it allows is below the k-th relevance found so far. Within a word count, the statuses
+    # of authors without an edge from the user only differ by their static relevance, so just the k best of them are
+    # scored
+    def search(self, index, phrase: str, user_weights: dict, k: int = 10,
+               max_distance: int = 0) -> (set, list[(float, dict)]):
+        levels = self.word_count_levels(index, phrase, max_distance)
+        found_ids = levels[0] if levels else set()
+        if k <= 0 or not levels:
+            return found_ids, []
+
+        # The statuses of the authors that the user has an edge to, only collected once a word count has many statuses
+        followed_ids = None
+        max_weight = max(user_weights.values(), default=0)
+        # Rounding can make a relevance exceed the bound by a tiny amount
+        max_relevance = (max(max_weight, 0) * self.max_multiplier + self.max_static_relevance) * (1 + 1e-9)
+
+        top = TopK(k)
+        for count in range(len(levels), 0, -1):
+            word_multiplier = pow(count, 5)
+            if top.is_full() and max_relevance * word_multiplier < top.min_relevance():
+                break
+
+            # Statuses that are missing from the status dictionary are not part of a feed
+            count_ids = levels[count - 1] & self.ordinals.keys()
+            if count < len(levels):
+                count_ids -= levels[count]
+
+            # Few statuses are scored one by one
+            if len(count_ids) <= k + len(user_weights):
+                for status_id in count_ids:
+                    self.offer_status(top, user_weights, status_id, word_multiplier)
+                continue
+
+            if followed_ids is None:
+                followed_ids = set()
+                for author, weight in user_weights.items():
+                    if weight != 0:
+                        followed_ids.update(self.author_status_ids.get(author, ()))
+            for status_id in count_ids & followed_ids:
+                self.offer_status(top, user_weights, status_id, word_multiplier)
+
+            if top.is_full() and self.max_static_relevance * (1 + 1e-9) * word_multiplier < top.min_relevance():
+                continue
+            for status_id in heapq.nsmallest(k, count_ids - followed_ids, key=self.static_ranks.__getitem__):
+                top.offer(self.static_relevances[status_id] * word_multiplier, self.ordinals[status_id], status_id)
+
+        return found_ids, [(relevance, self.statuses[status_id]) for relevance, status_id in top.items()]
+
+    def offer_status(self, top: TopK, user_weights: dict, status_id: str, word_multiplier: int):
+        relevance = (user_weights.get(self.statuses[status_id]['author'], 0) + self.popularities[status_id]) * \
+            self.multipliers[status_id]
+        top.offer(relevance * word_multiplier, self.ordinals[status_id], status_id)
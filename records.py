@@ -0,0 +1,120 @@
+# Compact records of the parsed dataset rows
+# A record keeps its fields in __slots__ instead of a per-row dictionary and is read and written like the dictionaries
+# that the parsers used to return (record['author'], record.get('popularity'), record['popularity'] = ...), so the
+# graph, feed and search code works with both
+
+
+class Record:
+    __slots__ = ()
+    fields: tuple = ()
+
+    # Fields are read and written with the C implementation of attribute access, without calling a Python method
+    # Reading a field that is not set raises AttributeError
+    __getitem__ = object.__getattribute__
+    __setitem__ = object.__setattr__
+
+    def get(self, field: str, default=None):
+        return getattr(self, field, default)
+
+    def __contains__(self, field: str) -> bool:
+        return field in self.fields and hasattr(self, field)
+
+    def keys(self) -> list[str]:
+        return [field for field in self.fields if hasattr(self, field)]
+
+    def items(self) -> list[(str, object)]:
+        return [(field, getattr(self, field)) for field in self.keys()]
+
+    def __iter__(self):
+        return iter(self.keys())
+
+    def __len__(self) -> int:
+        return len(self.keys())
+
+    def __eq__(self, other) -> bool:
+        if isinstance(other, Record):
+            return type(self) is type(other) and self.items() == other.items()
+        if isinstance(other, dict):
+            return dict(self.items()) == other
+        return NotImplemented
+
+    __hash__ = None
+
+    def __repr__(self) -> str:
+        return f"{type(self).__name__}({dict(self.items())})"
+
+
+count_fields = ("num_reactions", "num_likes", "num_loves", "num_wows", "num_hahas", "num_sads", "num_angrys",
+                "num_special")
+
+
+class Status(Record):
+    fields = ("status_id", "status_message", "status_type", "status_link", "status_published", "author",
+              "num_reactions", "num_comments", "num_shares", "num_likes", "num_loves", "num_wows", "num_hahas",
+              "num_sads", "num_angrys", "num_special", "popularity")
+    __slots__ = fields
+
+    # The popularity is left unset until insert_status_popularity stores it
+    def __init__(self, status_id, status_message, status_type, status_link, status_published, author, num_reactions,
+                 num_comments, num_shares, num_likes, num_loves, num_wows, num_hahas, num_sads, num_angrys,
+                 num_special):
+        self.status_id = status_id
+        self.status_message = status_message
+        self.status_type = status_type
+        self.status_link = status_link
+        self.status_published = status_published
+        self.author = author
+        self.num_reactions = num_reactions
+        self.num_comments = num_comments
+        self.num_shares = num_shares
+        self.num_likes = num_likes
+        self.num_loves = num_loves
+        self.num_wows = num_wows
+        self.num_hahas = num_hahas
+        self.num_sads = num_sads
+        self.num_angrys = num_angrys
+        self.num_special = num_special
+
+
+class Comment(Record):
+    fields = ("comment_id", "status_id", "parent_id", "comment_message", "comment_author",
+              "comment_published") + count_fields
+    __slots__ = fields
+
+    def __init__(self, comment_id, status_id, parent_id, comment_message, comment_author, comment_published,
+                 num_reactions, num_likes, num_loves, num_wows, num_hahas, num_sads, num_angrys, num_special):
+        self.comment_id = comment_id
+        self.status_id = status_id
+        self.parent_id = parent_id
+        self.comment_message = comment_message
+        self.comment_author = comment_author
+        self.comment_published = comment_published
+        self.num_reactions = num_reactions
+        self.num_likes = num_likes
+        self.num_loves = num_loves
+        self.num_wows = num_wows
+        self.num_hahas = num_hahas
+        self.num_sads = num_sads
+        self.num_angrys = num_angrys
+        self.num_special = num_special
+
+
+class Share(Record):
+    fields = ("status_id", "sharer", "status_shared")
+    __slots__ = fields
+
+    def __init__(self, status_id, sharer, status_shared):
+        self.status_id = status_id
+        self.sharer = sharer
+        self.status_shared = status_shared
+
+
+class Reaction(Record):
+    fields = ("status_id", "type_of_reaction", "reactor", "reacted")
+    __slots__ = fields
+
+    def __init__(self, status_id, type_of_reaction, reactor, reacted):
+        self.status_id = status_id
+        self.type_of_reaction = type_of_reaction
+        self.reactor = reactor
+        self.reacted = reacted
@@ -1,3 +1,11 @@
+import heapq
+from abc import ABC, abstractmethod
+
+from normalization import filter_status_characters, search_letters, split_status, status_words
+from postings import decode_varints, encode_varint, rebase_postings
+from query_planner import IntersectionResult, plan_intersection
+
+
 class Node:
     def __init__(self, letter):
         self.letter = letter
@@ -5,20 +13,40 @@ class Node:
         self.counter = 0  # Indicates how many times the sentence has been inserted (parent -> child -> child)
         self.status_ids: set[str] = set()
         self.is_terminal: bool = False
+        self.word: str = None  # The word that ends in this node, set when the node becomes terminal
+        self.completions: list[Node] = []  # The most frequent terminal nodes under this node (including itself)
+
+
+# Returns the sort key of a completion: the most frequent words first, equally frequent words alphabetically
+def completion_rank(node: Node) -> (int, str):
+    return -node.counter, node.word
+
+
+# Returns the sort key of an autocompleted (word, occurrences) pair, in the same order as completion_rank
+def word_rank(word: (str, int)) -> (int, str):
+    return -word[1], word[0]
 
 
-# Leaves only lowercase letters and spaces inside a string. Replaces all other characters with spaces.
-def filter_status_characters(status: str, to_lower: bool) -> str:
-    filtered_status = ''
-    if to_lower:
-        status = status.lower()
-    for char in status:
-        if (not to_lower and (65 <= ord(char) <= 90)) or (97 <= ord(char) <= 122) or char == ' ' or char.isnumeric():
-            filtered_status += char
+# Updates the bounded list of the node's best completions after the candidate's counter has increased
+def update_completions(node: Node, candidate: Node, limit: int):
+    completions = node.completions
+    try:
+        i = completions.index(candidate)
+    except ValueError:
+        if len(completions) < limit:
+            completions.append(candidate)
+        elif limit > 0 and completion_rank(candidate) < completion_rank(completions[-1]):
+            completions[-1] = candidate
         else:
-            filtered_status += ' '
+            return
+        i = len(completions) - 1
 
-    return filtered_status
+    # The candidate can only move up, since counters never decrease
+    rank = completion_rank(candidate)
+    while i > 0 and rank < completion_rank(completions[i - 1]):
+        completions[i] = completions[i - 1]
+        i -= 1
+    completions[i] = candidate
 
 
 # A pattern searching function that uses Bad Character Heuristic of Boyer Moore Algorithm
@@ -48,20 +76,201 @@ def has_phrase(text: str, pattern: str) -> bool:
     return False
 
 
-class Trie(object):
+# Records the position of every word in every status, so that phrases are found by checking whether the
+# positions of consecutive phrase words are adjacent instead of scanning the status messages
+# Words are stored case-sensitive, the lowercase form of a word maps to all of its case variants
+class PositionalIndex(object):
     def __init__(self):
+        self.status_ids: list[str] = []  # Maps a document number to its status id
+        self.documents: dict = {}  # Maps a status id to its document number
+        # Maps a word to its encoded postings: (document delta, number of positions, position deltas...) per document
+        self.postings: dict = {}
+        self.last_documents: dict = {}
+        self.variants: dict = {}  # Maps a lowercase word to the set of its case-sensitive variants
+
+    def insert(self, status: str, status_id: str):
+        if status_id in self.documents:
+            return  # The positions of a status are only recorded the first time it is inserted
+        document = len(self.status_ids)
+        self.status_ids.append(status_id)
+        self.documents[status_id] = document
+
+        word_positions = {}
+        for position, word in enumerate(status_words(status, False)):
+            word_positions.setdefault(word, []).append(position)
+
+        for word, positions in word_positions.items():
+            buffer = self.postings.get(word)
+            if buffer is None:
+                buffer = self.postings[word] = bytearray()
+                self.variants.setdefault(word.lower(), set()).add(word)
+            encode_varint(document - self.last_documents.get(word, 0), buffer)
+            self.last_documents[word] = document
+            encode_varint(len(positions), buffer)
+            previous = 0
+            for position in positions:
+                encode_varint(position - previous, buffer)
+                previous = position
+
+    # Appends the statuses of a separately built index, e.g. a shard of a parallel build, as if they were inserted
+    # after the statuses of this index. The other index is consumed
+    def merge(self, other):
+        if not self.documents.keys().isdisjoint(other.documents):
+            raise ValueError("Only indexes of different statuses can be merged")
+        offset = len(self.status_ids)
+        self.status_ids.extend(other.status_ids)
+        for status_id, document in other.documents.items():
+            self.documents[status_id] = document + offset
+
+        for word, buffer in other.postings.items():
+            if word in self.postings:
+                self.postings[word] += rebase_postings(buffer, offset, self.last_documents.get(word, 0))
+            else:
+                self.postings[word] = rebase_postings(buffer, offset, 0)
+            self.last_documents[word] = other.last_documents[word] + offset
+        for lowercase_word, words in other.variants.items():
+            self.variants.setdefault(lowercase_word, set()).update(words)
+
+    # Returns a dictionary which maps a document number to the positions of the word in it
+    # If documents are given, only the positions in those documents are returned
+    def positions(self, word: str, case_sensitive: bool = True, documents=None) -> dict:
+        words = [word] if case_sensitive else self.variants.get(word.lower(), ())
+        document_positions = {}
+        for variant in words:
+            buffer = self.postings.get(variant)
+            if buffer is None:
+                continue
+            values = decode_varints(buffer)
+            document = 0
+            i = 0
+            while i < len(values):
+                document += values[i]
+                count = values[i + 1]
+                if documents is None or document in documents:
+                    position = 0
+                    positions = document_positions.setdefault(document, set())
+                    for delta in values[i + 2:i + 2 + count]:
+                        position += delta
+                        positions.add(position)
+                i += 2 + count
+        return document_positions
+
+    # Returns the number of bytes of the word's encoded postings, which grows with the number of statuses and
+    # positions of the word. It is only an estimate of how rare the word is, used to order the phrase words
+    def posting_size(self, word: str, case_sensitive: bool = True) -> int:
+        words = [word] if case_sensitive else self.variants.get(word.lower(), ())
+        return sum(len(self.postings.get(variant, b'')) for variant in words)
+
+    # Returns the status ids that contain the words of the phrase next to each other, in the order of the phrase
+    def search(self, phrase: str, case_sensitive: bool = True) -> list[str]:
+        words = status_words(phrase, not case_sensitive)
+        if not words:
+            return []
+
+        # Decode the positions starting from the rarest word (estimated by the posting size), only keeping the
+        # documents that contain all of the previous words
+        word_positions = [None] * len(words)
+        documents = None
+        for i in sorted(range(len(words)), key=lambda j: self.posting_size(words[j], case_sensitive)):
+            word_positions[i] = self.positions(words[i], case_sensitive, documents)
+            documents = word_positions[i].keys()
+            if not documents:
+                return []
+
+        status_ids = []
+        for document in sorted(documents):
+            all_positions = [positions[document] for positions in word_positions]
+            # The phrase starts at position p if word i is found at p + i for every word
+            if any(all(start + i in all_positions[i] for i in range(1, len(words)))
+                   for start in all_positions[0]):
+                status_ids.append(self.status_ids[document])
+
+        return status_ids
+
+
+# Searches that are built on top of query(), shared by the trie and the inverted index
+class SearchIndex(ABC):
+    # True if the index finds the words within an edit distance of a search term (fuzzy_term_sets)
+    supports_fuzzy: bool = False
+
+    # Returns a set of status ids that hold the given search term
+    @abstractmethod
+    def query(self, search_term: str) -> set[str]:
+        pass
+
+    # Returns a list of status id sets whose union is query(search_term), used by the query planner
+    def term_sets(self, search_term: str) -> list[set[str]]:
+        return [self.query(search_term)]
+
+    # Returns a list of status id sets of the words within max_distance edits of the search term
+    # Only indexes whose supports_fuzzy is set implement it
+    def fuzzy_term_sets(self, search_term: str, max_distance: int) -> list[set[str]]:
+        raise TypeError(f"{type(self).__name__} does not support fuzzy searches")
+
+    # Returns status ids that contain all words in the given phrase (case-sensitive!)
+    def search_phrase(self, phrase, statuses):
+        phrase = phrase[1:-1]  # Remove " from the beginning and end of the phrase
+        # Indexes that record word positions answer the phrase from the postings alone
+        phrase_index = getattr(self, 'phrase_index', None)
+        if phrase_index is not None:
+            return phrase_index.search(phrase)
+
+        # Indexes without word positions (e.g. loaded from an older file) scan the messages of the candidates
+        phrase = filter_status_characters(phrase, False)  # Filter the characters, but leave uppercase characters
+        status_ids = self.search_intersection_case_insensitive(phrase)  # Do a case-insensitive search of the phrase
+
+        filtered_ids = []
+        for status_id in status_ids:
+            if has_phrase(statuses[status_id]['status_message'], phrase + ' '):
+                filtered_ids.append(status_id)
+
+        return filtered_ids
+
+    # Performs a case-insensitive intersection search for the given phrase
+    # The words are intersected from the rarest one and the result is evaluated lazily (see plan_intersection),
+    # with debug set the result's timings hold the lookup time of every word
+    def search_intersection_case_insensitive(self, phrase, debug: bool = False) -> IntersectionResult:
+        return plan_intersection(self, phrase.split(' '), debug)
+
+    # Returns a dictionary which maps a status id to the number of words in the phrase that are in the status
+    # With a max_distance above 0, a word matches the words within that many edits of it (see fuzzy_term_sets)
+    def search_union_case_insensitive(self, phrase, max_distance: int = 0) -> dict:
+        phrase_words = phrase.split(' ')
+        status_ids: dict = {}
+        for word in phrase_words:
+            if max_distance > 0:
+                word_status_ids = set().union(*self.fuzzy_term_sets(word, max_distance))
+            else:
+                word_status_ids = list(self.query(word))
+            for status_id in word_status_ids:
+                if status_id in status_ids:
+                    status_ids[status_id] = status_ids[status_id] + 1
+                else:
+                    status_ids.update({status_id: 1})
+
+        return status_ids
+
+
+class Trie(SearchIndex):
+    supports_fuzzy = True
+
+    def __init__(self, completion_limit: int = 10):
         """
         The root node does not store a letter
+        Every node keeps its completion_limit most frequent completions for autocompletion
         """
         self.root = Node('')
+        self.phrase_index = PositionalIndex()
+        self.completion_limit = completion_limit
 
     def insert(self, status, status_id):
         """Inserts a status into the trie"""
+        self.phrase_index.insert(status, status_id)
         # Loop through each word in the sentence
-        status = filter_status_characters(status, True)
-        words = status.split(' ')
+        words = split_status(status, True)
         for word in words:
             node = self.root
+            path = [node]
             for i in range(0, len(word)):
                 # If the letter is found, break out of the word loop
                 if word[i] in node.children.keys():
@@ -74,8 +283,58 @@ class Trie(object):
 
                 node.status_ids.add(status_id)
                 node.counter += 1  # Increase the times the node has been stored in the trie
+                path.append(node)
 
             node.is_terminal = True  # Mark the last node in the word as terminal (used for autocompletion)
+            node.word = word
+
+            # The counters of the terminal nodes along the word have increased, so they are the only words that can
+            # enter the completions of the nodes above them
+            terminal_nodes = []
+            for path_node in reversed(path):
+                if path_node.is_terminal:
+                    terminal_nodes.append(path_node)
+                completions = path_node.completions
+                is_full = len(completions) >= self.completion_limit
+                for terminal_node in terminal_nodes:
+                    # Skip the words that stay in place: the best completion stays the best one when its counter
+                    # increases, and a word less frequent than the last completion of a full list can't enter it
+                    if completions and (completions[0] is terminal_node or (
+                            is_full and terminal_node.counter < completions[-1].counter)):
+                        continue
+                    update_completions(path_node, terminal_node, self.completion_limit)
+
+    # Adds the words of a separately built trie, e.g. a shard of a parallel build, as if its statuses were inserted
+    # after the statuses of this trie. The other trie is consumed: the nodes that only it has are moved over
+    # Counters add up and status ids are united, children that are new to a node are appended in the other trie's
+    # order, so merging shards of consecutive statuses in order gives the same trie as inserting them one by one
+    def merge(self, other):
+        self.phrase_index.merge(other.phrase_index)
+
+        merged_nodes = []
+        stack = [(self.root, other.root)]
+        while stack:
+            node, other_node = stack.pop()
+            merged_nodes.append(node)
+            node.counter += other_node.counter
+            node.status_ids |= other_node.status_ids
+            if other_node.is_terminal:
+                node.is_terminal = True
+                node.word = other_node.word
+            for char, other_child in other_node.children.items():
+                child = node.children.get(char)
+                if child is None:
+                    node.children[char] = other_child
+                else:
+                    stack.append((child, other_child))
+
+        # The completions of the merged nodes are chosen again from their own word and the completions of their
+        # children, children before parents. The completions of moved nodes stay valid
+        for node in reversed(merged_nodes):
+            candidates = [node] if node.is_terminal else []
+            for child in node.children.values():
+                candidates.extend(child.completions)
+            node.completions = heapq.nsmallest(self.completion_limit, candidates, key=completion_rank)
 
     def dfs(self, letters: str, letter_counter: int, node: Node) -> set[str]:
         # Base case: if all letters have been found, return the ids of the node
@@ -95,7 +354,7 @@ class Trie(object):
     # Returns a set of status ids that hold the given search term
     def query(self, search_term: str) -> set[str]:
         # join(filter MAG#$! A) == join(MAG    A) == MAGA
-        letters = ''.join(filter_status_characters(search_term, True).split(" "))
+        letters = search_letters(search_term)
         if len(letters) == 0:
             return set()
 
@@ -113,63 +372,111 @@ class Trie(object):
                 ids.update(node_ids)
         return ids
 
-    # Returns a list of autocompleted search terms
-    def autocomplete(self, prefix):
-        prefix = filter_status_characters(prefix, True).replace(' ', '')
-        node = self.root
-        for char in prefix:
-            if char not in node.children:
-                return []
-            node = node.children[char]
+    # Returns the status id sets of the nodes that query() collects, without copying them into one set
+    def term_sets(self, search_term: str) -> list[set[str]]:
+        letters = search_letters(search_term)
+        if len(letters) == 0:
+            return []
 
-        # Sort the words-occurrence pair list by the occurrence descending
-        words = self.get_words_from_prefix(node, prefix)
-        words.sort(key=lambda w: w[1], reverse=True)
-        return words
+        status_id_sets = []
+        for letter, node in self.root.children.items():
+            # Like query(), a word can also contain the letters after a different first letter
+            node = self.find_prefix_node(letters[1:] if letters[0] == letter else letters, node)
+            if node is not None and node.status_ids:
+                status_id_sets.append(node.status_ids)
+        return status_id_sets
 
-    # Returns a list of pairs (word, occurrences in trie) that contain the given prefix
-    def get_words_from_prefix(self, node, prefix) -> list[(str, int)]:
-        words = []
-        # If the node marks the end of a word, add a space to the prefix and add it the word list
-        if node.is_terminal:
-            words.append((prefix, node.counter))
-        # For each child, add the child's character to the prefix and iterate deeper
-        for char, child in node.children.items():
-            words.extend(self.get_words_from_prefix(child, prefix + char))
+    # Returns a list of (word, terminal node, edit distance) of the words within max_distance edits of the search term
+    # The trie is walked with a Levenshtein automaton: every node extends the previous row of edit distances by its
+    # letter, and a branch is pruned as soon as no distance in its row is within max_distance, so only the words that
+    # share a close enough prefix with the term are visited
+    def fuzzy_nodes(self, search_term: str, max_distance: int) -> list[(str, Node, int)]:
+        letters = search_letters(search_term)
+        if len(letters) == 0:
+            return []
+
+        matches = []
+        stack = [(self.root, '', list(range(len(letters) + 1)))]
+        while stack:
+            node, prefix, previous_row = stack.pop()
+            for char, child in node.children.items():
+                row = [previous_row[0] + 1]
+                for i, letter in enumerate(letters):
+                    row.append(min(row[i] + 1, previous_row[i + 1] + 1, previous_row[i] + (letter != char)))
+
+                if child.is_terminal and row[-1] <= max_distance:
+                    matches.append((prefix + char, child, row[-1]))
+                if min(row) <= max_distance:
+                    stack.append((child, prefix + char, row))
+        return matches
+
+    # Returns a list of (word, edit distance, occurrences) of the words within max_distance edits of the search term,
+    # the closest and most frequent words first
+    def fuzzy_words(self, search_term: str, max_distance: int) -> list[(str, int, int)]:
+        words = [(word, distance, node.counter) for word, node, distance in self.fuzzy_nodes(search_term, max_distance)]
+        words.sort(key=lambda word: (word[1], -word[2], word[0]))
         return words
 
-    # Returns status ids that contain all words in the given phrase (case-sensitive!)
-    def search_phrase(self, phrase, statuses):
-        phrase = phrase[1:-1]  # Remove " from the beginning and end of the phrase
-        phrase = filter_status_characters(phrase, False)  # Filter the characters, but leave uppercase characters
-        status_ids = self.search_intersection_case_insensitive(phrase)  # Do a case-insensitive search of the phrase
+    # Returns the status id sets of the words within max_distance edits of the search term
+    # Like query(), a set also holds the statuses with longer words that start with the matched word
+    def fuzzy_term_sets(self, search_term: str, max_distance: int) -> list[set[str]]:
+        return [node.status_ids for word, node, distance in self.fuzzy_nodes(search_term, max_distance)
+                if node.status_ids]
 
-        filtered_ids = []
-        for status_id in status_ids:
-            if has_phrase(statuses[status_id]['status_message'], phrase + ' '):
-                filtered_ids.append(status_id)
+    # Returns the node of the given prefix, None if no word starts with it
+    # The prefix is looked up from the given node instead of the root if one is given
+    def find_prefix_node(self, prefix: str, node: Node = None):
+        if node is None:
+            node = self.root
+        for char in prefix:
+            if char not in node.children:
+                return None
+            node = node.children[char]
+        return node
 
-        return filtered_ids
+    # Returns a list of the limit most frequent autocompleted search terms
+    # The completions stored in the prefix node are used, so only the prefix is walked
+    def autocomplete(self, prefix, limit: int = 10):
+        prefix = search_letters(prefix)
+        node = self.find_prefix_node(prefix)
+        if node is None:
+            return []
 
-    # Performs a case-insensitive intersection search for the given phrase
-    def search_intersection_case_insensitive(self, phrase):
-        phrase_words = phrase.split(' ')
-        status_ids = self.query(phrase_words[0])
-        for i in range(1, len(phrase_words)):
-            status_ids = status_ids.intersection(self.query(phrase_words[i]))
+        # Tries loaded from older files don't store completions
+        completions = getattr(node, 'completions', None)
+        if completions is None or limit > getattr(self, 'completion_limit', 0):
+            words = list(self.iter_words_from_prefix(node, prefix))
+            words.sort(key=word_rank)
+            return words[:limit]
 
-        return status_ids
+        return [(completion.word, completion.counter) for completion in completions[:limit]]
 
-    # Returns a dictionary which maps a status id to the number of words in the phrase that are in the status
-    def search_union_case_insensitive(self, phrase) -> dict:
-        phrase_words = phrase.split(' ')
-        status_ids: dict = {}
-        for word in phrase_words:
-            word_status_ids = list(self.query(word))
-            for status_id in word_status_ids:
-                if status_id in status_ids:
-                    status_ids[status_id] = status_ids[status_id] + 1
-                else:
-                    status_ids.update({status_id: 1})
+    # Returns a page of all autocompleted search terms, sorted by the occurrence descending and equally frequent words
+    # alphabetically, so the first page is the same as autocomplete()
+    # The words are enumerated iteratively, so the page size only limits the returned list
+    def autocomplete_all(self, prefix, offset: int = 0, count: int = None):
+        prefix = search_letters(prefix)
+        node = self.find_prefix_node(prefix)
+        if node is None:
+            return []
 
-        return status_ids
+        words = self.get_words_from_prefix(node, prefix)
+        words.sort(key=word_rank)
+        return words[offset:] if count is None else words[offset:offset + count]
+
+    # Returns a list of pairs (word, occurrences in trie) that contain the given prefix
+    def get_words_from_prefix(self, node, prefix) -> list[(str, int)]:
+        return list(self.iter_words_from_prefix(node, prefix))
+
+    # Yields pairs (word, occurrences in trie) that contain the given prefix, in depth-first order
+    # Uses a stack instead of recursion, so long words don't reach the recursion limit
+    def iter_words_from_prefix(self, node, prefix):
+        stack = [(node, prefix)]
+        while stack:
+            node, prefix = stack.pop()
+            # If the node marks the end of a word, add it the word list
+            if node.is_terminal:
+                yield prefix, node.counter
+            # Push the children in reverse, so they are visited in insertion order
+            for char, child in reversed(node.children.items()):
+                stack.append((child, prefix + char))
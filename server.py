@@ -0,0 +1,251 @@
+import argparse
+import asyncio
+import json
+import os
+import sys
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import parse_qs, urlsplit
+
+from candidates import CandidateIndex
+from event_stream import EventIngestor, start_event_server
+from feed_cache import FeedCache
+from live_graph import save_live_graph
+from main import FeedStatus, get_cached_feed, get_candidate_feed, get_feed, load_data, search_feed
+from ranked_search import SearchRanker
+
+status_reasons = {200: "OK", 400: "Bad Request", 404: "Not Found", 405: "Method Not Allowed",
+                  413: "Payload Too Large", 500: "Internal Server Error"}
+# The largest request body that is read (and skipped), larger requests are refused
+max_body_size = 1 << 20
+
+
+# An error that is returned to the client with the given HTTP status
+class RequestError(Exception):
+    def __init__(self, status: int, message: str):
+        super().__init__(message)
+        self.status = status
+
+
+# Returns the JSON form of a feed, with the message, link, publish date and author of every status
+def feed_json(feed: list[FeedStatus], statuses: dict) -> list[dict]:
+    feed_statuses = []
+    for feed_status in feed:
+        status = statuses[feed_status.status_id]
+        feed_statuses.append({"status_id": feed_status.status_id, "author": feed_status.author,
+                              "relevance": feed_status.relevance, "message": status['status_message'],
+                              "link": status['status_link'], "published": str(status['status_published'])})
+    return feed_statuses
+
+
+# Answers the requests of the HTTP endpoints from data that is loaded once
+# The handlers only read the graph, search index and statuses, so they run concurrently in an executor. In live mode
+# the event stream updates the live graph while they read it: the graph locks its edges, and the feed cache drops the
+# feeds that were ranked while the edges of their user changed
+class FeedService:
+    def __init__(self, graph, search_index, statuses: dict, feed_cache: FeedCache = None,
+                 search_ranker: SearchRanker = None, candidate_index: CandidateIndex = None):
+        self.graph = graph
+        self.search_index = search_index
+        self.statuses = statuses
+        self.feed_cache = feed_cache
+        self.search_ranker = search_ranker
+        self.candidate_index = candidate_index
+        self.routes = {"/feed": self.feed, "/search": self.search, "/phrase": self.phrase,
+                       "/autocomplete": self.autocomplete}
+
+    # GET /feed?user=<user>&k=<k>
+    def feed(self, parameters: dict) -> dict:
+        user = required_parameter(parameters, "user")
+        k = integer_parameter(parameters, "k", 10)
+        if self.feed_cache is not None:
+            feed = get_cached_feed(self.feed_cache, self.graph, user, self.statuses, {}, k,
+                                   candidate_index=self.candidate_index)
+        elif self.candidate_index is not None:
+            feed = get_candidate_feed(self.candidate_index.today(), self.graph, user, k)
+        else:
+            feed = get_feed(self.graph, user, self.statuses, {}, k)
+        return {"user": user, "feed": feed_json(feed, self.statuses)}
+
+    # GET /search?q=<words>&user=<user>&distance=<0-2>, a case-insensitive union search
+    # With a distance, the words also match the words within that many edits of them
+    def search(self, parameters: dict) -> dict:
+        query = required_parameter(parameters, "q").strip('"')
+        max_distance = integer_parameter(parameters, "distance", 0)
+        if not 0 <= max_distance <= 2:
+            raise RequestError(400, "Parameter distance has to be between 0 and 2")
+        if max_distance > 0 and not self.search_index.supports_fuzzy:
+            raise RequestError(400, "The search index does not support fuzzy searches")
+        return self.search_response(parameters, query, max_distance)
+
+    # GET /phrase?q=<phrase>&user=<user>, a case-sensitive phrase search
+    def phrase(self, parameters: dict) -> dict:
+        query = '"' + required_parameter(parameters, "q").strip('"') + '"'
+        return self.search_response(parameters, query)
+
+    def search_response(self, parameters: dict, query: str, max_distance: int = 0) -> dict:
+        if query.strip('"') == '':
+            raise RequestError(400, "Empty query")
+        user = parameters.get("user", "")
+        result_count, feed = search_feed(self.graph, self.search_index, user, self.statuses, query, self.feed_cache,
+                                         self.search_ranker, max_distance)
+        return {"query": query, "results": result_count, "feed": feed_json(feed, self.statuses)}
+
+    # GET /autocomplete?prefix=<prefix>&limit=<limit>
+    def autocomplete(self, parameters: dict) -> dict:
+        prefix = required_parameter(parameters, "prefix")
+        limit = integer_parameter(parameters, "limit", 10)
+        words = self.search_index.autocomplete(prefix, limit)
+        return {"prefix": prefix, "words": [{"word": word, "count": count} for word, count in words]}
+
+
+def required_parameter(parameters: dict, name: str) -> str:
+    value = parameters.get(name)
+    if not value:
+        raise RequestError(400, f"Missing parameter {name}")
+    return value
+
+
+# Returns the length of the request body from the Content-Length header
+def content_length(headers: dict) -> int:
+    try:
+        length = int(headers.get("content-length", 0))
+    except ValueError:
+        length = -1
+    if length < 0:
+        raise RequestError(400, "Malformed Content-Length header")
+    if length > max_body_size:
+        raise RequestError(413, f"Request bodies are limited to {max_body_size} bytes")
+    return length
+
+
+def integer_parameter(parameters: dict, name: str, default: int) -> int:
+    value = parameters.get(name)
+    if value is None:
+        return default
+    try:
+        return int(value)
+    except ValueError:
+        raise RequestError(400, f"Parameter {name} has to be an integer")
+
+
+# Returns the HTTP response with a JSON body
+def http_response(status: int, body, keep_alive: bool) -> bytes:
+    data = json.dumps(body).encode()
+    headers = (f"HTTP/1.1 {status} {status_reasons[status]}\r\n"
+               f"Content-Type: application/json\r\n"
+               f"Content-Length: {len(data)}\r\n"
+               f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n")
+    return headers.encode() + data
+
+
+# Reads the requests of one connection until the client closes it, requests are answered in order
+async def handle_connection(service: FeedService, executor, reader: asyncio.StreamReader,
+                            writer: asyncio.StreamWriter):
+    loop = asyncio.get_running_loop()
+    try:
+        while True:
+            request_line = await reader.readline()
+            if not request_line:
+                break
+
+            headers = {}
+            while True:
+                line = await reader.readline()
+                if line in (b"\r\n", b"\n", b""):
+                    break
+                name, _, value = line.decode("latin-1").partition(":")
+                headers[name.strip().lower()] = value.strip()
+
+            try:
+                method, target, version = request_line.decode("latin-1").split()
+            except ValueError:
+                writer.write(http_response(400, {"error": "Malformed request line"}, False))
+                break
+            keep_alive = headers.get("connection", "").lower() != "close" and version == "HTTP/1.1"
+
+            url = urlsplit(target)
+            handler = service.routes.get(url.path)
+            body_length = None
+            try:
+                # Request bodies are not used, but have to be read to get to the next request
+                body_length = content_length(headers)
+                if body_length:
+                    await reader.readexactly(body_length)
+                if method != "GET":
+                    raise RequestError(405, f"Method {method} is not allowed")
+                if handler is None:
+                    raise RequestError(404, f"Unknown path {url.path}")
+                parameters = {name: values[-1] for name, values in parse_qs(url.query).items()}
+                # The ranking and searching are CPU-bound, the event loop only parses and writes requests
+                body = await loop.run_in_executor(executor, handler, parameters)
+                status = 200
+            except RequestError as error:
+                status, body = error.status, {"error": str(error)}
+            except asyncio.IncompleteReadError:
+                raise  # The client closed the connection in the middle of the body
+            except Exception as error:
+                status, body = 500, {"error": f"{type(error).__name__}: {error}"}
+
+            # The connection is closed after a body that could not be skipped
+            keep_alive = keep_alive and body_length is not None
+            writer.write(http_response(status, body, keep_alive))
+            await writer.drain()
+            if not keep_alive:
+                break
+    except (ConnectionError, asyncio.IncompleteReadError):
+        pass
+    finally:
+        writer.close()
+
+
+# Starts serving the service on the host and port, the handlers run in a pool of the given number of threads
+async def start_server(service: FeedService, host: str = "127.0.0.1", port: int = 8080,
+                       workers: int = None) -> asyncio.base_events.Server:
+    executor = ThreadPoolExecutor(max_workers=workers)
+    return await asyncio.start_server(lambda reader, writer: handle_connection(service, executor, reader, writer),
+                                      host, port)
+
+
+# With an event ingestor, events are received on the events port in the same event loop
+async def serve(service: FeedService, host: str, port: int, workers: int = None, ingestor: EventIngestor = None,
+                events_port: int = 8081):
+    server = await start_server(service, host, port, workers)
+    print(f"Serving on http://{host}:{port}")
+    if ingestor is not None:
+        await start_event_server(ingestor, host, events_port)
+        print(f"Receiving events on {host}:{events_port}")
+    async with server:
+        await server.serve_forever()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serves feeds, searches and autocompletion over HTTP")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8080)
+    parser.add_argument("--workers", type=int, default=os.cpu_count())
+    parser.add_argument("--snapshot", action="store_true", help="Map the graph and index from snapshot.bin")
+    parser.add_argument("--events-port", type=int,
+                        help="Serve the live graph and update it with the events received on this port")
+    args = parser.parse_args()
+
+    sys.setrecursionlimit(30000)
+    live = args.events_port is not None
+    graph, sentence_trie, statuses, statuses_by_users = load_data(compact=True, snapshot=args.snapshot, live=live)
+    # The candidates only depend on the statuses, so the streamed events do not change them
+    service = FeedService(graph, sentence_trie, statuses, FeedCache(), SearchRanker(statuses),
+                          CandidateIndex(statuses, statuses_by_users))
+    ingestor = None
+    if live:
+        ingestor = EventIngestor(graph, statuses, service.feed_cache)
+        print(f"Replayed {ingestor.open_log()} events from the event log")
+    try:
+        asyncio.run(serve(service, args.host, args.port, args.workers, ingestor, args.events_port))
+    finally:
+        if live:
+            # The next start only replays the events that are logged after this save
+            ingestor.close_log()
+            save_live_graph(graph)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,407 @@
+import mmap
+import os
+import pickle
+import struct
+import sys
+from array import array
+from bisect import bisect_left, bisect_right
+
+from csr_graph import CSRGraph
+from live_graph import LiveAffinityGraph
+from inverted_index import InvertedIndex
+from postings import decode_postings, encode_postings, prefix_range
+from normalization import search_letters
+from search_trie import PositionalIndex, Trie
+
+# A snapshot file starts with the magic, the format version, the number of sections and the byte order of the arrays,
+# followed by a table with the name, offset and length of every section. The header is little-endian, every section is
+# a flat array in the byte order of the host that wrote it, which starts at a multiple of 8
+# The arrays are mapped without copying them, so a snapshot can only be opened on a host with the same byte order
+snapshot_magic = b"FBSNAP\0\0"
+snapshot_version = 4
+header_format = struct.Struct("<8sII8s")
+section_format = struct.Struct("<32sQQ")
+
+
+# A read-only sequence of the strings stored in a data section, string i is data[offsets[i]:offsets[i + 1]]
+class MappedStrings:
+    def __init__(self, data: memoryview, offsets: memoryview):
+        self.data = data
+        self.offsets = offsets
+
+    def __len__(self) -> int:
+        return len(self.offsets) - 1
+
+    def __getitem__(self, i):
+        if isinstance(i, slice):
+            return [self[j] for j in range(*i.indices(len(self)))]
+        if i < 0:
+            i += len(self)
+        return str(self.data[self.offsets[i]:self.offsets[i + 1]], 'utf-8')
+
+
+# A read-only sequence of the byte strings stored in a data section, returned as views of the mapped file
+class MappedBlobs(MappedStrings):
+    def __getitem__(self, i):
+        if i < 0:
+            i += len(self)
+        return self.data[self.offsets[i]:self.offsets[i + 1]]
+
+
+# Maps the keys of a sorted sequence to the values at the same indexes, keys are found with a binary search
+class MappedTable:
+    def __init__(self, keys, values):
+        self.keys = keys
+        self.values = values
+
+    def index(self, key) -> int:
+        i = bisect_left(self.keys, key)
+        if i < len(self.keys) and self.keys[i] == key:
+            return i
+        return -1
+
+    def get(self, key, default=None):
+        i = self.index(key)
+        return self.values[i] if i >= 0 else default
+
+    def __getitem__(self, key):
+        i = self.index(key)
+        if i < 0:
+            raise KeyError(key)
+        return self.values[i]
+
+    def __contains__(self, key) -> bool:
+        return self.index(key) >= 0
+
+    def __len__(self) -> int:
+        return len(self.keys)
+
+
+# The words of 2+ letters without their first letter, followed by a separator and the first letter (see InvertedIndex)
+class MappedShiftedWords:
+    def __init__(self, words: MappedStrings, order: memoryview):
+        self.words = words
+        self.order = order
+
+    def __len__(self) -> int:
+        return len(self.order)
+
+    def __getitem__(self, i):
+        if isinstance(i, slice):
+            return [self[j] for j in range(*i.indices(len(self)))]
+        word = self.words[self.order[i]]
+        return word[1:] + '\0' + word[0]
+
+
+# Maps a lowercase word to the list of its case-sensitive variants
+class MappedVariants:
+    def __init__(self, words: MappedStrings, order: memoryview):
+        self.words = words
+        self.order = order
+        self.keys = MappedLowercaseWords(words, order)
+
+    def get(self, lowercase_word: str, default=None):
+        start = bisect_left(self.keys, lowercase_word)
+        end = bisect_right(self.keys, lowercase_word, start)
+        if start == end:
+            return default
+        return [self.words[self.order[i]] for i in range(start, end)]
+
+
+# The lowercase forms of the words, in the order of the variants section
+class MappedLowercaseWords(MappedShiftedWords):
+    def __getitem__(self, i):
+        return self.words[self.order[i]].lower()
+
+
+# A CSR graph whose arrays are views of a snapshot, users are sorted so that they are found with a binary search
+class MappedCSRGraph(CSRGraph):
+    def __init__(self, users: MappedStrings, offsets: memoryview, neighbors: memoryview, weights: memoryview):
+        self.users = users
+        self.user_indexes = MappedTable(users, range(len(users)))
+        self.offsets = offsets
+        self.neighbors = neighbors
+        self.weights = weights
+
+
+# A positional index whose postings are views of a snapshot
+class MappedPositionalIndex(PositionalIndex):
+    def __init__(self, status_ids: MappedStrings, words: MappedStrings, postings: MappedBlobs,
+                 variant_order: memoryview):
+        self.status_ids = status_ids
+        self.postings = MappedTable(words, postings)
+        self.variants = MappedVariants(words, variant_order)
+
+    def insert(self, status: str, status_id: str):
+        raise TypeError("A snapshot is read-only")
+
+
+# An inverted index whose vocabulary and posting lists are views of a snapshot
+class MappedIndex(InvertedIndex):
+    def __init__(self, status_ids: MappedStrings, words: MappedStrings, counters: memoryview, postings: MappedBlobs,
+                 shifted_order: memoryview, phrase_index: MappedPositionalIndex = None):
+        self.status_ids = status_ids
+        self.postings = MappedTable(words, postings)
+        self.counters = MappedTable(words, counters)
+        self.sorted_words = words
+        self.sorted_shifted_words = MappedShiftedWords(words, shifted_order)
+        self.is_sorted = True
+        self.phrase_index = phrase_index
+
+    def insert(self, status, status_id):
+        raise TypeError("A snapshot is read-only")
+
+    # Same as InvertedIndex.query, but the posting lists are read by their index in the sorted words, instead of
+    # searching the mapped words for every word in the prefix range again
+    def query(self, search_term: str) -> set[str]:
+        letters = search_letters(search_term)
+        if len(letters) == 0:
+            return set()
+
+        postings = self.postings.values
+        documents = set()
+        start, end = prefix_range(self.sorted_words, letters)
+        for i in range(start, end):
+            documents.update(decode_postings(postings[i]))
+
+        shifted_order = self.sorted_shifted_words.order
+        start, end = prefix_range(self.sorted_shifted_words, letters)
+        for i in range(start, end):
+            word_index = shifted_order[i]
+            if self.sorted_words[word_index][0] != letters[0]:
+                documents.update(decode_postings(postings[word_index]))
+
+        status_ids = self.status_ids
+        return {status_ids[document] for document in documents}
+
+
+# Returns the users sorted by name and the rows of the graph renumbered to that order
+def sorted_graph_arrays(graph) -> (list[str], array, array, array):
+    if isinstance(graph, LiveAffinityGraph):
+        graph = graph.to_csr()
+    elif not isinstance(graph, CSRGraph):
+        graph = CSRGraph.from_networkx(graph)
+
+    order = sorted(range(len(graph.users)), key=graph.users.__getitem__)
+    new_indexes = [0] * len(order)
+    for new_index, index in enumerate(order):
+        new_indexes[index] = new_index
+
+    offsets = array('q', [0])
+    neighbors = array('i')
+    weights = array('d')
+    for index in order:
+        start, end = graph.offsets[index], graph.offsets[index + 1]
+        row = sorted((new_indexes[neighbor], weight)
+                     for neighbor, weight in zip(graph.neighbors[start:end], graph.weights[start:end]))
+        for neighbor, weight in row:
+            neighbors.append(neighbor)
+            weights.append(weight)
+        offsets.append(len(neighbors))
+
+    return [graph.users[index] for index in order], offsets, neighbors, weights
+
+
+# Returns the words, counters and posting lists of a trie, in the form of an inverted index
+# A word's counter is the counter of its node without the counters of its children, its posting list holds the
+# statuses of its node, which can contain longer words that start with it; they match the same queries
+def trie_index_arrays(trie: Trie, status_ids: list[str]) -> dict:
+    documents = {status_id: document for document, status_id in enumerate(status_ids)}
+    counters, postings = {}, {}
+
+    stack = [(trie.root, '')]
+    while stack:
+        node, word = stack.pop()
+        if node.is_terminal:
+            # The root of the trie is never counted
+            counters[word] = 0 if node is trie.root else node.counter - sum(
+                child.counter for child in node.children.values())
+            postings[word] = encode_postings(sorted(documents[status_id] for status_id in node.status_ids))
+        for char, child in reversed(node.children.items()):
+            stack.append((child, word + char))
+
+    return {"counters": counters, "postings": postings}
+
+
+# Returns the sections of the index: status ids, words, counters, postings and the positional postings
+def index_sections(index) -> dict:
+    phrase_index = getattr(index, 'phrase_index', None)
+    if isinstance(index, InvertedIndex):
+        status_ids = list(index.status_ids)
+        data = {"counters": index.counters, "postings": index.postings}
+    elif isinstance(index, Trie):
+        # Documents are numbered in the order that the statuses were inserted, if the trie records it
+        status_ids = list(phrase_index.status_ids) if phrase_index is not None else []
+        known_ids = set(status_ids)
+        status_ids += sorted({status_id for node in index.root.children.values() for status_id in node.status_ids}
+                             - known_ids)
+        data = trie_index_arrays(index, status_ids)
+    else:
+        raise TypeError(f"Can not write a snapshot of {type(index).__name__}")
+
+    words = sorted(data["counters"])
+    word_indexes = {word: i for i, word in enumerate(words)}
+    sections = {
+        "index.status_ids": status_ids,
+        "index.words": words,
+        "index.counters": array('q', [data["counters"][word] for word in words]),
+        "index.postings": [bytes(data["postings"].get(word, b'')) for word in words],
+        "index.shifted": array('i', [word_indexes[word] for word in
+                                     sorted((word for word in words if len(word) > 1),
+                                            key=lambda word: word[1:] + '\0' + word[0])])
+    }
+
+    if phrase_index is not None:
+        phrase_words = sorted(phrase_index.postings)
+        sections["phrase.status_ids"] = list(phrase_index.status_ids)
+        sections["phrase.words"] = phrase_words
+        sections["phrase.postings"] = [bytes(phrase_index.postings[word]) for word in phrase_words]
+        sections["phrase.variants"] = array('i', sorted(range(len(phrase_words)),
+                                                        key=lambda i: (phrase_words[i].lower(), phrase_words[i])))
+    return sections
+
+
+# Returns the flat arrays of a section: arrays stay as they are, a list of strings or byte strings is split into
+# its concatenated data and an array of offsets
+def flatten_section(name: str, values) -> dict:
+    if isinstance(values, array):
+        return {name: values}
+
+    offsets = array('q', [0])
+    data = bytearray()
+    for value in values:
+        data += value.encode('utf-8') if isinstance(value, str) else value
+        offsets.append(len(data))
+    return {name + ".o": offsets, name + ".d": data}
+
+
+# Writes a snapshot of the affinity graph (networkx or CSR) and the search index (trie or inverted index)
+# The file is written next to the destination and renamed, so processes that mapped the old file are not affected
+def write_snapshot(path: str, graph=None, index=None):
+    sections = {}
+    if graph is not None:
+        users, offsets, neighbors, weights = sorted_graph_arrays(graph)
+        sections.update({"graph.users": users, "graph.offsets": offsets, "graph.neighbors": neighbors,
+                         "graph.weights": weights})
+    if index is not None:
+        sections.update(index_sections(index))
+
+    arrays = {}
+    for name, values in sections.items():
+        arrays.update(flatten_section(name, values))
+
+    header_size = header_format.size + section_format.size * len(arrays)
+    offset = header_size
+    table = []
+    for name, values in arrays.items():
+        offset += -offset % 8
+        length = len(values) * values.itemsize if isinstance(values, array) else len(values)
+        table.append((name, offset, length))
+        offset += length
+
+    temporary_path = path + ".tmp"
+    with open(temporary_path, "wb") as file:
+        file.write(header_format.pack(snapshot_magic, snapshot_version, len(arrays), sys.byteorder.encode('ascii')))
+        for name, offset, length in table:
+            file.write(section_format.pack(name.encode('ascii'), offset, length))
+        for (name, offset, length), values in zip(table, arrays.values()):
+            file.write(b'\0' * (offset - file.tell()))
+            file.write(values.tobytes() if isinstance(values, array) else values)
+    os.replace(temporary_path, path)
+
+
+# Returns why the snapshot with the given header can not be mapped, None if it can
+def header_error(path: str, header: bytes):
+    if len(header) < header_format.size:
+        return f"{path} is not a snapshot file"
+    magic, version, section_count, byte_order = header_format.unpack_from(header, 0)
+    if magic != snapshot_magic:
+        return f"{path} is not a snapshot file"
+    if version != snapshot_version:
+        return f"{path} has snapshot version {version}, expected {snapshot_version}"
+    byte_order = byte_order.rstrip(b'\0').decode('ascii', 'replace')
+    if byte_order != sys.byteorder:
+        return (f"{path} was written on a {byte_order}-endian host, it can not be mapped on this {sys.byteorder}-endian "
+                f"host")
+    return None
+
+
+# Returns True if the snapshot exists and can be mapped on this host, e.g. it was not written by an older version
+def is_mappable(path: str) -> bool:
+    try:
+        with open(path, "rb") as file:
+            return header_error(path, file.read(header_format.size)) is None
+    except FileNotFoundError:
+        return False
+
+
+# A mapped snapshot file, the graph and index are views of the file that are loaded lazily by the operating system
+# Processes that open the same file share its pages
+class Snapshot:
+    def __init__(self, path: str):
+        with open(path, "rb") as file:
+            self.buffer = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+        self.view = memoryview(self.buffer)
+
+        error = header_error(path, self.buffer)
+        if error is not None:
+            raise ValueError(error)
+        section_count = header_format.unpack_from(self.buffer, 0)[2]
+
+        self.sections = {}
+        for i in range(section_count):
+            name, offset, length = section_format.unpack_from(self.buffer, header_format.size
+                                                              + section_format.size * i)
+            self.sections[name.rstrip(b'\0').decode('ascii')] = (offset, length)
+
+        self.graph = self.load_graph() if "graph.offsets" in self.sections else None
+        self.index = self.load_index() if "index.counters" in self.sections else None
+
+    # Returns the view of a section, cast to the type code of its array
+    def section(self, name: str, type_code: str = 'B') -> memoryview:
+        offset, length = self.sections[name]
+        view = self.view[offset:offset + length]
+        return view if type_code == 'B' else view.cast(type_code)
+
+    def strings(self, name: str) -> MappedStrings:
+        return MappedStrings(self.section(name + ".d"), self.section(name + ".o", 'q'))
+
+    def blobs(self, name: str) -> MappedBlobs:
+        return MappedBlobs(self.section(name + ".d"), self.section(name + ".o", 'q'))
+
+    def load_graph(self) -> MappedCSRGraph:
+        return MappedCSRGraph(self.strings("graph.users"), self.section("graph.offsets", 'q'),
+                              self.section("graph.neighbors", 'i'), self.section("graph.weights", 'd'))
+
+    def load_index(self) -> MappedIndex:
+        phrase_index = None
+        if "phrase.variants" in self.sections:
+            phrase_index = MappedPositionalIndex(self.strings("phrase.status_ids"), self.strings("phrase.words"),
+                                                 self.blobs("phrase.postings"), self.section("phrase.variants", 'i'))
+
+        return MappedIndex(self.strings("index.status_ids"), self.strings("index.words"),
+                           self.section("index.counters", 'q'), self.blobs("index.postings"),
+                           self.section("index.shifted", 'i'), phrase_index)
+
+
+# Returns the snapshot at the path, creating it from the pickled graph and trie if it does not exist
+def open_snapshot(path: str = "snapshot.bin", graph_path: str = "graph.obj", trie_path: str = "trie.obj") -> Snapshot:
+    if not os.path.exists(path):
+        import_pickles(path, graph_path, trie_path)
+    return Snapshot(path)
+
+
+# Writes a snapshot of the pickled graph and trie files, either of them can be missing
+def import_pickles(path: str = "snapshot.bin", graph_path: str = "graph.obj", trie_path: str = "trie.obj"):
+    objects = []
+    for object_path in (graph_path, trie_path):
+        try:
+            with open(object_path, "rb") as file:
+                objects.append(pickle.load(file))
+        except FileNotFoundError:
+            objects.append(None)
+
+    graph, index = objects
+    if graph is None and index is None:
+        raise FileNotFoundError(f"Neither {graph_path} nor {trie_path} exist")
+    write_snapshot(path, graph, index)
@@ -0,0 +1,111 @@
+import numpy
+
+from affinity_graph import DecayClock, out_weights
+
+# The status counts that make up the popularity of a status and their weights (see status_popularity_rank)
+count_columns = ["num_comments", "num_shares", "num_likes", "num_loves", "num_wows", "num_hahas", "num_sads",
+                 "num_angrys", "num_special"]
+count_weights = numpy.array([40, 10, 5, 10, 25, 10, 5, 25, 30], dtype=numpy.int64)
+
+
+# A columnar copy of the status dictionary which is used to score a whole feed with NumPy
+# Row i of every array belongs to status_ids[i], rows are kept in the insertion order of the status dictionary
+class StatusColumns:
+    def __init__(self, statuses: dict = None):
+        self.status_ids: list[str] = []
+        self.rows: dict = {}  # Maps a status id to its row
+        self.authors: list[str] = []
+        self.author_indexes: dict = {}  # Maps an author to its index in the authors list
+
+        self.counts = numpy.zeros((0, len(count_columns)), dtype=numpy.int64)
+        self.popularity = numpy.zeros(0, dtype=numpy.int64)
+        self.published = numpy.zeros(0, dtype="datetime64[us]")
+        self.author_ids = numpy.zeros(0, dtype=numpy.int64)
+
+        if statuses:
+            self.insert(statuses)
+
+    def __len__(self):
+        return len(self.status_ids)
+
+    # Returns the index of the given author, adding it to the author list if it is missing
+    def author_index(self, author: str) -> int:
+        index = self.author_indexes.get(author)
+        if index is None:
+            index = len(self.authors)
+            self.authors.append(author)
+            self.author_indexes[author] = index
+        return index
+
+    # Inserts statuses into the columns, a status that is already stored is overwritten in its row
+    # (the same way dict.update keeps the position of an existing key)
+    def insert(self, statuses: dict):
+        new_rows = []
+        for status_id, status in statuses.items():
+            row = (status_id, [status[column] for column in count_columns], status['status_published'],
+                   self.author_index(status['author']))
+            if status_id in self.rows:
+                index = self.rows[status_id]
+                self.counts[index] = row[1]
+                self.popularity[index] = self.counts[index] @ count_weights
+                self.published[index] = row[2]
+                self.author_ids[index] = row[3]
+            else:
+                self.rows[status_id] = len(self.status_ids) + len(new_rows)
+                new_rows.append(row)
+
+        if not new_rows:
+            return
+
+        counts = numpy.array([row[1] for row in new_rows], dtype=numpy.int64)
+        self.status_ids.extend(row[0] for row in new_rows)
+        self.counts = numpy.concatenate((self.counts, counts))
+        self.popularity = numpy.concatenate((self.popularity, counts @ count_weights))
+        self.published = numpy.concatenate(
+            (self.published, numpy.array([row[2] for row in new_rows], dtype="datetime64[us]")))
+        self.author_ids = numpy.concatenate(
+            (self.author_ids, numpy.array([row[3] for row in new_rows], dtype=numpy.int64)))
+
+    # Returns the date multiplier of every status
+    def date_multipliers(self, clock: DecayClock = None) -> numpy.ndarray:
+        if clock is None:
+            clock = DecayClock()
+
+        day_differences = (numpy.datetime64(clock.current_date, "us") - self.published) // numpy.timedelta64(1, "D")
+        # The multiplier only depends on whole days, so it is computed once per distinct day difference
+        days, inverse = numpy.unique(day_differences, return_inverse=True)
+        multipliers = numpy.array([clock.day_multiplier(int(day)) for day in days], dtype=numpy.float64)
+        return multipliers[inverse]
+
+    # Returns the affinity between the user and every author (0 for authors without an edge)
+    def author_affinities(self, graph, user_name: str) -> numpy.ndarray:
+        affinities = numpy.zeros(len(self.authors), dtype=numpy.float64)
+        for author, weight in out_weights(graph, user_name).items():
+            index = self.author_indexes.get(author)
+            if index is not None:
+                affinities[index] = weight
+        return affinities
+
+    # Returns the relevance of every status for the given user
+    def relevances(self, graph, user_name: str, clock: DecayClock = None) -> numpy.ndarray:
+        affinities = self.author_affinities(graph, user_name)
+        return (affinities[self.author_ids] + self.popularity) * self.date_multipliers(clock)
+
+    # Returns a list of (status id, relevance) pairs of the k most relevant statuses for the given user
+    # Equally relevant statuses are ordered by their row, which matches the stable sort of get_feed
+    def top_statuses(self, graph, user_name: str, k: int = 10, clock: DecayClock = None) -> list[(str, float)]:
+        relevances = self.relevances(graph, user_name, clock)
+        if k <= 0 or len(relevances) == 0:
+            return []
+
+        if k < len(relevances):
+            partition = numpy.argpartition(-relevances, k - 1)[:k]
+            threshold = relevances[partition].min()
+            above = numpy.flatnonzero(relevances > threshold)
+            equal = numpy.flatnonzero(relevances == threshold)[:k - len(above)]
+            candidates = numpy.concatenate((above, equal))
+        else:
+            candidates = numpy.arange(len(relevances))
+
+        order = candidates[numpy.lexsort((candidates, -relevances[candidates]))]
+        return [(self.status_ids[row], float(relevances[row])) for row in order]
@@ -0,0 +1,159 @@
+import random
+from datetime import datetime, timedelta
+
+import networkx
+import pytest
+
+import affinity_graph
+from affinity_graph import DecayClock, affinity, insert_data, insert_delta, out_weights
+from records import Comment, Reaction, Share, Status
+
+clock = DecayClock(datetime(2018, 6, 1, 12))
+users = ["Ana", "Ivan", "Marko", "Petra", "Luka"]
+friends = {"Ana": ["Ivan"], "Ivan": ["Ana"], "Marko": [], "Petra": ["Luka"], "Luka": ["Petra"]}
+
+
+# datetime with today() pinned to the clock's date, for the functions that read the wall clock
+class PinnedDatetime(datetime):
+    @classmethod
+    def today(cls):
+        return clock.current_date
+
+
+def status(status_id: str, author: str) -> Status:
+    return Status(status_id, "", "status", "", clock.current_date, author, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0)
+
+
+def days_ago(days: int) -> datetime:
+    return clock.current_date - timedelta(days=days, hours=1)
+
+
+def group(actions, user_field: str) -> dict:
+    grouped = {}
+    for action in actions:
+        grouped.setdefault(action[user_field], []).append(action)
+    return grouped
+
+
+def merge(first: dict, second: dict) -> dict:
+    return {user: first.get(user, []) + second.get(user, []) for user in first.keys() | second.keys()}
+
+
+old_statuses = {status_id: status(status_id, author) for status_id, author in
+                [("1", "Ana"), ("2", "Marko"), ("3", "Petra"), ("4", "Luka")]}
+new_statuses = {status_id: status(status_id, author) for status_id, author in [("5", "Marko"), ("6", "Ivan")]}
+
+old_comments = group([Comment("c1", "2", "", "", "Ana", days_ago(1), 0, 0, 0, 0, 0, 0, 0, 0),
+                      Comment("c2", "3", "", "", "Marko", days_ago(9), 0, 0, 0, 0, 0, 0, 0, 0)], "comment_author")
+old_reactions = group([Reaction("2", "likes", "Petra", days_ago(0)), Reaction("1", "loves", "Luka", days_ago(30)),
+                       Reaction("5", "wows", "Ana", days_ago(2))], "reactor")
+old_shares = group([Share("4", "Marko", days_ago(3))], "sharer")
+# The new actions include actions on the new statuses, on an old status and a pair that had an edge before
+new_comments = group([Comment("c3", "5", "", "", "Petra", days_ago(0), 0, 0, 0, 0, 0, 0, 0, 0)], "comment_author")
+new_reactions = group([Reaction("2", "hahas", "Ana", days_ago(1)), Reaction("6", "likes", "Luka", days_ago(4))],
+                      "reactor")
+new_shares = group([Share("3", "Marko", days_ago(2))], "sharer")
+
+
+def statuses_by_user(statuses: dict) -> dict:
+    by_user = {}
+    for status_id, user_status in statuses.items():
+        by_user.setdefault(user_status['author'], {})[status_id] = user_status
+    return by_user
+
+
+# The O(U^2) pair loop of the original insert_data, which scans the actions of the user for every second user
+def insert_data_pair_loop(friends, comments, reactions, shares, statuses, statuses_by_user) -> networkx.DiGraph:
+    graph = networkx.DiGraph()
+    user_list = friends.keys()
+    for user_id in user_list:
+        for second_user_id in user_list:
+            user_affinity = 0
+            if second_user_id in friends[user_id]:
+                user_affinity += 5000
+            else:
+                if second_user_id not in statuses_by_user or second_user_id == user_id:
+                    continue
+                user_affinity += affinity(user_id, second_user_id, comments, reactions, shares, statuses)
+
+            if user_affinity > 0:
+                graph.add_edge(user_id, second_user_id, weight=user_affinity)
+
+    return graph
+
+
+# Returns friends, comments, reactions, shares and statuses of random users. The data includes friends and authors
+# that are not users, actors that are not users, actions on unknown statuses, actions on the users' own statuses and
+# actions from the last hours up to 40 days ago and a little in the future
+def random_dataset(seed: int) -> tuple:
+    rng = random.Random(seed)
+    user_names = [f"user{i}" for i in range(25)]
+    friends = {user_name: rng.sample(user_names + ["ghost"], rng.randint(0, 4)) for user_name in user_names}
+    authors = user_names + ["page"]
+    statuses = {str(i): status(str(i), rng.choice(authors)) for i in range(60)}
+    status_ids = list(statuses) + ["missing1", "missing2"]
+    actors = user_names + ["outsider"]
+
+    def action_date() -> datetime:
+        return clock.current_date - timedelta(minutes=rng.randint(-300, 40 * 24 * 60))
+
+    comments = group([Comment(f"c{i}", rng.choice(status_ids), "", "", rng.choice(actors), action_date(),
+                              0, 0, 0, 0, 0, 0, 0, 0) for i in range(300)], "comment_author")
+    reactions = group([Reaction(rng.choice(status_ids), rng.choice(list(affinity_graph.reaction_type_weights)),
+                                rng.choice(actors), action_date()) for _ in range(600)], "reactor")
+    shares = group([Share(rng.choice(status_ids), rng.choice(actors), action_date()) for _ in range(150)], "sharer")
+    return friends, comments, reactions, shares, statuses
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_insert_data_equals_pair_loop(monkeypatch, seed):
+    monkeypatch.setattr(affinity_graph, "datetime", PinnedDatetime)
+    friends, comments, reactions, shares, statuses = random_dataset(seed)
+    by_user = statuses_by_user(statuses)
+
+    graph = insert_data(None, friends, comments, reactions, shares, statuses, by_user, DecayClock(clock.current_date))
+    pair_loop = insert_data_pair_loop(friends, comments, reactions, shares, statuses, by_user)
+
+    # The edges are added in the same order, so feeds break ties between equal weights the same way
+    assert list(graph.edges()) == list(pair_loop.edges())
+    for user_id, second_user_id, weight in pair_loop.edges(data='weight'):
+        assert graph[user_id][second_user_id]['weight'] == pytest.approx(weight, rel=1e-12, abs=0)
+
+
+def test_affinity_state_equals_affinity(monkeypatch):
+    monkeypatch.setattr(affinity_graph, "datetime", PinnedDatetime)
+    friends, comments, reactions, shares, statuses = random_dataset(5)
+    state = affinity_graph.AffinityState(friends, DecayClock(clock.current_date))
+    state.add_actions(comments, reactions, shares, statuses)
+
+    for user_name in list(friends) + ["outsider"]:
+        for author in set(statuses_by_user(statuses)):
+            expected = affinity(user_name, author, comments, reactions, shares, statuses)
+            assert state.affinity(user_name, author) == pytest.approx(expected, rel=1e-12, abs=0)
+
+
+def test_insert_delta_equals_rebuild():
+    statuses = dict(old_statuses)
+    graph = insert_data(None, friends, old_comments, old_reactions, old_shares, statuses, statuses_by_user(statuses),
+                        clock)
+
+    statuses.update(new_statuses)
+    changed_edges = set()
+    insert_delta(graph, new_comments, new_reactions, new_shares, new_statuses, statuses, statuses_by_user(statuses),
+                 changed_edges, DecayClock(clock.current_date))
+
+    rebuilt = insert_data(None, friends, merge(old_comments, new_comments), merge(old_reactions, new_reactions),
+                          merge(old_shares, new_shares), statuses, statuses_by_user(statuses), clock)
+    for user in users:
+        assert out_weights(graph, user) == out_weights(rebuilt, user)
+    # The reaction on status 5 only counts once the status is added
+    assert ("Ana", "Marko") in changed_edges and ("Luka", "Ivan") in changed_edges
+    assert ("Ana", "Ivan") not in changed_edges
+
+
+def test_insert_delta_on_another_day_raises():
+    graph = insert_data(None, friends, old_comments, old_reactions, old_shares, old_statuses,
+                        statuses_by_user(old_statuses), clock)
+    with pytest.raises(ValueError):
+        insert_delta(graph, {}, {}, {}, {}, old_statuses, statuses_by_user(old_statuses),
+                     clock=DecayClock(clock.current_date + timedelta(days=1)))
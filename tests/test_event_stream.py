@@ -0,0 +1,46 @@
+import json
+
+import pytest
+
+from event_stream import EventError, parse_event
+from records import Comment, Reaction, Share
+
+
+def test_parse_share_event():
+    action_type, share = parse_event('{"type": "share", "status_id": "1_2", "sharer": "Ana", '
+                                     '"status_shared": "2018-05-01 10:00:00"}')
+    assert action_type == 2 and isinstance(share, Share)
+    assert share["sharer"] == "Ana" and share["status_shared"].day == 1
+
+
+def test_parse_comment_event_with_optional_counts():
+    action_type, comment = parse_event(json.dumps({
+        "type": "comment", "comment_id": "c1", "status_id": "1_2", "comment_author": "Ana",
+        "comment_published": "2018-05-01 10:00:00", "num_likes": "3"}))
+    assert action_type == 0 and isinstance(comment, Comment)
+    assert comment["num_likes"] == 3 and comment["num_reactions"] == 0
+
+
+def test_parse_reaction_event():
+    action_type, reaction = parse_event('{"type": "reaction", "status_id": "1_2", "type_of_reaction": "likes", '
+                                        '"reactor": "Ana", "reacted": "2018-05-01 10:00:00"}')
+    assert action_type == 1 and isinstance(reaction, Reaction)
+
+
+@pytest.mark.parametrize("line, message", [
+    ('{"type": "share"', "Malformed JSON"),
+    ('[1, 2]', "Unknown event type"),
+    ('{"status_id": "1_2"}', "Unknown event type"),
+    ('{"type": "like"}', "Unknown event type"),
+    ('{"type": "share", "status_id": "1_2", "sharer": "Ana"}', "Missing field"),
+    ('{"type": "share", "status_id": "1_2", "sharer": "Ana", "status_shared": "yesterday"}', "Malformed share"),
+    ('{"type": "reaction", "status_id": "1_2", "type_of_reaction": "boo", "reactor": "Ana", '
+     '"reacted": "2018-05-01 10:00:00"}', "Unknown reaction type"),
+    ('{"type": "comment", "comment_id": "c1", "status_id": "1_2", "comment_author": "Ana", '
+     '"comment_published": "2018-05-01 10:00:00", "num_likes": "many"}', "Malformed comment"),
+    ('{"type": "share", "status_id": 12, "sharer": "Ana", "status_shared": "2018-05-01 10:00:00"}',
+     "Malformed share"),
+])
+def test_parse_event_errors(line, message):
+    with pytest.raises(EventError, match=message):
+        parse_event(line)
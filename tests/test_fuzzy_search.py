@@ -0,0 +1,58 @@
+import random
+
+from normalization import search_letters
+from search_trie import Trie
+
+words = ["team", "teams", "tea", "steam", "great", "greet", "grate", "game", "games", "gamer", "again", "gain",
+         "america", "amerika", "make", "made", "mate", "a", "at", "ate", "eat", "tame"]
+
+
+def levenshtein(first: str, second: str) -> int:
+    previous_row = list(range(len(second) + 1))
+    for i, first_char in enumerate(first, 1):
+        row = [i]
+        for j, second_char in enumerate(second, 1):
+            row.append(min(row[j - 1] + 1, previous_row[j] + 1, previous_row[j - 1] + (first_char != second_char)))
+        previous_row = row
+    return previous_row[-1]
+
+
+def build_trie() -> Trie:
+    rng = random.Random(0)
+    trie = Trie()
+    for number in range(40):
+        trie.insert(" ".join(rng.choices(words, k=5)), f"1_{number}")
+    return trie
+
+
+# Returns the words within max_distance edits of the term by comparing the term with every word of the trie
+def brute_force(trie: Trie, term: str, max_distance: int) -> dict:
+    matches = {}
+    stack = [trie.root]
+    while stack:
+        node = stack.pop()
+        stack.extend(node.children.values())
+        if node.is_terminal and node.word:
+            distance = levenshtein(search_letters(term), node.word)
+            if distance <= max_distance:
+                matches[node.word] = distance
+    return matches
+
+
+def test_fuzzy_nodes_matches_brute_force():
+    trie = build_trie()
+    for term in ("team", "gme", "Amerca", "greaat", "x", "mkae", "steams", "at"):
+        for max_distance in range(3):
+            found = {word: distance for word, node, distance in trie.fuzzy_nodes(term, max_distance)}
+            assert found == brute_force(trie, term, max_distance), (term, max_distance)
+
+
+def test_fuzzy_nodes_returns_terminal_nodes_of_words():
+    trie = build_trie()
+    for word, node, distance in trie.fuzzy_nodes("grate", 1):
+        assert node.is_terminal and node.word == word
+        assert node is trie.find_prefix_node(word)
+
+
+def test_fuzzy_nodes_of_empty_term():
+    assert build_trie().fuzzy_nodes("#!", 2) == []
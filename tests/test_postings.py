@@ -0,0 +1,92 @@
+import random
+
+import pytest
+
+from inverted_index import InvertedIndex
+from postings import decode_postings, encode_postings, rebase_postings
+from search_trie import PositionalIndex, Trie
+
+statuses = [("Make America great again", "1_1"), ("Great game, great team!", "1_2"),
+            ("The team is GREAT", "1_3"), ("make it so", "1_4"), ("Games and teams of America", "1_5"),
+            ("again and again", "1_6"), ("", "1_7"), ("team  spirit", "1_8")]
+
+
+def build(index_class, shard):
+    index = index_class()
+    for status, status_id in shard:
+        index.insert(status, status_id)
+    return index
+
+
+# Returns the index of the statuses built from separately built shards of consecutive statuses
+def build_merged(index_class, shard_sizes):
+    shards = []
+    start = 0
+    for size in shard_sizes:
+        shards.append(statuses[start:start + size])
+        start += size
+    index = build(index_class, shards[0])
+    for shard in shards[1:]:
+        index.merge(build(index_class, shard))
+    return index
+
+
+def test_rebase_postings_concatenates_split_lists():
+    rng = random.Random(0)
+    for _ in range(200):
+        documents = sorted(rng.sample(range(100000), rng.randint(2, 50)))
+        split = rng.randint(1, len(documents) - 1)
+        offset = rng.randint(0, documents[split])
+        first = encode_postings(documents[:split])
+        second = encode_postings(document - offset for document in documents[split:])
+        merged = first + rebase_postings(second, offset, documents[split - 1])
+        assert decode_postings(merged) == documents
+        assert merged == encode_postings(documents)
+
+
+def test_rebase_postings_of_new_word():
+    documents = [3, 200, 70000]
+    rebased = rebase_postings(encode_postings(documents), 1000, 0)
+    assert decode_postings(rebased) == [document + 1000 for document in documents]
+
+
+def test_positional_index_merge_equals_serial_build():
+    serial = build(PositionalIndex, statuses)
+    merged = build_merged(PositionalIndex, [3, 1, 4])
+    assert merged.status_ids == serial.status_ids
+    assert merged.documents == serial.documents
+    assert merged.postings == serial.postings
+    assert merged.last_documents == serial.last_documents
+    assert merged.variants == serial.variants
+
+
+def test_positional_index_merge_rejects_shared_statuses():
+    index = build(PositionalIndex, statuses[:2])
+    with pytest.raises(ValueError):
+        index.merge(build(PositionalIndex, statuses[1:3]))
+
+
+def test_inverted_index_merge_equals_serial_build():
+    serial = build(InvertedIndex, statuses)
+    merged = build_merged(InvertedIndex, [2, 5, 1])
+    assert merged.postings == serial.postings
+    assert merged.counters == serial.counters
+    for word in ("great", "team", "am", "again", "zzz"):
+        assert merged.query(word) == serial.query(word)
+    assert merged.autocomplete_all("") == serial.autocomplete_all("")
+
+
+def test_trie_merge_equals_serial_build():
+    serial = build(Trie, statuses)
+    merged = build_merged(Trie, [4, 4])
+    stack = [(serial.root, merged.root)]
+    while stack:
+        node, merged_node = stack.pop()
+        assert node.counter == merged_node.counter
+        assert node.status_ids == merged_node.status_ids
+        assert node.word == merged_node.word
+        assert list(node.children) == list(merged_node.children)
+        assert [completion.word for completion in node.completions] == \
+               [completion.word for completion in merged_node.completions]
+        stack.extend((child, merged_node.children[char]) for char, child in node.children.items())
+    assert merged.phrase_index.postings == serial.phrase_index.postings
@@ -0,0 +1,48 @@
+from datetime import datetime
+
+import pytest
+
+from records import Reaction, Share, Status
+
+
+def make_status() -> Status:
+    return Status("1_2", "Hello", "status", "", datetime(2018, 5, 1, 10), "Ana", 3, 1, 2, 1, 1, 0, 0, 0, 1, 0)
+
+
+def test_record_reads_like_dict():
+    share = Share("1_2", "Ana", datetime(2018, 5, 1, 10))
+    expected = {"status_id": "1_2", "sharer": "Ana", "status_shared": datetime(2018, 5, 1, 10)}
+    assert share == expected
+    assert dict(share.items()) == expected
+    assert share.keys() == list(expected)
+    assert list(share) == list(expected)
+    assert len(share) == len(expected)
+    assert share["sharer"] == "Ana"
+    assert share.get("sharer") == "Ana"
+    assert share.get("unknown", 5) == 5
+    assert "sharer" in share and "unknown" not in share
+
+
+def test_unset_field_is_missing():
+    status = make_status()
+    assert "popularity" not in status
+    assert status.get("popularity") is None
+    assert len(status) == len(Status.fields) - 1
+    with pytest.raises(AttributeError):
+        status["popularity"]
+
+
+def test_record_writes_like_dict():
+    status = make_status()
+    status["popularity"] = 120
+    assert status["popularity"] == 120
+    assert "popularity" in status
+    assert dict(status.items())["popularity"] == 120
+
+
+def test_record_equality():
+    reaction = Reaction("1_2", "like", "Ana", datetime(2018, 5, 1, 10))
+    assert reaction == Reaction("1_2", "like", "Ana", datetime(2018, 5, 1, 10))
+    assert reaction != Reaction("1_2", "love", "Ana", datetime(2018, 5, 1, 10))
+    assert reaction != Share("1_2", "Ana", datetime(2018, 5, 1, 10))
+    assert reaction != dict(reaction.items(), reactor="Ivan")
@@ -0,0 +1,28 @@
+import heapq
+
+
+# Keeps the k most relevant of the offered items in a min-heap of (relevance, -ordinal, item) entries
+# An item's ordinal is the position of its status in the status dictionary, so equally relevant items keep the order
+# of the statuses like the stable order of get_feed. Ordinals are unique, so the items themselves are never compared
+class TopK:
+    def __init__(self, k: int):
+        self.k = k
+        self.heap = []
+
+    def offer(self, relevance, ordinal: int, item):
+        entry = (relevance, -ordinal, item)
+        if len(self.heap) < self.k:
+            heapq.heappush(self.heap, entry)
+        elif entry[:2] > self.heap[0][:2]:
+            heapq.heapreplace(self.heap, entry)
+
+    # Returns True if an item has to be more relevant than min_relevance() to be kept
+    def is_full(self) -> bool:
+        return len(self.heap) >= self.k
+
+    def min_relevance(self):
+        return self.heap[0][0]
+
+    # Returns a list of the (relevance, item) pairs, the most relevant first
+    def items(self) -> list:
+        return [(relevance, item) for relevance, _, item in sorted(self.heap, key=lambda entry: (-entry[0], -entry[1]))]